@@ -0,0 +1,66 @@
+"""Kiem tra do khop (cosine) voi eager torch tren dataset/train va do faces/sec cho tung backend FaceNet.
+
+Chay tu thu muc AI-Service:
+    python -m benchmarks.bench_backends                       # tat ca backend
+    python -m benchmarks.bench_backends --backends onnx onnx-int8 --batch 8
+Tra ve exit code 1 neu co backend khong dat nguong cosine (--min-cos / --min-cos-int8).
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import torch
+
+from benchmarks.bench_batch_embedding import load_crops
+from edge_ai.backends import BACKENDS, load_backend, cosine_similarity
+from edge_ai.embedding import FaceEmbedder
+
+
+def faces_per_sec(embedder, crops, seconds):
+    embedder.embed(crops)  # warm-up
+    done, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        embedder.embed(crops)
+        done += len(crops)
+    return done / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--dataset", default="dataset/train")
+    parser.add_argument("--batch", type=int, default=8, help="So khuon mat moi lan forward khi do toc do")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--min-cos", type=float, default=0.999)
+    parser.add_argument("--min-cos-int8", type=float, default=0.98)
+    args = parser.parse_args()
+
+    device = torch.device("cpu")
+    faces = load_crops(None, args.dataset) or load_crops(args.batch)
+    reference, _ = load_backend("eager", device)
+    ref_emb = FaceEmbedder(reference, max_batch=32).embed(faces)
+    bench_crops = (faces * args.batch)[:args.batch]
+
+    print(f"parity faces={len(faces)} ({args.dataset}) | speed batch={args.batch} threads={torch.get_num_threads()}")
+    print(f"{'backend':<12} | {'note':<32} | {'min cos':>8} | {'mean cos':>8} | {'faces/sec':>9}")
+    failed = False
+    for name in args.backends:
+        try:
+            backend, note = load_backend(name, device)
+        except Exception as e:
+            print(f"{name:<12} | unavailable: {e}")
+            continue
+        embedder = FaceEmbedder(backend, max_batch=args.batch)
+        cos = cosine_similarity(ref_emb, embedder.embed(faces))
+        fps = faces_per_sec(embedder, bench_crops, args.seconds)
+        limit = args.min_cos_int8 if name == "onnx-int8" else args.min_cos
+        ok = cos.min() >= limit
+        failed |= not ok
+        print(f"{backend.name:<12} | {note[:32]:<32} | {cos.min():>8.4f} | {cos.mean():>8.4f} | {fps:>9.1f}"
+              + ("" if ok else f"  FAIL (< {limit})"))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
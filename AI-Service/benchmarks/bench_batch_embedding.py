@@ -0,0 +1,62 @@
+"""Benchmark: do tre moi frame theo so khuon mat, tuan tu (1 forward/khuon mat) vs batch.
+
+Chay tu thu muc AI-Service:
+    python -m benchmarks.bench_batch_embedding --max-faces 10 --max-batch 16
+"""
+import argparse
+import glob
+import time
+import cv2
+import numpy as np
+import torch
+
+from edge_ai.backends import load_backend, BACKENDS, EMBED_BACKEND
+from edge_ai.embedding import FaceEmbedder
+
+
+def load_crops(n=None, folder="dataset/train"):
+    """Lay anh that trong dataset neu co, neu khong thi tao crop ngau nhien co kich thuoc nguoi (n=None: tat ca anh)"""
+    paths = sorted(glob.glob(f"{folder}/*/*.jpg"))
+    crops = [cv2.imread(p) for p in paths[:n]]
+    crops = [c for c in crops if c is not None]
+    rng = np.random.default_rng(0)
+    while n is not None and len(crops) < n:
+        crops.append(rng.integers(0, 255, (320, 180, 3), dtype=np.uint8))
+    return crops
+
+
+def time_frame(fn, crops, repeats):
+    fn(crops)  # warm-up
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(crops)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-faces", type=int, default=10)
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--backend", choices=BACKENDS, default=EMBED_BACKEND)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    backend, _ = load_backend(args.backend, device)
+    sequential = FaceEmbedder(backend, max_batch=1)
+    batched = FaceEmbedder(backend, max_batch=args.max_batch)
+    crops = load_crops(args.max_faces)
+
+    print(f"device={device} backend={backend.name} max_batch={args.max_batch} repeats={args.repeats}")
+    print(f"{'faces':>5} | {'sequential ms':>13} | {'batched ms':>10} | {'speedup':>7}")
+    for n in range(1, args.max_faces + 1):
+        seq_ms = time_frame(sequential.embed, crops[:n], args.repeats)
+        bat_ms = time_frame(batched.embed, crops[:n], args.repeats)
+        print(f"{n:>5} | {seq_ms:>13.1f} | {bat_ms:>10.1f} | {seq_ms / bat_ms:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Cascade nguoi -> mat: chi phi tung stage va do chinh xac nhan dien theo kich thuoc anh vao YOLO.
+
+Chay tu thu muc AI-Service (can ultralytics + facenet_pytorch):
+    python -m benchmarks.bench_cascade --scenes dataset/scenes --gallery dataset/train --imgsz 320 416 640 0
+
+--scenes: <ten>/*.jpg la khung hinh camera co 1 nguoi (nhan = ten thu muc, "stranger" = nguoi khong dang ky).
+--gallery: crop khuon mat dang ky (<ten>/*.jpg nhu dataset/train).
+Moi imgsz: YOLO -> nguoi lon nhat -> (a) ca crop nguoi -> FaceNet (cach cu), (b) MTCNN trong crop -> mat -> FaceNet.
+"""
+import argparse
+import os
+import time
+import cv2
+import numpy as np
+
+from edge_ai.cascade import FaceLocator, detect_people
+from edge_ai.gallery import GalleryIndex, MATCH_THRESHOLD
+
+
+def load_folder(folder):
+    """[(ten, anh BGR)] cho <folder>/<ten>/*.jpg"""
+    items = []
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if not os.path.isdir(path) or name.startswith("."):
+            continue
+        for f in sorted(os.listdir(path)):
+            img = cv2.imread(os.path.join(path, f))
+            if img is not None:
+                items.append((name, img))
+    return items
+
+
+class StageTimer:
+    def __init__(self):
+        self.ms = {}
+
+    def run(self, stage, fn, *args):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        self.ms.setdefault(stage, []).append((time.perf_counter() - t0) * 1000)
+        return result
+
+    def mean(self, stage):
+        return float(np.mean(self.ms[stage])) if self.ms.get(stage) else 0.0
+
+
+def decide(gallery, embs):
+    names, dists = gallery.match(embs)
+    return [n if d < MATCH_THRESHOLD else "stranger" for n, d in zip(names, dists)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenes", required=True, help="Khung hinh camera <ten>/*.jpg")
+    parser.add_argument("--gallery", default="dataset/train", help="Crop khuon mat dang ky <ten>/*.jpg")
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[320, 416, 640, 0], help="0 = mac dinh model")
+    parser.add_argument("--warmup", type=int, default=2)
+    args = parser.parse_args()
+
+    from edge_ai.embedding import FaceEmbedder
+    from edge_ai.models import select_device, load_yolo, load_facenet, load_mtcnn
+    device = select_device()
+    detector = load_yolo()
+    backend, note = load_facenet(device)
+    embedder = FaceEmbedder(backend)
+    mtcnn = load_mtcnn(device)
+    if mtcnn is None:
+        parser.error("facenet_pytorch MTCNN is required for the cascade")
+    print(f"[INFO] FaceNet backend: {backend.name} ({note})")
+
+    gallery = GalleryIndex()
+    enrolled = {}
+    for name, img in load_folder(args.gallery):
+        enrolled.setdefault(name, []).append(img)
+    gallery.add_many({name: embedder.embed(crops) for name, crops in enrolled.items()})
+    scenes = load_folder(args.scenes)
+    if not scenes:
+        parser.error(f"no images in {args.scenes}")
+    print(f"staff={len(enrolled)} scenes={len(scenes)} threshold={MATCH_THRESHOLD}")
+    print(f"{'imgsz':>6} | {'yolo ms':>7} | {'person':>6} | {'mtcnn ms':>8} | {'face':>6} | {'embed ms':>8} | "
+          f"{'acc body':>8} | {'acc face':>8}")
+
+    for imgsz in args.imgsz:
+        locator = FaceLocator(mtcnn)
+        timer = StageTimer()
+        for _, img in scenes[:args.warmup]:
+            detect_people(detector, img, imgsz)
+        found, correct_body, correct_face = 0, 0, 0
+        for label, img in scenes:
+            boxes = timer.run("yolo", detect_people, detector, img, imgsz)
+            if not boxes:
+                correct_body += label == "stranger"
+                correct_face += label == "stranger"
+                continue
+            found += 1
+            x1, y1, x2, y2 = max(boxes, key=lambda b: (b[2] - b[0]) * (b[3] - b[1]))
+            person = img[max(0, y1):y2, max(0, x1):x2]
+            body_emb = timer.run("embed_body", embedder.embed, [person])
+            faces = timer.run("mtcnn", locator.extract, [person])
+            face_emb = timer.run("embed_face", embedder.embed, faces)
+            correct_body += decide(gallery, body_emb)[0] == label
+            correct_face += decide(gallery, face_emb)[0] == label
+        n = len(scenes)
+        print(f"{imgsz or 'model':>6} | {timer.mean('yolo'):>7.1f} | {found / n:>6.1%} | {timer.mean('mtcnn'):>8.1f} | "
+              f"{locator.found_ratio:>6.1%} | {timer.mean('embed_face'):>8.1f} | {correct_body / n:>8.1%} | "
+              f"{correct_face / n:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
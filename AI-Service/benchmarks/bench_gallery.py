@@ -0,0 +1,82 @@
+"""Micro-benchmark: GalleryIndex (NumPy matmul + argpartition) vs duong sklearn cu (kneighbors + predict).
+
+Chay tu thu muc AI-Service:
+    python -m benchmarks.bench_gallery --sizes 20 1000 10000 100000 --queries 8
+"""
+import argparse
+import time
+import numpy as np
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from edge_ai.gallery import GalleryIndex, l2_normalize, EMBEDDING_DIM
+
+IMAGES_PER_PERSON = 20
+
+
+def make_gallery(size, rng):
+    """Gallery gia lap: moi nguoi 20 vector quanh 1 tam (giong du lieu dang ky that)"""
+    people = max(1, size // IMAGES_PER_PERSON)
+    centers = l2_normalize(rng.normal(size=(people, EMBEDDING_DIM)))
+    labels = np.repeat(np.arange(people), IMAGES_PER_PERSON)[:size]
+    X = l2_normalize(centers[labels] + 0.04 * rng.normal(size=(size, EMBEDDING_DIM)))
+    names = np.array([f"staff_{i:05d}" for i in labels])
+    return X, names, centers
+
+
+def median_ms(fn, repeats):
+    fn()
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=8, help="So khuon mat trong 1 frame")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"queries/frame={args.queries}")
+    print(f"{'vectors':>8} | {'fit ms':>8} | {'sklearn ms':>10} | {'build ms':>8} | {'index ms':>8} | {'speedup':>7} | agree")
+    for size in args.sizes:
+        X, names, centers = make_gallery(size, rng)
+        picks = rng.integers(0, len(centers), args.queries)
+        queries = l2_normalize(centers[picks] + 0.06 * rng.normal(size=(args.queries, EMBEDDING_DIM)))
+        k = min(7, len(set(names)))
+
+        # Duong cu: LabelEncoder + KNeighborsClassifier, moi khuon mat goi kneighbors + predict rieng
+        t0 = time.perf_counter()
+        encoder = LabelEncoder()
+        classifier = KNeighborsClassifier(n_neighbors=k, metric='euclidean').fit(X, encoder.fit_transform(names))
+        fit_ms = (time.perf_counter() - t0) * 1000
+
+        def sklearn_path():
+            out = []
+            for q in queries:
+                distances, _ = classifier.kneighbors([q])
+                label = encoder.inverse_transform(classifier.predict([q]))[0]
+                out.append((label, np.mean(distances[0])))
+            return out
+
+        t0 = time.perf_counter()
+        index = GalleryIndex()
+        for start in range(0, size, IMAGES_PER_PERSON):
+            index.add(names[start], X[start:start + IMAGES_PER_PERSON])
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        sk_ms = median_ms(sklearn_path, args.repeats)
+        ix_ms = median_ms(lambda: index.match(queries), args.repeats)
+        sk_names = [n for n, _ in sklearn_path()]
+        ix_names, _ = index.match(queries)
+        agree = sum(a == b for a, b in zip(sk_names, ix_names)) / len(queries)
+        print(f"{size:>8} | {fit_ms:>8.1f} | {sk_ms:>10.2f} | {build_ms:>8.1f} | {ix_ms:>8.2f} | {sk_ms / ix_ms:>6.1f}x | {agree:.0%}")
+
+
+if __name__ == "__main__":
+    main()
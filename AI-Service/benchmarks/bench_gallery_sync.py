@@ -0,0 +1,107 @@
+"""Khoi dong gallery: nap lai toan bo tu DB vs cache tren dia + dong bo tang dan (tren collection gia lap).
+
+Chay tu thu muc AI-Service:
+    python -m benchmarks.bench_gallery_sync --staff 50 500 5000
+Thoat voi ma 1 neu dong bo tang dan tai sai so nhan vien hoac gallery lech voi DB.
+"""
+import argparse
+import io
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+
+from edge_ai.gallery import GalleryIndex, l2_normalize, EMBEDDING_DIM
+from edge_ai.gallery_cache import GalleryCache, GallerySync
+from edge_ai.localdb import LocalCollection
+
+IMAGES_PER_PERSON = 20
+
+
+def blob(embs):
+    buf = io.BytesIO()
+    np.save(buf, embs)
+    return buf.getvalue()
+
+
+def put(collection, name, embs):
+    collection.find_one_and_update({"name": name}, {"$set": {"embeddings": blob(embs), "updated_at": time.time()},
+                                                    "$inc": {"version": 1}}, upsert=True)
+
+
+def full_reload(collection):
+    """Duong cu (load_known_faces): tai moi document + np.load tung blob + dung lai gallery"""
+    gallery = GalleryIndex()
+    for doc in collection.find({}):
+        gallery.add(doc["name"], np.load(io.BytesIO(doc["embeddings"])))
+    return gallery
+
+
+def check(ok, message):
+    print(f"  [{'OK' if ok else 'FAIL'}] {message}")
+    return ok
+
+
+def run(staff, rng, cache_dir):
+    collection = LocalCollection()
+    for i in range(staff):
+        put(collection, f"staff_{i:05d}", l2_normalize(rng.normal(size=(IMAGES_PER_PERSON, EMBEDDING_DIM))))
+
+    t0 = time.perf_counter()
+    full_reload(collection)
+    full_ms = (time.perf_counter() - t0) * 1000
+
+    # Lan dau: cache rong -> dong bo tat ca roi ghi cache
+    GallerySync(GalleryIndex(), GalleryCache(cache_dir), lambda: collection).sync()
+
+    # Khoi dong lai: nap cache (memory-map), khong can DB
+    t0 = time.perf_counter()
+    gallery = GalleryIndex()
+    sync = GallerySync(gallery, GalleryCache(cache_dir), lambda: collection)
+    sync.load_cache()
+    cache_ms = (time.perf_counter() - t0) * 1000
+
+    # Khong doi gi -> dong bo khong tai embedding nao
+    collection.reads = 0
+    t0 = time.perf_counter()
+    unchanged = sync.sync()
+    noop_ms = (time.perf_counter() - t0) * 1000
+    noop_reads = collection.reads
+
+    # 1 nguoi dang ky lai, 1 nguoi moi, 1 nguoi bi xoa (tu may khac)
+    put(collection, "staff_00000", l2_normalize(rng.normal(size=(IMAGES_PER_PERSON, EMBEDDING_DIM))))
+    put(collection, "new_staff", l2_normalize(rng.normal(size=(IMAGES_PER_PERSON, EMBEDDING_DIM))))
+    collection.delete_one({"name": f"staff_{staff - 1:05d}"})
+    fetched_before = sync.fetched
+    t0 = time.perf_counter()
+    changed = sync.sync()
+    delta_ms = (time.perf_counter() - t0) * 1000
+
+    print(f"{staff:>6} | {full_ms:>9.1f} | {cache_ms:>8.1f} | {noop_ms:>8.1f} | {delta_ms:>8.1f}")
+    expected = sorted(d["name"] for d in collection.find({}, {"name": 1}))
+    ok = check(unchanged == 0 and noop_reads == staff, f"no-op sync read {noop_reads} metadata docs, 0 embeddings")
+    ok &= check(changed == 3 and sync.fetched - fetched_before == 2, "delta sync fetched 2 changed staff, removed 1")
+    ok &= check(gallery.people == expected, "gallery matches database")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--staff", type=int, nargs="+", default=[50, 500, 5000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ok = True
+    print(f"{'staff':>6} | {'reload ms':>9} | {'cache ms':>8} | {'noop ms':>8} | {'delta ms':>8}")
+    for staff in args.staff:
+        cache_dir = tempfile.mkdtemp(prefix="gallery_cache_")
+        try:
+            ok &= run(staff, rng, cache_dir)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
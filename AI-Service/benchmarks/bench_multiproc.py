@@ -0,0 +1,142 @@
+"""FPS va do tre end-to-end: pipeline luong trong 1 process vs cac topology da process (shared memory).
+
+Chay tu thu muc AI-Service (khong can model that - detector/recognizer gia lap giu GIL trong N ms):
+    python -m benchmarks.bench_multiproc --seconds 10 --detect-ms 25 --recognize-ms 10 --ui-ms 8
+    python -m benchmarks.bench_multiproc --modes threads "capture|detect|recognize"
+
+--ui-ms: luong gia lap vong lap Tk / canh bao trong process chinh (moi 33 ms giu GIL N ms).
+Thoat voi ma 1 neu 1 che do khong ra frame nao.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import cv2
+import numpy as np
+
+from edge_ai.engine import MonitoringEngine
+from edge_ai.multiproc import ProcessEngine
+
+MODES = ["threads", "capture|detect", "capture+detect|recognize", "capture|detect|recognize"]
+WORK_MS = {"detect": 25.0, "recognize": 10.0}  # Ghi de trong process con qua bien moi truong
+
+
+def busy(ms):
+    """Giu GIL nhu phan hau xu ly Python (NMS, ve box, logic an ninh)"""
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+class _Box:
+    def __init__(self, xyxy):
+        self.xyxy = [np.array(xyxy, dtype=np.float32)]
+
+
+class _Result:
+    def __init__(self, boxes):
+        self.boxes = [_Box(b) for b in boxes]
+
+
+def fake_detector():
+    """Factory (pickle duoc) cho process detect: 2 nguoi co dinh, ton BENCH_DETECT_MS"""
+    ms = float(os.getenv("BENCH_DETECT_MS", WORK_MS["detect"]))
+
+    def detect(frame, **kwargs):
+        cv2.resize(frame, (416, 312))
+        busy(ms)
+        return [_Result([(100, 100, 220, 420), (520, 60, 640, 300)])]
+    return detect
+
+
+def fake_recognizer():
+    """Factory cho process nhan dien -> (recognizer, faces=None)"""
+    ms = float(os.getenv("BENCH_RECOGNIZE_MS", WORK_MS["recognize"]))
+
+    def recognize(crops):
+        busy(ms)
+        return ["staff_a"] * len(crops), [0.5] * len(crops)
+    return recognize, None
+
+
+def make_video(path, frames, fps):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (800, 600))
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (600, 800, 3), dtype=np.uint8)
+    for i in range(frames):
+        frame = base.copy()
+        cv2.rectangle(frame, (100 + i % 300, 100), (220 + i % 300, 420), (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def run(mode, source, seconds, ui_ms):
+    recognizer, _ = fake_recognizer()
+    if mode == "threads":
+        engine = MonitoringEngine(fake_detector(), recognizer, source=source, render=True)
+    else:
+        engine = ProcessEngine(fake_detector, recognizer, recognizer_factory=fake_recognizer, topology=mode,
+                               source=source, render=True)
+    stop = threading.Event()
+
+    def ui_load():
+        while not stop.wait(0.033):
+            busy(ui_ms)
+
+    ui = threading.Thread(target=ui_load, daemon=True)
+    ui.start()
+    engine.start()
+    ages, first, frames = [], None, 0
+    deadline = time.monotonic() + seconds
+    while engine.is_running and time.monotonic() < deadline:
+        packet = engine.output.get(timeout=0.5)
+        if packet is None:
+            continue
+        now = time.monotonic()
+        if first is None:
+            first = now  # Bo qua thoi gian khoi dong process / nap model
+        else:
+            frames += 1
+            ages.append(packet.age_ms)
+        packet.release()
+    elapsed = time.monotonic() - first if first else 0.0
+    stats = engine.stats()
+    engine.stop()
+    stop.set()
+    dropped = sum(stats["dropped"].values()) + sum(p.get("dropped", 0) for p in stats.get("processes", {}).values())
+    return (frames / elapsed if elapsed else 0.0, float(np.median(ages)) if ages else float("nan"),
+            float(np.percentile(ages, 95)) if ages else float("nan"), dropped)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=MODES, help="threads va/hoac topology (xem edge_ai.multiproc)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--camera-fps", type=float, default=60.0, help="Toc do file video gia lap camera")
+    parser.add_argument("--detect-ms", type=float, default=WORK_MS["detect"])
+    parser.add_argument("--recognize-ms", type=float, default=WORK_MS["recognize"])
+    parser.add_argument("--ui-ms", type=float, default=8.0)
+    args = parser.parse_args()
+
+    # Process con (spawn) doc chi phi gia lap tu bien moi truong
+    os.environ["BENCH_DETECT_MS"] = str(args.detect_ms)
+    os.environ["BENCH_RECOGNIZE_MS"] = str(args.recognize_ms)
+    os.environ.setdefault("MOTION_GATE", "0")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "bench.avi")
+        make_video(source, int(args.camera_fps * (args.seconds + 15)), args.camera_fps)
+        print(f"cpus={os.cpu_count()} camera={args.camera_fps:.0f}fps detect={args.detect_ms}ms "
+              f"recognize={args.recognize_ms}ms ui={args.ui_ms}ms/33ms")
+        print(f"{'mode':>26} | {'fps':>6} | {'p50 ms':>7} | {'p95 ms':>7} | dropped")
+        failed = False
+        for mode in args.modes:
+            fps, p50, p95, dropped = run(mode, source, args.seconds, args.ui_ms)
+            failed |= fps == 0
+            print(f"{mode:>26} | {fps:>6.1f} | {p50:>7.1f} | {p95:>7.1f} | {dropped}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Chi phi kiem tra vung moi frame: vong lap Python (check_box_overlap) vs ZoneMap vector hoa, theo so vung.
+
+Chay tu thu muc AI-Service:
+    python -m benchmarks.bench_zones --zones 1 4 16 64 --boxes 8
+Thoat voi ma 1 neu ZoneMap cho ket qua khac vong lap cu tren vung chu nhat.
+"""
+import argparse
+import sys
+import time
+import numpy as np
+
+from edge_ai.scheduler import check_box_overlap
+from edge_ai.zones import Zone, ZoneMap
+
+FRAME_SHAPE = (600, 800, 3)
+HAND_POINTS = 2  # Dau ngon tro cua toi da 2 ban tay
+
+
+def random_rects(count, rng):
+    x1 = rng.integers(0, 700, count)
+    y1 = rng.integers(0, 500, count)
+    return np.stack([x1, y1, x1 + rng.integers(40, 200, count), y1 + rng.integers(40, 200, count)], axis=1)
+
+
+def loop_check(boxes, points, rects):
+    """Duong cu: 1 lan goi Python cho moi cap (box, vung) va (diem, vung)"""
+    box_hits = [[check_box_overlap(b, r) for r in rects] for b in boxes]
+    point_hits = [[r[0] < x < r[2] and r[1] < y < r[3] for r in rects] for x, y in points]
+    return box_hits, point_hits
+
+
+def median_us(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--zones", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--boxes", type=int, default=8, help="So nguoi trong frame")
+    parser.add_argument("--repeats", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ok = True
+    print(f"{'zones':>5} | {'loop us':>8} | {'ZoneMap us':>10} | agree")
+    for count in args.zones:
+        rects = random_rects(count, rng)
+        zones = ZoneMap([Zone(f"z{i}", [(x1, y1), (x2, y1), (x2, y2), (x1, y2)])
+                         for i, (x1, y1, x2, y2) in enumerate(rects)], scale=1)
+        zones.prepare(FRAME_SHAPE)
+        boxes = [tuple(b) for b in random_rects(args.boxes, rng)]
+        points = rng.uniform((0, 0), (800, 600), size=(HAND_POINTS, 2))
+
+        def vectorized():
+            return zones.hit_boxes(boxes), zones.hit_points(points)
+
+        loop_us = median_us(lambda: loop_check(boxes, points, rects), args.repeats)
+        vec_us = median_us(vectorized, args.repeats)
+        old_boxes, old_points = loop_check(boxes, points, rects)
+        new_boxes, new_points = vectorized()
+        # Diem nam dung tren bien: raster tinh la ben trong, vong lap cu (so sanh chat) thi khong
+        agree = np.array_equal(np.array(old_boxes), new_boxes) and np.array_equal(np.array(old_points), new_points)
+        ok &= agree
+        print(f"{count:>5} | {loop_us:>8.1f} | {vec_us:>10.1f} | {'OK' if agree else 'FAIL'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
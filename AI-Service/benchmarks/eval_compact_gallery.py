@@ -0,0 +1,124 @@
+"""Danh gia gallery gon (prototype + float16/int8): bo nho, thoi gian search va do chinh xac so voi ban day du.
+
+Chay tu thu muc AI-Service:
+    python -m benchmarks.eval_compact_gallery                       # embed dataset/train bang FaceNet
+    python -m benchmarks.eval_compact_gallery --synthetic 2000      # them nhan vien gia lap de do o quy mo lon
+
+Moi nguoi: anh chan -> dang ky, anh le -> truy van (genuine). Cu --holdout nguoi thi 1 nguoi khong dang ky,
+anh cua ho la truy van nguoi la (impostor, phai ra Stranger).
+"""
+import argparse
+import os
+import time
+import cv2
+import numpy as np
+
+from edge_ai.gallery import GalleryIndex, MATCH_THRESHOLD, EMBEDDING_DIM, l2_normalize
+
+CONFIGS = [  # (ten, exemplars, dtype)
+    ("full f32", 0, "float32"),
+    ("full f16", 0, "float16"),
+    ("full int8", 0, "int8"),
+    ("proto3 f32", 3, "float32"),
+    ("proto3 f16", 3, "float16"),
+    ("proto3 int8", 3, "int8"),
+    ("proto1 int8", 1, "int8"),
+]
+
+
+def embed_dataset(folder):
+    """{ten: embeddings} cho dataset/train/<ten>/*.jpg (can torch + facenet)"""
+    from edge_ai.embedding import FaceEmbedder
+    from edge_ai.models import select_device, load_facenet
+    backend, note = load_facenet(select_device())
+    print(f"[INFO] FaceNet backend: {backend.name} ({note})")
+    embedder = FaceEmbedder(backend)
+    people = {}
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if not os.path.isdir(path):
+            continue
+        crops = [img for img in (cv2.imread(os.path.join(path, f)) for f in sorted(os.listdir(path))) if img is not None]
+        if len(crops) >= 2:
+            people[name] = embedder.embed(crops)
+    return people
+
+
+def synthetic_people(count, images, rng):
+    """Moi nguoi: 1 tam + vai huong tu the (trai/phai/ngang) + nhieu, giong phan bo embedding dang ky"""
+    people = {}
+    for i in range(count):
+        center = l2_normalize(rng.normal(size=EMBEDDING_DIM))
+        poses = 0.3 * l2_normalize(rng.normal(size=(4, EMBEDDING_DIM)))
+        noise = 0.25 * l2_normalize(rng.normal(size=(images, EMBEDDING_DIM)))
+        people[f"synthetic_{i:05d}"] = l2_normalize(center + poses[np.arange(images) % 4] + noise)
+    return people
+
+
+def split(people, holdout):
+    enroll, genuine, impostor = {}, [], []
+    for i, (name, embs) in enumerate(sorted(people.items())):
+        if holdout and i % holdout == holdout - 1:
+            impostor.extend(embs)
+            continue
+        enroll[name] = embs[0::2]
+        genuine.extend((name, e) for e in embs[1::2])
+    return enroll, genuine, np.array(impostor).reshape(-1, EMBEDDING_DIM)
+
+
+def median_ms(fn, queries, batch, repeats):
+    samples = []
+    for r in range(repeats):
+        q = queries[(r * batch) % max(1, len(queries) - batch):][:batch]
+        t0 = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default="dataset/train")
+    parser.add_argument("--no-dataset", action="store_true", help="Bo qua FaceNet, chi dung du lieu gia lap")
+    parser.add_argument("--synthetic", type=int, default=0, help="So nhan vien gia lap them vao")
+    parser.add_argument("--images", type=int, default=20, help="So anh / nhan vien gia lap")
+    parser.add_argument("--holdout", type=int, default=5, help="Cu N nguoi giu lai 1 lam nguoi la (0 = tat)")
+    parser.add_argument("--batch", type=int, default=8, help="So khuon mat / frame khi do search")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    people = {} if args.no_dataset else embed_dataset(args.dataset)
+    people.update(synthetic_people(args.synthetic, args.images, rng))
+    if not people:
+        parser.error("no identities: add images to --dataset or use --synthetic N")
+
+    enroll, genuine, impostor = split(people, args.holdout)
+    g_names = [n for n, _ in genuine]
+    g_embs = np.array([e for _, e in genuine]).reshape(-1, EMBEDDING_DIM)
+    queries = np.concatenate([g_embs, impostor]) if len(impostor) else g_embs
+    print(f"staff={len(enroll)} genuine={len(g_embs)} impostor={len(impostor)} threshold={MATCH_THRESHOLD}")
+    print(f"{'config':>12} | {'vectors':>7} | {'memory KB':>9} | {'B/person':>8} | {'search ms':>9} | "
+          f"{'TAR':>6} | {'FAR':>6} | agree")
+
+    baseline = None
+    for label, exemplars, dtype in CONFIGS:
+        gallery = GalleryIndex(exemplars=exemplars, dtype=dtype)
+        gallery.add_many(enroll)
+
+        def decide(q):
+            names, dists = gallery.match(q)
+            return [n if d < MATCH_THRESHOLD else "Stranger" for n, d in zip(names, dists)]
+
+        predicted = [n for start in range(0, len(queries), 256) for n in decide(queries[start:start + 256])]
+        tar = np.mean([p == n for p, n in zip(predicted[:len(g_names)], g_names)]) if g_names else float("nan")
+        far = np.mean([p != "Stranger" for p in predicted[len(g_names):]]) if len(impostor) else float("nan")
+        baseline = baseline or predicted
+        agree = np.mean([a == b for a, b in zip(predicted, baseline)])
+        ms = median_ms(decide, queries, args.batch, args.repeats)
+        print(f"{label:>12} | {len(gallery):>7} | {gallery.nbytes / 1024:>9.1f} | {gallery.nbytes / len(enroll):>8.0f} | "
+              f"{ms:>9.3f} | {tar:>6.1%} | {far:>6.1%} | {agree:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Cac thanh phan xu ly Edge AI dung chung cho app giam sat (Tk) va cac script benchmark."""
@@ -0,0 +1,87 @@
+"""May trang thai bao dong tai bien: SAFE -> SUSPECT -> ALARM -> RESOLVED (co tre/hysteresis theo so frame).
+
+Backend chi duoc goi khi CHUYEN trang thai (vao ALARM: gui DANGER, ALARM -> RESOLVED: tat coi),
+ALARM -> RESOLVED khi nhan vien xuat hien HOAC nguoi la da roi di (yen tinh ALARM_REARM_FRAMES frame),
+de lan xam nhap sau lai bao DANGER ke ca khi khong co nhan vien nao toi.
+thay vi gui DANGER moi 2 s khi nguoi la con dung do va goi reset moi 2 s khi thay nhan vien.
+"""
+import os
+import threading
+
+SAFE, SUSPECT, ALARM, RESOLVED = "SAFE", "SUSPECT", "ALARM", "RESOLVED"
+
+ALARM_ENTER_FRAMES = int(os.getenv("ALARM_ENTER_FRAMES", "3"))      # Frame xam nhap lien tiep de bao dong
+ALARM_CLEAR_FRAMES = int(os.getenv("ALARM_CLEAR_FRAMES", "5"))      # Frame sach lien tiep de SUSPECT ve SAFE
+ALARM_RESOLVE_FRAMES = int(os.getenv("ALARM_RESOLVE_FRAMES", "5"))  # Frame co nhan vien lien tiep de tat bao dong
+ALARM_REARM_FRAMES = int(os.getenv("ALARM_REARM_FRAMES", "30"))     # Frame yen tinh de ALARM tu tat / RESOLVED ve SAFE
+
+
+class AlarmStateMachine:
+    """Xam nhap = nguoi la trong vung cam KHI KHONG co nhan vien (Tinh huong 2 cua Dual-Condition)"""
+    def __init__(self, enter_frames=ALARM_ENTER_FRAMES, clear_frames=ALARM_CLEAR_FRAMES,
+                 resolve_frames=ALARM_RESOLVE_FRAMES, rearm_frames=ALARM_REARM_FRAMES):
+        self.enter_frames = max(1, enter_frames)
+        self.clear_frames = max(1, clear_frames)
+        self.resolve_frames = max(1, resolve_frames)
+        self.rearm_frames = max(1, rearm_frames)
+        self.state = SAFE
+        self._lock = threading.Lock()
+        self._hits = 0      # So frame xam nhap lien tiep
+        self._quiet = 0     # So frame khong xam nhap lien tiep
+        self._staff = 0     # So frame co nhan vien lien tiep
+        self.transitions = {}
+
+    def _go(self, new_state):
+        key = f"{self.state}->{new_state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        old, self.state = self.state, new_state
+        self._hits = self._quiet = self._staff = 0
+        return old, new_state
+
+    def update(self, stranger_in_fence, staff_present, staff_exempt=True):
+        """Cap nhat theo ket qua 1 frame; tra ve (cu, moi) neu chuyen trang thai, nguoc lai None.
+        staff_exempt=False: vung bi xam nhap khong mien tru khi co nhan vien (van tinh la xam nhap).
+        """
+        intrusion = stranger_in_fence and (not staff_present or not staff_exempt)
+        with self._lock:
+            if intrusion:
+                self._hits += 1
+                self._quiet = 0
+            else:
+                self._quiet += 1
+                self._hits = 0
+            self._staff = self._staff + 1 if staff_present else 0
+
+            if self.state == SAFE:
+                if intrusion:
+                    transition = self._go(SUSPECT)
+                    self._hits = 1
+                    # enter_frames = 1: bao dong ngay o frame dau tien
+                    return self._go(ALARM) if self.enter_frames <= 1 else transition
+            elif self.state == SUSPECT:
+                if self._hits >= self.enter_frames:
+                    return self._go(ALARM)
+                if self._quiet >= self.clear_frames:
+                    return self._go(SAFE)
+            elif self.state == ALARM:
+                # Nhan vien toi, hoac khong con xam nhap du lau -> tat coi, lan xam nhap sau bao dong lai
+                if self._staff >= self.resolve_frames or self._quiet >= self.rearm_frames:
+                    return self._go(RESOLVED)
+            elif self.state == RESOLVED:
+                if intrusion:
+                    transition = self._go(SUSPECT)
+                    self._hits = 1
+                    return transition
+                if self._quiet >= self.rearm_frames:
+                    return self._go(SAFE)
+            return None
+
+    def acknowledge(self):
+        """Nhan vien tat coi thu cong -> RESOLVED"""
+        with self._lock:
+            if self.state in (SUSPECT, ALARM):
+                return self._go(RESOLVED)
+            return None
+
+    def stats(self):
+        return {"state": self.state, "transitions": dict(self.transitions)}
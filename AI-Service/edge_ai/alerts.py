@@ -0,0 +1,217 @@
+"""Gui canh bao len Cloud Backend qua 1 luong nen duy nhat.
+
+- 1 requests.Session (keep-alive, connection pool) thay vi tao thread + requests.post moi lan
+- Timeout + exponential backoff khi mang loi
+- Gop (coalesce) su kien trung lap dang cho gui
+- Hang doi tren dia (SQLite) co gioi han: mat mang van giu canh bao, co mang lai thi gui theo lo
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from edge_ai.config import API_URL, RESET_ALARM_URL
+
+ALERT_SPOOL_PATH = os.getenv("ALERT_SPOOL_PATH", "alert_spool.db")
+ALERT_SPOOL_MAX = int(os.getenv("ALERT_SPOOL_MAX", "1000"))        # So su kien toi da giu tren dia
+ALERT_COALESCE_SEC = float(os.getenv("ALERT_COALESCE_SEC", "10"))  # Gop su kien giong nhau trong N giay
+ALERT_BATCH_SIZE = int(os.getenv("ALERT_BATCH_SIZE", "20"))        # So su kien gui lien tiep moi lan flush
+ALERT_CONNECT_TIMEOUT = float(os.getenv("ALERT_CONNECT_TIMEOUT", "3"))
+ALERT_READ_TIMEOUT = float(os.getenv("ALERT_READ_TIMEOUT", "10"))
+ALERT_BACKOFF_MAX = float(os.getenv("ALERT_BACKOFF_MAX", "60"))
+
+
+def make_session(pool_size=4):
+    """Session dung chung: giu ket noi TCP/TLS toi backend thay vi bat tay lai moi request"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class AlertSpool:
+    """Hang doi su kien tren SQLite, co gioi han kich thuoc (bo su kien cu nhat khi day)"""
+    def __init__(self, path=ALERT_SPOOL_PATH, max_events=ALERT_SPOOL_MAX):
+        self.path = path
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            key TEXT NOT NULL,
+            payload TEXT,
+            created REAL NOT NULL,
+            updated REAL NOT NULL,
+            occurrences INTEGER NOT NULL DEFAULT 1,
+            attempts INTEGER NOT NULL DEFAULT 0)""")
+        self.dropped = 0
+
+    def push(self, url, key, payload, coalesce_sec):
+        """Them su kien; neu su kien cuoi hang doi cung key (trong cua so gop) thi chi tang dem.
+
+        Chi gop vao su kien CUOI de khong dao thu tu (vd: DANGER -> reset -> DANGER phai giu ca 3).
+        """
+        now = time.time()
+        body = json.dumps(payload) if payload is not None else None
+        with self._lock:
+            row = self._db.execute("SELECT id, key, created FROM events ORDER BY id DESC LIMIT 1").fetchone()
+            if row and row[1] == key and row[2] >= now - coalesce_sec:
+                self._db.execute("UPDATE events SET occurrences = occurrences + 1, updated = ? WHERE id = ?",
+                                 (now, row[0]))
+                return False
+            self._db.execute("INSERT INTO events (url, key, payload, created, updated) VALUES (?, ?, ?, ?, ?)",
+                             (url, key, body, now, now))
+            over = self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0] - self.max_events
+            if over > 0:
+                self._db.execute("DELETE FROM events WHERE id IN (SELECT id FROM events ORDER BY id LIMIT ?)", (over,))
+                self.dropped += over
+            return True
+
+    def peek(self, limit):
+        with self._lock:
+            return self._db.execute(
+                "SELECT id, url, payload FROM events ORDER BY id LIMIT ?", (limit,)).fetchall()
+
+    def delete(self, event_id):
+        with self._lock:
+            self._db.execute("DELETE FROM events WHERE id = ?", (event_id,))
+
+    def mark_attempt(self, event_id):
+        with self._lock:
+            self._db.execute("UPDATE events SET attempts = attempts + 1 WHERE id = ?", (event_id,))
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class AlertDispatcher:
+    """Luong nen duy nhat gui canh bao/tat coi len backend, ben vung qua su co mat mang"""
+    def __init__(self, api_url=API_URL, reset_url=RESET_ALARM_URL, spool=None,
+                 coalesce_sec=ALERT_COALESCE_SEC, batch_size=ALERT_BATCH_SIZE,
+                 timeout=(ALERT_CONNECT_TIMEOUT, ALERT_READ_TIMEOUT), backoff_max=ALERT_BACKOFF_MAX):
+        self.api_url = api_url
+        self.reset_url = reset_url
+        self.spool = spool if spool is not None else AlertSpool()
+        self.coalesce_sec = coalesce_sec
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.backoff_max = backoff_max
+        self.session = make_session()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.sent = 0
+        self.failed_attempts = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self.online = True
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.session.close()
+
+    # --- API cho engine ---
+    def send_alert(self, type, title, message, detected_name="INTRUDER", image_url=None):
+        data = {"type": type, "title": title, "message": message, "detectedName": detected_name}
+        if image_url:
+            data["imageUrl"] = image_url
+        self._enqueue(self.api_url, f"alert:{type}:{title}", data)
+
+    def reset_alarm(self):
+        """Yeu cau tat coi (bat dong bo); cac yeu cau reset dang cho duoc gop thanh 1"""
+        self._enqueue(self.reset_url, "reset", None, coalesce_sec=float("inf"))
+
+    def post_now(self, url, data=None):
+        """Gui ngay (dong bo) qua session dung chung - dung cho nut bam tren giao dien"""
+        return self.session.post(url, json=data, timeout=self.timeout)
+
+    def _enqueue(self, url, key, data, coalesce_sec=None):
+        if not self.spool.push(url, key, data, self.coalesce_sec if coalesce_sec is None else coalesce_sec):
+            self.coalesced += 1
+        self._wake.set()
+
+    # --- LUONG NEN ---
+    def _run(self):
+        backoff = 0.0
+        while not self._stop.is_set():
+            batch = self.spool.peek(self.batch_size)
+            if not batch:
+                self._wake.wait(1.0)
+                self._wake.clear()
+                continue
+
+            ok = self._flush(batch)
+            if ok:
+                backoff = 0.0
+                continue
+            # Mat mang / backend loi: cho theo cap so nhan (co jitter) truoc khi thu lai
+            backoff = min(self.backoff_max, max(0.5, backoff * 2))
+            self._stop.wait(backoff * random.uniform(0.8, 1.2))
+
+    def _flush(self, batch):
+        """Gui lan luot ca lo qua 1 ket noi keep-alive; dung lai o loi tam thoi dau tien"""
+        for event_id, url, payload in batch:
+            if self._stop.is_set():
+                return True
+            data = json.loads(payload) if payload else None
+            try:
+                response = self.session.post(url, json=data, timeout=self.timeout)
+            except requests.RequestException as e:
+                self._fail(event_id, f"{type(e).__name__}")
+                return False
+            if response.status_code < 300:
+                self.spool.delete(event_id)
+                self.sent += 1
+                if not self.online:
+                    print("[INFO] Alert backend reachable again, flushing spool.")
+                self.online = True
+            elif response.status_code in (408, 429) or response.status_code >= 500:
+                self._fail(event_id, f"HTTP {response.status_code}")
+                return False
+            else:
+                # Loi 4xx khac: gui lai cung vo ich -> bo su kien
+                print(f"[WARNING] Alert rejected by backend (HTTP {response.status_code}), dropping.")
+                self.spool.delete(event_id)
+                self.rejected += 1
+        return True
+
+    def _fail(self, event_id, reason):
+        self.spool.mark_attempt(event_id)
+        self.failed_attempts += 1
+        if self.online:
+            print(f"[WARNING] Alert backend unreachable ({reason}), spooling to {self.spool.path}.")
+        self.online = False
+
+    def stats(self):
+        return {
+            "online": self.online,
+            "pending": len(self.spool),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "failed_attempts": self.failed_attempts,
+            "rejected": self.rejected,
+            "spool_dropped": self.spool.dropped,
+        }
@@ -0,0 +1,130 @@
+"""Backend suy luan cho FaceNet tren CPU: eager torch, TorchScript, torch.compile, ONNX Runtime FP32/int8.
+
+Chon bang bien moi truong EMBED_BACKEND. Cac artefact (TorchScript, .onnx) duoc
+tu dong export vao MODEL_CACHE_DIR o lan chay dau tien va dung lai cac lan sau.
+Mac dinh eager (embedding giong het gallery da dang ky); chi doi backend sau khi tests/test_backends.py
+(hoac python -m benchmarks.bench_backends) dat nguong cosine tren may do.
+"""
+import os
+
+import numpy as np
+
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "models_cache")
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "eager")
+BACKENDS = ("eager", "torchscript", "compile", "onnx", "onnx-int8")
+
+
+class TorchBackend:
+    """Chay mo hinh torch (eager / TorchScript / compiled) tren batch numpy Nx3x160x160"""
+    def __init__(self, model, device, name):
+        self.model = model
+        self.device = device
+        self.name = name
+
+    def __call__(self, batch):
+        import torch
+        with torch.no_grad():
+            emb = self.model(torch.from_numpy(batch).to(self.device))
+        return emb.cpu().numpy()
+
+
+class OnnxBackend:
+    """Chay file .onnx bang ONNX Runtime (CPUExecutionProvider)"""
+    def __init__(self, path, name, threads=0):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.path = path
+        self.name = name
+
+    def __call__(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+def _cache_path(cache_dir, suffix):
+    import torch
+    # Artefact phu thuoc phien ban torch -> dat ten theo phien ban de tu invalid khi nang cap
+    return os.path.join(cache_dir, f"facenet_vggface2_torch{torch.__version__}_{suffix}")
+
+
+def _atomic_save(save_fn, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    save_fn(tmp)
+    os.replace(tmp, path)  # Ghi nguyen tu: mat dien giua chung khong de lai file hong
+
+
+def load_eager(device):
+    from facenet_pytorch import InceptionResnetV1
+    return InceptionResnetV1(pretrained='vggface2').eval().to(device)
+
+
+def export_torchscript(device, cache_dir=MODEL_CACHE_DIR):
+    import torch
+    path = _cache_path(cache_dir, f"{device.type}.ts")
+    if not os.path.exists(path):
+        with torch.no_grad():
+            scripted = torch.jit.trace(load_eager(device), torch.zeros(1, 3, 160, 160, device=device))
+        _atomic_save(lambda p: torch.jit.save(scripted, p), path)
+    return path
+
+
+def export_onnx(cache_dir=MODEL_CACHE_DIR):
+    """Export FaceNet sang ONNX voi truc batch dong"""
+    import torch
+    path = _cache_path(cache_dir, "fp32.onnx")
+    if not os.path.exists(path):
+        model = load_eager(torch.device("cpu"))
+        _atomic_save(lambda p: torch.onnx.export(
+            model, torch.zeros(1, 3, 160, 160), p, input_names=["faces"], output_names=["embeddings"],
+            dynamic_axes={"faces": {0: "batch"}, "embeddings": {0: "batch"}}, opset_version=17), path)
+    return path
+
+
+def export_onnx_int8(cache_dir=MODEL_CACHE_DIR):
+    """Luong tu hoa dong (dynamic quantization) trong so sang int8"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    fp32 = export_onnx(cache_dir)
+    path = _cache_path(cache_dir, "int8.onnx")
+    if not os.path.exists(path):
+        _atomic_save(lambda p: quantize_dynamic(fp32, p, weight_type=QuantType.QInt8), path)
+    return path
+
+
+def load_backend(name, device, cache_dir=MODEL_CACHE_DIR):
+    """Tao backend theo ten -> (backend, ghi chu cho bao cao khoi dong)"""
+    import torch
+
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown EMBED_BACKEND '{name}', expected one of {BACKENDS}")
+    if name == "eager":
+        return TorchBackend(load_eager(device), device, name), "eager"
+    if name == "torchscript":
+        path = _cache_path(cache_dir, f"{device.type}.ts")
+        note = "cache hit" if os.path.exists(path) else "built + cached"
+        try:
+            model = torch.jit.load(export_torchscript(device, cache_dir), map_location=device).eval()
+            return TorchBackend(model, device, name), note
+        except Exception as e:
+            print(f"[WARNING] TorchScript backend unavailable, using eager: {e}")
+            return TorchBackend(load_eager(device), device, "eager"), "eager (torchscript failed)"
+    if name == "compile":
+        try:
+            return TorchBackend(torch.compile(load_eager(device)), device, name), "torch.compile"
+        except Exception as e:
+            print(f"[WARNING] torch.compile unavailable, using eager: {e}")
+            return TorchBackend(load_eager(device), device, "eager"), "eager (compile failed)"
+
+    # ONNX Runtime chi dung CPU: phu hop may edge khong co GPU
+    path = export_onnx(cache_dir) if name == "onnx" else export_onnx_int8(cache_dir)
+    return OnnxBackend(path, name), os.path.basename(path)
+
+
+def cosine_similarity(a, b):
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    return (a * b).sum(axis=1) / np.maximum(np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1), 1e-12)
@@ -0,0 +1,254 @@
+"""Dang ky nhan vien hang loat tu cay thu muc anh <root>/<ten>/*.jpg (vd khi mo chi nhanh moi).
+
+- Doc anh + tim khuon mat trong process pool (MTCNN neu co, khong thi YOLO nhu cua so dang ky).
+- Loc anh bang cung nguong chat luong voi dang ky webcam (edge_ai.quality).
+- Embed theo lo lon o process chinh, upsert tung nhan vien vao MongoDB (version tang -> cac may edge tu dong bo).
+- Chay lai duoc: embedding moi anh duoc cache theo SHA-1 noi dung, anh khong doi se bo qua.
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from edge_ai import quality
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+MAX_SIDE = 800        # Dua anh ve co khung hinh camera -> nguong kich thuoc mat giong dang ky webcam
+CROP_MAX_SIDE = 400   # Anh nho khong tim thay mat: coi la crop khuon mat san (anh do FaceRegistrationWindow luu)
+STATE_DIR = ".enroll"
+
+_detector = None
+_detector_kind = None
+
+
+def scan(root):
+    """{ten: [duong dan anh]} (bo qua thu muc an nhu .enroll)"""
+    people = {}
+    for name in sorted(os.listdir(root)):
+        folder = os.path.join(root, name)
+        if name.startswith(".") or not os.path.isdir(folder):
+            continue
+        files = [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.lower().endswith(IMAGE_EXTS)]
+        if files:
+            people[name] = files
+    return people
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+# --- WORKER (process rieng, moi worker nap detector 1 lan) ---
+def _init_worker(kind):
+    global _detector, _detector_kind
+    if kind == "none":
+        return
+    import torch
+    torch.set_num_threads(1)  # Nhieu process song song, moi process 1 luong
+    from edge_ai.models import load_mtcnn, load_yolo
+    if kind in ("auto", "mtcnn"):
+        _detector = load_mtcnn(torch.device("cpu"))
+        if _detector is not None:
+            _detector_kind = "mtcnn"
+            return
+    if kind in ("auto", "yolo"):
+        _detector, _detector_kind = load_yolo(), "yolo"
+
+
+def _detect_face(img):
+    """Box khuon mat tot nhat (x1, y1, x2, y2) giong FaceRegistrationWindow, hoac None"""
+    h, w = img.shape[:2]
+    if _detector_kind == "mtcnn":
+        boxes, probs = _detector.detect(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        if boxes is None or len(boxes) == 0:
+            return None
+        best = int(np.argmax(probs))
+        if probs[best] <= 0.9:
+            return None
+        x1, y1, x2, y2 = map(int, boxes[best])
+    elif _detector_kind == "yolo":
+        results = _detector(img, classes=[0], conf=0.6, verbose=False)[0]
+        if len(results.boxes) == 0:
+            return None
+        # Lay box lon nhat
+        x1, y1, x2, y2 = max((tuple(map(int, b.xyxy[0])) for b in results.boxes),
+                             key=lambda b: (b[2] - b[0]) * (b[3] - b[1]))
+    else:
+        return None
+    return max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+
+
+def process_image(path):
+    """-> (crop, None) neu dat chat luong, (None, ly do) neu bi loai"""
+    img = cv2.imread(path)
+    if img is None:
+        return None, "unreadable"
+    scale = MAX_SIDE / max(img.shape[:2])
+    if scale < 1:
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    box = _detect_face(img)
+    if box is None:
+        if max(img.shape[:2]) > CROP_MAX_SIDE:
+            return None, "no face"
+        crop = img
+    else:
+        x1, y1, x2, y2 = box
+        crop = img[y1:y2, x1:x2]
+    if crop.size == 0:
+        return None, "no face"
+    feedback = quality.get_quality_feedback(crop, crop.shape[1], crop.shape[0])
+    if feedback != "OK":
+        return None, feedback
+    return crop, None
+
+
+# --- TRANG THAI (de chay lai) ---
+class EnrollState:
+    """<root>/.enroll/state.json: ket qua tung anh (theo SHA-1) + tap anh da upsert cho moi nhan vien.
+    Embedding tung anh nam o <root>/.enroll/emb-<backend>/<sha1>.npy
+    """
+    def __init__(self, root, backend_name):
+        self.dir = os.path.join(root, STATE_DIR)
+        self.emb_dir = os.path.join(self.dir, f"emb-{backend_name}")
+        self.path = os.path.join(self.dir, "state.json")
+        os.makedirs(self.emb_dir, exist_ok=True)
+        self.data = {"images": {}, "people": {}}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp, self.path)
+
+    def known(self, digest):
+        entry = self.data["images"].get(digest)
+        if entry is None:
+            return False
+        # Anh dat nhung mat file embedding (vd doi backend) -> xu ly lai
+        return entry["status"] != "ok" or os.path.exists(self._emb_path(digest))
+
+    def _emb_path(self, digest):
+        return os.path.join(self.emb_dir, f"{digest}.npy")
+
+    def accept(self, digest, emb):
+        np.save(self._emb_path(digest), emb)
+        self.data["images"][digest] = {"status": "ok"}
+
+    def reject(self, digest, reason):
+        self.data["images"][digest] = {"status": "rejected", "reason": reason}
+
+    def embeddings(self, digests):
+        ok = [d for d in digests if self.data["images"].get(d, {}).get("status") == "ok"]
+        return ok, np.array([np.load(self._emb_path(d)) for d in ok]).reshape(len(ok), -1)
+
+
+class Progress:
+    def __init__(self, total, every=2.0):
+        self.total = total
+        self.every = every
+        self.done = self.accepted = self.rejected = 0
+        self.started = self.last = time.monotonic()
+
+    def update(self, accepted, force=False):
+        self.done += 1
+        if accepted:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+        now = time.monotonic()
+        if force or now - self.last >= self.every or self.done == self.total:
+            self.last = now
+            rate = self.done / max(now - self.started, 1e-6)
+            print(f"[ENROLL] {self.done}/{self.total} images | {rate:.1f} img/s | "
+                  f"accepted {self.accepted} rejected {self.rejected}")
+
+
+def run(root, mongo_uri, workers=None, detector="auto", batch=64, force=False, retry_rejected=False):
+    from edge_ai.embedding import FaceEmbedder
+    from edge_ai.gallery_cache import open_collection, store_embeddings
+    from edge_ai.models import select_device, load_facenet
+
+    t_start = time.monotonic()
+    people = scan(root)
+    if not people:
+        print(f"[ENROLL] No <name>/*.jpg folders under {root}")
+        return
+    backend, note = load_facenet(select_device())
+    print(f"[INFO] FaceNet backend: {backend.name} ({note})")
+    state = EnrollState(root, backend.name)
+    if retry_rejected:
+        state.data["images"] = {d: e for d, e in state.data["images"].items() if e["status"] == "ok"}
+
+    digests = {path: file_digest(path) for paths in people.values() for path in paths}
+    todo = list({d: p for p, d in digests.items() if not state.known(d)}.items())
+    total = sum(len(p) for p in people.values())
+    print(f"[ENROLL] {len(people)} staff, {total} images, {total - len(todo)} unchanged (cached), {len(todo)} to process")
+
+    embedder = FaceEmbedder(backend, max_batch=batch)
+    pending, embed_s = [], 0.0
+
+    def flush():
+        nonlocal embed_s
+        if not pending:
+            return
+        t0 = time.perf_counter()
+        embs = embedder.embed([crop for _, crop in pending])
+        embed_s += time.perf_counter() - t0
+        for (digest, _), emb in zip(pending, embs):
+            state.accept(digest, emb)
+        pending.clear()
+        state.save()  # Checkpoint: Ctrl+C giua chung thi lan sau tiep tuc tu day
+
+    if todo:
+        progress = Progress(len(todo))
+        workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(detector,)) as pool:
+            results = pool.map(process_image, [path for _, path in todo], chunksize=4)
+            for (digest, _), (crop, reason) in zip(todo, results):
+                if crop is None:
+                    state.reject(digest, reason)
+                else:
+                    pending.append((digest, crop))
+                    if len(pending) >= batch:
+                        flush()
+                progress.update(crop is not None)
+        flush()
+        state.save()
+
+    collection = open_collection(mongo_uri)
+    upserted = skipped = 0
+    for name, paths in people.items():
+        ok, embs = state.embeddings([digests[p] for p in paths])
+        if not ok:
+            print(f"[WARNING] {name}: no usable images, not enrolled")
+            continue
+        key = sorted(ok)
+        if not force and state.data["people"].get(name) == key:
+            skipped += 1
+            continue
+        doc = store_embeddings(collection, name, embs)
+        state.data["people"][name] = key
+        state.save()
+        upserted += 1
+        print(f"[ENROLL] {name}: {len(ok)}/{len(paths)} images -> version {doc['version']}")
+
+    elapsed = time.monotonic() - t_start
+    faces = sum(1 for d in digests.values() if state.data["images"].get(d, {}).get("status") == "ok")
+    embedded = len(todo) - (progress.rejected if todo else 0)
+    print(f"[ENROLL] Done in {elapsed:.1f}s: {upserted} staff upserted, {skipped} unchanged, {faces} faces; "
+          f"embedded {embedded} in {embed_s:.1f}s ({embedded / max(embed_s, 1e-6):.0f} faces/s)")
+    reasons = {}
+    for d in set(digests.values()):
+        entry = state.data["images"].get(d, {})
+        if entry.get("status") == "rejected":
+            reasons[entry["reason"]] = reasons.get(entry["reason"], 0) + 1
+    if reasons:
+        print(f"[ENROLL] Rejected: {reasons}")
@@ -0,0 +1,111 @@
+"""Cascade nguoi -> mat: YOLO tim nguoi o do phan giai giam, MTCNN chi tim mat trong vung dau cua box nguoi,
+FaceNet chay tren khuon mat da cat sat (va xoay cho 2 mat nam ngang) thay vi ca than nguoi bi nen ve 160x160.
+
+MTCNN chi chay cho cac track scheduler chon nhan dien (khong phai moi nguoi moi frame), gom ca lo vao 1 lan goi:
+moi vung dau duoc letterbox vao canvas FACE_SEARCH_SIZE vuong. Khong thay mat (quay lung, bi che) -> dung vung dau.
+"""
+import math
+import os
+import time
+import cv2
+import numpy as np
+
+# Mac dinh giong ban cu (YOLO 640, FaceNet tren crop nguoi); 320/416 + FACE_CASCADE=1 chi bat sau khi
+# benchmarks.bench_cascade cho thay do chinh xac khong giam tren anh camera cua cua hang
+DETECT_IMGSZ = int(os.getenv("DETECT_IMGSZ", "640"))  # Kich thuoc anh vao YOLO (320/416/640; 0 = mac dinh model)
+FACE_CASCADE = os.getenv("FACE_CASCADE", "0") == "1"
+FACE_SEARCH_SIZE = int(os.getenv("FACE_SEARCH_SIZE", "192"))  # Canh canvas dua vao MTCNN
+FACE_MIN_PROB = float(os.getenv("FACE_MIN_PROB", "0.9"))
+HEAD_RATIO = 0.5      # Nguoi dung (box cao): chi tim mat trong nua tren
+ALIGN_MIN_DEG = 3.0   # Nghieng it hon -> cat thang nhu luc dang ky, khong xoay
+
+
+def detect_people(detector, frame, imgsz=DETECT_IMGSZ, conf=0.6):
+    """Box nguoi (x1, y1, x2, y2) toa do frame goc; YOLO tu letterbox ve imgsz va scale box ve lai"""
+    kwargs = {"imgsz": imgsz} if imgsz else {}
+    results = detector(frame, classes=[0], conf=conf, verbose=False, **kwargs)[0]
+    return [tuple(map(int, box.xyxy[0])) for box in results.boxes]
+
+
+def head_region(crop):
+    """Phan tren cua crop nguoi (box cao hon 1.5 lan be ngang); nguoi ngoi / bi cat -> ca crop"""
+    h, w = crop.shape[:2]
+    if h > 1.5 * w:
+        return crop[:max(w, int(h * HEAD_RATIO))]
+    return crop
+
+
+def align_face(image, box, landmarks=None):
+    """Cat khuon mat theo box; neu 2 mat lech > ALIGN_MIN_DEG thi xoay quanh tam box cho 2 mat nam ngang"""
+    x1, y1, x2, y2 = box
+    if landmarks is not None:
+        (lx, ly), (rx, ry) = landmarks[0], landmarks[1]
+        angle = math.degrees(math.atan2(ry - ly, rx - lx))
+        if abs(angle) >= ALIGN_MIN_DEG:
+            w, h = x2 - x1, y2 - y1
+            cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+            m = cv2.getRotationMatrix2D((cx, cy), angle, 1.0)
+            m[:, 2] += (w / 2 - cx, h / 2 - cy)  # Dua tam box ve tam anh ra
+            return cv2.warpAffine(image, m, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    return image[y1:y2, x1:x2]
+
+
+class FaceLocator:
+    """MTCNN tren vung dau cua cac crop nguoi (1 lan goi cho ca lo) -> crop khuon mat cho FaceNet"""
+    def __init__(self, mtcnn, search_size=FACE_SEARCH_SIZE, min_prob=FACE_MIN_PROB):
+        self.mtcnn = mtcnn
+        self.search_size = search_size
+        self.min_prob = min_prob
+        self._canvas = None
+        self.ms = 0.0
+        self.searched = 0
+        self.found = 0
+
+    def _letterbox(self, regions):
+        s = self.search_size
+        if self._canvas is None or len(self._canvas) < len(regions):
+            self._canvas = np.empty((len(regions), s, s, 3), dtype=np.uint8)
+        canvas = self._canvas[:len(regions)]
+        canvas[:] = 0
+        scales = []
+        for img, region in zip(canvas, regions):
+            h, w = region.shape[:2]
+            scale = s / max(h, w)
+            tw, th = max(1, int(w * scale)), max(1, int(h * scale))
+            # MTCNN nhan RGB: doi mau ngay trong buoc resize vao canvas
+            cv2.cvtColor(cv2.resize(region, (tw, th), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB,
+                         img[:th, :tw])
+            scales.append(scale)
+        return canvas, scales
+
+    def extract(self, crops):
+        """crops: anh nguoi (BGR) -> danh sach crop khuon mat cung thu tu (khong thay mat -> vung dau)"""
+        if not crops:
+            return []
+        t0 = time.perf_counter()
+        regions = [head_region(c) for c in crops]
+        canvas, scales = self._letterbox(regions)
+        boxes, probs, landmarks = self.mtcnn.detect(canvas, landmarks=True)
+        faces = []
+        for region, scale, b, p, lm in zip(regions, scales, boxes, probs, landmarks):
+            face = None
+            if b is not None and len(b) > 0:
+                best = int(np.argmax(p))
+                if p[best] >= self.min_prob:
+                    h, w = region.shape[:2]
+                    x1, y1, x2, y2 = (b[best] / scale).astype(int)
+                    x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+                    if x2 - x1 > 1 and y2 - y1 > 1:
+                        face = align_face(region, (x1, y1, x2, y2), lm[best] / scale)
+                        self.found += 1
+            faces.append(face if face is not None else region)
+        self.searched += len(crops)
+        self.ms = 0.9 * self.ms + 0.1 * (time.perf_counter() - t0) * 1000
+        return faces
+
+    @property
+    def found_ratio(self):
+        return self.found / self.searched if self.searched else 0.0
+
+    def stats(self):
+        return {"ms": round(self.ms, 2), "searched": self.searched, "found_ratio": round(self.found_ratio, 3)}
@@ -0,0 +1,111 @@
+"""Diem vao dong lenh cho may edge.
+
+    python -m edge_ai monitor --source 0 --no-ui                  # service headless, khong xuat hinh
+    python -m edge_ai monitor --source cam.mp4 --no-ui --sink mjpeg --output out.mjpeg
+    python -m edge_ai monitor --source 0                          # giao dien Tk day du
+    python -m edge_ai monitor --source 0 --no-ui --processes "capture|detect|recognize"
+    python -m edge_ai export --backend onnx-int8                  # export truoc model cho EMBED_BACKEND
+    python -m edge_ai enroll --root dataset/train --workers 4     # dang ky hang loat tu thu muc anh
+"""
+import argparse
+import time
+
+from edge_ai.cascade import DETECT_IMGSZ
+from edge_ai.multiproc import MP_TOPOLOGY
+from edge_ai.zones import ZONES_FILE
+
+
+def parse_source(value):
+    """'0' -> camera index 0, con lai la duong dan file/URL"""
+    return int(value) if value.isdigit() else value
+
+
+def cmd_monitor(args):
+    if not args.no_ui:
+        # Giao dien Tk day du (dang ky / xoa nhan vien): chi import tkinter o che do nay
+        import tkinter as tk
+        from Hybrid_EdgeAI_FaceRecognition import FaceRecognitionApp
+        root = tk.Tk()
+        FaceRecognitionApp(root, source=args.source)
+        root.mainloop()
+        return
+
+    from edge_ai.monitor import SecurityMonitor
+    from edge_ai.sinks import make_sink
+
+    sink = make_sink(args.sink, args.output)
+    monitor = SecurityMonitor(with_hands=args.hands)
+    engine = monitor.start(source=args.source, render=sink.needs_render, zones_file=args.zones,
+                           imgsz=args.imgsz, processes=args.processes)
+    print(f"[INFO] Monitoring source={args.source!r} sink={args.sink} (Ctrl+C de dung)")
+
+    last_report = time.monotonic()
+    try:
+        while engine.is_running and not getattr(sink, "closed", False):
+            packet = engine.output.get(timeout=0.5)
+            if packet is not None:
+                sink.write(packet.frame)
+                packet.release()
+            if args.stats_every and time.monotonic() - last_report >= args.stats_every:
+                last_report = time.monotonic()
+                print(f"[STATS] {engine.stats()} | alerts={monitor.alerts.stats()} | gallery={monitor.gallery_stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.shutdown()
+        sink.close()
+
+
+def cmd_export(args):
+    """Export truoc artefact cho backend FaceNet (thay vi doi den lan khoi dong dau tien)"""
+    from edge_ai.models import select_device, load_facenet
+    backend, note = load_facenet(select_device(), args.backend)
+    print(f"[INFO] Backend {backend.name} ready ({note})")
+
+
+def cmd_enroll(args):
+    from edge_ai.bulk_enroll import run
+    from edge_ai.config import MONGO_URI
+    run(args.root, args.mongo_uri or MONGO_URI, workers=args.workers, detector=args.detector,
+        batch=args.batch, force=args.force, retry_rejected=args.retry_rejected)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m edge_ai", description="Smart Jewelry Edge AI")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("monitor", help="Chay giam sat camera")
+    p.add_argument("--source", type=parse_source, default=0, help="Camera index (0) hoac file video")
+    p.add_argument("--no-ui", action="store_true", help="Chay headless, khong can tkinter/man hinh")
+    p.add_argument("--sink", choices=["none", "mjpeg", "window"], default="none",
+                   help="Noi xuat frame da ve khi chay --no-ui")
+    p.add_argument("--output", help="Duong dan file cho --sink mjpeg")
+    p.add_argument("--zones", default=ZONES_FILE or None, help="File JSON cac vung bao ve cua camera (xem zones.example.json)")
+    p.add_argument("--imgsz", type=int, default=DETECT_IMGSZ,
+                   help="Kich thuoc anh vao YOLO (320/416/640, 0 = mac dinh model); mat tim lai bang MTCNN trong crop nguoi")
+    p.add_argument("--processes", default=MP_TOPOLOGY, metavar="TOPOLOGY",
+                   help="Tach stage ra process rieng, vd 'capture|detect|recognize' (mac dinh: luong trong 1 process)")
+    p.add_argument("--hands", action="store_true", help="Bat MediaPipe Hands quanh tu kinh (tay cham tu khi vang nhan vien)")
+    p.add_argument("--stats-every", type=float, default=10.0, help="In thong ke pipeline moi N giay (0 = tat)")
+    p.set_defaults(func=cmd_monitor)
+
+    p = sub.add_parser("export", help="Export/luong tu hoa FaceNet vao models_cache")
+    p.add_argument("--backend", choices=["torchscript", "onnx", "onnx-int8"], default="onnx-int8")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("enroll", help="Dang ky hang loat tu <root>/<ten>/*.jpg (chay lai chi xu ly anh moi)")
+    p.add_argument("--root", default="dataset/train", help="Thu muc chua moi nhan vien 1 thu muc con")
+    p.add_argument("--workers", type=int, help="So process doc anh + tim mat (mac dinh: so CPU - 1)")
+    p.add_argument("--batch", type=int, default=64, help="So khuon mat moi lo embed")
+    p.add_argument("--detector", choices=["auto", "mtcnn", "yolo", "none"], default="auto",
+                   help="none: anh da la crop khuon mat")
+    p.add_argument("--mongo-uri", help="Mac dinh MONGO_URI trong .env")
+    p.add_argument("--force", action="store_true", help="Upsert lai moi nhan vien ke ca khi anh khong doi")
+    p.add_argument("--retry-rejected", action="store_true", help="Xu ly lai anh da bi loai o lan truoc")
+    p.set_defaults(func=cmd_enroll)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
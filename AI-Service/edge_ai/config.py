@@ -0,0 +1,18 @@
+"""Cau hinh chung cho Edge AI (dung chung giua Tk app va che do headless)"""
+import os
+
+try:
+    from dotenv import load_dotenv
+    # Load credentials from .env
+    load_dotenv(dotenv_path="../.env")
+except ImportError:
+    pass
+
+# API Configuration - Dùng Cloud Backend (Render) - HARDCODE để chắc chắn
+# (EDGE_BACKEND_URL chi dung khi thu voi server gia lap, vd: python Virtual_Backend.py)
+CLOUD_BACKEND = os.getenv("EDGE_BACKEND_URL", "https://hm-jewelry-api.onrender.com")
+API_URL = CLOUD_BACKEND + "/api/security/log"
+RESET_ALARM_URL = CLOUD_BACKEND + "/api/security/reset-alarm"
+
+# Lay MONGO_URI tu .env (Uu tien Atlas Cloud da co san)
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
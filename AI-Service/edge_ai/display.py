@@ -0,0 +1,127 @@
+"""Lop hien thi cho giao dien Tk: chi chuyen doi khi co frame moi, thu nho ve kich thuoc widget truoc khi doi mau,
+gioi han FPS hien thi doc lap voi toc do xu ly (luong Tk khong tranh CPU voi YOLO/FaceNet).
+"""
+import os
+import time
+import cv2
+import numpy as np
+
+DISPLAY_FPS = float(os.getenv("DISPLAY_FPS", "30"))
+
+
+def fit_size(w, h, max_w, max_h):
+    """Kich thuoc lon nhat vua (max_w, max_h) va giu ty le; widget chua co kich thuoc (<= 1) -> giu nguyen"""
+    if max_w <= 1 or max_h <= 1:
+        return w, h
+    scale = min(max_w / w, max_h / h, 1.0)  # Khong phong to
+    return max(1, int(w * scale)), max(1, int(h * scale))
+
+
+class OvalGuide:
+    """Khung oval dan huong dang ky (toa do frame camera).
+    dim=1.0 (mac dinh, giong giao dien cu): chi ve vien oval. dim < 1: lam toi vung ngoai oval - mask duoc tinh
+    1 lan cho moi do phan giai hien thi, moi frame chi con 1 phep nhan.
+    """
+    def __init__(self, axes=(120, 160), color=(0, 255, 0), dim=1.0):
+        self.axes = axes
+        self.color = color
+        self.dim = dim
+        self._key = None
+        self._weight = None
+        self._ellipse = None
+
+    def geometry(self, frame_w, frame_h):
+        """(center_x, center_y, axes_x, axes_y) trong toa do frame"""
+        return frame_w // 2, frame_h // 2, self.axes[0], self.axes[1]
+
+    def apply(self, image, frame_size):
+        """Ve len anh hien thi (da thu nho) - frame_size la kich thuoc frame goc (w, h)"""
+        h, w = image.shape[:2]
+        key = (image.shape, frame_size)
+        if key != self._key:
+            scale = w / frame_size[0]
+            cx, cy, ax, ay = self.geometry(*frame_size)
+            self._ellipse = ((int(cx * scale), int(cy * scale)), (int(ax * scale), int(ay * scale)))
+            if self.dim < 1.0:
+                weight = np.full((h, w), int(255 * self.dim), dtype=np.uint8)
+                cv2.ellipse(weight, self._ellipse[0], self._ellipse[1], 0, 0, 360, 255, -1)
+                self._weight = cv2.merge([weight] * image.shape[2])
+            self._key = key
+        if self._weight is not None:
+            cv2.multiply(image, self._weight, image, scale=1 / 255)
+        cv2.ellipse(image, self._ellipse[0], self._ellipse[1], 0, 0, 360, self.color, 2)
+
+
+class FrameRenderer:
+    """BGR frame -> RGB o kich thuoc hien thi, tai su dung bo dem; chi render khi den luot theo max_fps"""
+    def __init__(self, max_fps=DISPLAY_FPS):
+        self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self._next = 0.0
+        self._small = None
+        self._rgb = None
+        self._last = None
+        self.rendered = 0
+        self.fps = 0.0
+
+    def delay_ms(self, now=None):
+        """So ms den lan render tiep theo (dung cho after() cua Tk)"""
+        now = time.monotonic() if now is None else now
+        if now >= self._next:
+            # Da den luot nhung khong co frame moi de ve -> hen 1 chu ky sau, khong poll moi 1 ms
+            self._next = now + self.interval
+        return max(1, int((self._next - now) * 1000))
+
+    def due(self, now=None):
+        now = time.monotonic() if now is None else now
+        return now >= self._next
+
+    def _buffer(self, attr, shape):
+        buf = getattr(self, attr)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=np.uint8)
+            setattr(self, attr, buf)
+        return buf
+
+    def render(self, frame, size, overlay=None):
+        """Thu nho ve vua size=(w, h) roi moi doi BGR->RGB; tra ve bo dem dung lai o lan sau"""
+        now = time.monotonic()
+        self._next = now + self.interval
+        h, w = frame.shape[:2]
+        tw, th = fit_size(w, h, *size)
+        src = frame
+        if (tw, th) != (w, h):
+            # INTER_LINEAR: INTER_AREA voi ty le khong nguyen cham hon ca doi mau full-size
+            src = cv2.resize(frame, (tw, th), self._buffer("_small", (th, tw, 3)), interpolation=cv2.INTER_LINEAR)
+        rgb = cv2.cvtColor(src, cv2.COLOR_BGR2RGB, self._buffer("_rgb", (th, tw, 3)))
+        if overlay is not None:
+            overlay.apply(rgb, (w, h))
+        if self._last is not None and now > self._last:
+            self.fps = 0.9 * self.fps + 0.1 / (now - self._last)
+        self._last = now
+        self.rendered += 1
+        return rgb
+
+
+class TkFrameView:
+    """Hien thi frame len tk.Label hoac tk.Canvas, dung lai PhotoImage khi kich thuoc khong doi"""
+    def __init__(self, widget, renderer=None):
+        self.widget = widget
+        self.renderer = renderer or FrameRenderer()
+        self._photo = None
+        self._item = None
+
+    def show(self, frame, overlay=None):
+        from PIL import Image, ImageTk
+        size = (self.widget.winfo_width(), self.widget.winfo_height())
+        img = Image.fromarray(self.renderer.render(frame, size, overlay))
+        if self._photo is not None and (self._photo.width(), self._photo.height()) == img.size:
+            self._photo.paste(img)  # Ghi vao anh Tk co san, khong tao anh moi
+            return
+        self._photo = ImageTk.PhotoImage(image=img)
+        if hasattr(self.widget, "create_image"):
+            if self._item is None:
+                self._item = self.widget.create_image(0, 0, anchor="nw", image=self._photo)
+            else:
+                self.widget.itemconfig(self._item, image=self._photo)
+        else:
+            self.widget.configure(image=self._photo)
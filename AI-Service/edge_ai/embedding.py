@@ -0,0 +1,44 @@
+"""Trich xuat embedding FaceNet theo lo (batch) cho tat ca khuon mat trong 1 frame"""
+import os
+import numpy as np
+from PIL import Image
+
+from edge_ai.gallery import EMBEDDING_DIM
+
+FACE_SIZE = 160
+
+# So khuon mat toi da trong 1 lan forward (gioi han RAM/VRAM tren may edge)
+RECOG_MAX_BATCH = int(os.getenv("RECOG_MAX_BATCH", "16"))
+
+
+def preprocess_faces(crops, size=FACE_SIZE):
+    """Resize ca lo crop (BGR) ve 160x160 va chuan hoa FaceNet -> mang float32 Nx3x160x160"""
+    batch = np.empty((len(crops), size, size, 3), dtype=np.uint8)
+    for i, crop in enumerate(crops):
+        # Giu dung phep resize cua PIL nhu luc dang ky de embedding khong bi lech
+        batch[i] = np.asarray(Image.fromarray(crop).resize((size, size)))
+    # BGR -> RGB, NHWC -> NCHW va (x - 127.5) / 128.0 thuc hien 1 lan cho ca lo
+    img = np.ascontiguousarray(batch[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32)
+    img -= 127.5
+    img /= 128.0
+    return img
+
+
+class FaceEmbedder:
+    """Chay backend FaceNet (xem edge_ai.backends) tren ca lo khuon mat thay vi tung khuon mat mot"""
+    def __init__(self, backend, max_batch=RECOG_MAX_BATCH):
+        self.backend = backend
+        self.max_batch = max(1, int(max_batch))
+
+    def embed(self, crops):
+        """Tra ve ma tran embedding Nx512 (float32), moi dong ung voi 1 crop"""
+        if len(crops) == 0:
+            return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+
+        chunks = []
+        for start in range(0, len(crops), self.max_batch):
+            chunks.append(self.backend(preprocess_faces(crops[start:start + self.max_batch])))
+        return np.concatenate(chunks).astype(np.float32, copy=False)
+
+    def embed_one(self, face_img):
+        return self.embed([face_img])[0]
@@ -0,0 +1,321 @@
+"""Engine giam sat: capture / detect / recognize / annotate chay tren cac luong rieng, noi bang queue bounded"""
+import os
+import threading
+import time
+import cv2
+import numpy as np
+
+from edge_ai.alarm import AlarmStateMachine, ALARM, SUSPECT, RESOLVED
+from edge_ai.cascade import detect_people, DETECT_IMGSZ
+from edge_ai.motion import MotionGate, MOTION_GATE
+from edge_ai.pipeline import FramePacket, FramePool, DropOldestQueue, LatestFrame, release_packet
+from edge_ai.scheduler import RecognitionScheduler, PRIORITY_FAR
+from edge_ai.zones import ZoneMap
+from edge_ai.tracker import IdentityTracker
+
+# Vung trung bay (tu kinh) - goc tren ben phai cua frame 800x600
+FENCE_BOX = (500, 50, 750, 300)
+CAMERA_WIDTH, CAMERA_HEIGHT = 800, 600
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+# 0 = tu tinh: moi frame co the dang nam o 1 stage hoac 1 hang doi (+ 1 frame dang hien thi)
+FRAME_POOL_SIZE = int(os.getenv("FRAME_POOL_SIZE", "0"))
+
+
+def open_camera(source):
+    """Mo camera / file video -> (cap, giay giua 2 frame); file video phat dung toc do goc thay vi nhanh nhat co the"""
+    cap = cv2.VideoCapture(source)
+    cap.set(3, CAMERA_WIDTH)
+    cap.set(4, CAMERA_HEIGHT)
+    is_file = isinstance(source, str) and not source.isdigit()
+    frame_interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 25) if is_file else 0
+    return cap, frame_interval
+
+
+class MonitoringEngine:
+    """Pipeline giam sat tai su dung duoc (Tk app hoac chay doc lap).
+
+    recognizer(crops) -> (names, mean_dists) la ham nhan dien ca lo khuon mat.
+    on_alert(type, title, message) chi duoc goi khi may trang thai chuyen vao ALARM,
+    on_resolved() chi duoc goi khi ALARM -> RESOLVED (nhan vien xuat hien hoac nguoi la da roi di).
+    render=False bo qua buoc ve (headless khong co noi hien thi).
+    motion_gate: bo qua YOLO khi khung hinh tinh (None = luon detect).
+    hands: HandDetector -> ban tay cham tu khi khong co nhan vien cung tinh la xam nhap.
+    zones: ZoneMap (nhieu vung da giac, xem edge_ai.zones); None = 1 vung chu nhat fence_box.
+    evidence: EvidenceBuffer - giu vai giay frame da ve (ban thu nho) lam bang chung truoc su kien.
+    faces: FaceLocator - tim mat trong crop nguoi truoc FaceNet (None = embed ca crop nguoi).
+    imgsz: kich thuoc anh vao YOLO (0 = mac dinh cua model).
+    Frame lay tu `output` phai duoc packet.release() sau khi hien thi de bo dem quay lai pool.
+    """
+    def __init__(self, detector, recognizer, tracker=None, source=0, fence_box=FENCE_BOX,
+                 queue_size=PIPELINE_QUEUE_SIZE, on_alert=None, on_resolved=None, render=True,
+                 motion_gate=None, alarm=None, hands=None, zones=None, evidence=None, faces=None,
+                 imgsz=DETECT_IMGSZ):
+        self.detector = detector
+        self.recognizer = recognizer
+        self.tracker = tracker or IdentityTracker()
+        self.source = source
+        self.zones = zones or ZoneMap.from_box(fence_box)
+        self.on_alert = on_alert
+        self.evidence = evidence
+        self.faces = faces
+        self.imgsz = imgsz
+        self.on_resolved = on_resolved
+        self.alarm = alarm or AlarmStateMachine()
+        self.render = render
+        self.motion_gate = motion_gate if motion_gate is not None else (MotionGate() if MOTION_GATE else None)
+        self._last_boxes = []
+        self.scheduler = RecognitionScheduler(self.zones)
+        self.hand_tracker = None
+        if hands is not None and hands.hands:
+            from edge_ai.hands import FenceHandTracker  # Chi nap mediapipe khi bat theo doi ban tay
+            self.hand_tracker = FenceHandTracker(hands, self.zones)
+
+        # capture -> [LatestFrame] -> detect -> [queue] -> recognize -> [queue] -> annotate -> [output]
+        # Frame bi bo o bat ky diem trung chuyen nao deu tra bo dem ve pool
+        self.pool = FramePool(FRAME_POOL_SIZE or 2 * queue_size + 6)
+        self.frames_in = LatestFrame("capture->detect", on_drop=release_packet)
+        self.detected = DropOldestQueue(queue_size, "detect->recognize", on_drop=release_packet)
+        self.recognized = DropOldestQueue(queue_size, "recognize->annotate", on_drop=release_packet)
+        self.output = DropOldestQueue(1, "annotate->display", on_drop=release_packet)
+
+        self.is_running = False
+        self.is_staff_present = False
+        self.fps = 0.0
+        self.latency_ms = 0.0
+        self._last_output = None
+        self._threads = []
+
+    # --- DIEU KHIEN ---
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        for target in (self._capture_loop, self._detect_loop, self._recognize_loop, self._annotate_loop):
+            t = threading.Thread(target=target, name=target.__name__.strip('_'), daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout=2.0):
+        self.is_running = False
+        for q in (self.frames_in, self.detected, self.recognized, self.output):
+            q.close()
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join(timeout)
+        self._threads = []
+
+    def acknowledge_alarm(self):
+        """Backend da tat coi: dong bo may trang thai de khong gui reset lan nua"""
+        self.alarm.acknowledge()
+
+    def gallery_changed(self):
+        """Gallery (va cache tren dia) vua thay doi: danh tinh da cache theo track khong con dung"""
+        self.tracker.reset_identities()
+
+    def stats(self):
+        """Thong ke pipeline: so frame bi bo o moi diem trung chuyen va do tre end-to-end"""
+        return {
+            "fps": self.fps,
+            "latency_ms": self.latency_ms,
+            "dropped": {q.name: q.dropped for q in (self.frames_in, self.detected, self.recognized, self.output)},
+            "frame_pool": self.pool.stats(),
+            "embed_ratio": self.tracker.embed_ratio,
+            "detect_skip_ratio": self.motion_gate.skip_ratio if self.motion_gate else 0.0,
+            "scheduler": self.scheduler.stats(),
+            "alarm": self.alarm.stats(),
+            "hands": self.hand_tracker.stats() if self.hand_tracker else None,
+            "evidence": self.evidence.stats() if self.evidence else None,
+            "faces": self.faces.stats() if self.faces else None,
+        }
+
+    # --- CAC STAGE ---
+    def _capture_loop(self):
+        """Doc camera lien tuc vao bo dem tai su dung, lat guong vao bo dem cua pool, chi giu lai frame moi nhat"""
+        cap, frame_interval = open_camera(self.source)
+        seq = 0
+        raw = None
+        while self.is_running:
+            t0 = time.monotonic()
+            ret, raw = cap.read(raw)
+            if not ret:
+                break
+            seq += 1
+            frame = self.pool.acquire(raw.shape, raw.dtype)
+            cv2.flip(raw, 1, frame)
+            self.frames_in.publish(FramePacket(seq, frame, t0, self.pool))
+            if frame_interval:
+                time.sleep(max(0.0, frame_interval - (time.monotonic() - t0)))
+        cap.release()
+        if self.is_running:
+            # Mat camera / het file video -> dung ca pipeline
+            threading.Thread(target=self.stop, daemon=True).start()
+
+    def _detect_loop(self):
+        while self.is_running:
+            packet = self.frames_in.take(timeout=0.5)
+            if packet is not None:
+                self.detect_packet(packet)
+                self.detected.put(packet)
+
+    def detect_packet(self, packet):
+        """PHAT HIEN NGUOI (YOLOv8) tren frame moi nhat - chi khi co chuyen dong hoac den keyframe"""
+        t0 = time.perf_counter()
+        frame = packet.frame
+        if self.motion_gate is None or self.motion_gate.should_detect(frame):
+            self._last_boxes = detect_people(self.detector, frame, self.imgsz)
+            packet.events["detected"] = True
+        # Khung hinh tinh: dung lai box cua lan detect truoc (nguoi dung yen van duoc theo doi)
+        for x1, y1, x2, y2 in self._last_boxes:
+            person_crop = frame[y1:y2, x1:x2]
+            if person_crop.size > 0:
+                packet.boxes.append((x1, y1, x2, y2))
+                packet.crops.append(person_crop)
+        packet.timings["detect"] = (time.perf_counter() - t0) * 1000
+
+        # Kiem tra vung 1 lan cho ca frame: moi box x moi vung (va muc uu tien nhan dien)
+        t_zone = time.perf_counter()
+        self.zones.prepare(frame.shape)
+        priorities = self.scheduler.priorities(packet.boxes)
+        packet.events["priorities"] = priorities
+        packet.events["box_zone_hits"] = self.zones.hit_boxes(packet.boxes)
+        packet.timings["zones"] = (time.perf_counter() - t_zone) * 1000
+        if self.hand_tracker:
+            # MediaPipe chi tren crop quanh cac vung, chay day du khi co nguoi tien lai gan
+            t_hand = time.perf_counter()
+            packet.hands = self.hand_tracker.update(frame, bool((priorities != PRIORITY_FAR).any()))
+            packet.events["hand_zone_hits"] = self.hand_tracker.zone_hits(packet.hands)
+            packet.timings["hands"] = (time.perf_counter() - t_hand) * 1000
+
+    def _recognize_loop(self):
+        while self.is_running:
+            packet = self.detected.get(timeout=0.5)
+            if packet is not None:
+                self.recognize_packet(packet)
+                self.recognized.put(packet)
+
+    def recognize_packet(self, packet):
+        """NHAN DIEN (FaceNet theo track) va LOGIC AN NINH"""
+        t0 = time.perf_counter()
+        # Chi chay FaceNet cho track moi / den han / khong chac chan, con lai dung danh tinh da cache.
+        # Scheduler uu tien nguoi gan vung cam va hoan phan viec it quan trong khi vuot ngan sach.
+        tracks = self.tracker.update(packet.boxes)
+        todo = self.scheduler.plan(self.tracker, tracks, packet.boxes, packet.events["priorities"])
+        if todo:
+            t_rec = time.perf_counter()
+            crops = [packet.crops[i] for i in todo]
+            if self.faces is not None:
+                # Chi tim mat cho cac nguoi can nhan dien o frame nay (tinh vao chi phi nhan dien)
+                crops = self.faces.extract(crops)
+                packet.timings["face"] = (time.perf_counter() - t_rec) * 1000
+            names, dists = self.recognizer(crops)
+            self.scheduler.record_cost((time.perf_counter() - t_rec) * 1000, len(todo))
+            for i, name, dist in zip(todo, names, dists):
+                self.tracker.record(tracks[i], name, dist)
+        packet.tracks = tracks
+        packet.crops = []
+        packet.timings["recognize"] = (time.perf_counter() - t0) * 1000
+
+        self._evaluate_security(packet)
+
+    def _evaluate_security(self, packet):
+        names = [track.name for track in packet.tracks]
+        stranger = np.array(["Stranger" in name for name in names], dtype=bool)
+        staff_present = any(not s and name != "Processing..." for s, name in zip(stranger, names))
+        stranger_seen = bool(stranger.any())
+        self.is_staff_present = staff_present
+
+        # Vung bi xam nhap: nguoi la cham vung, hoac ban tay cham vung (Tinh huong 2)
+        stranger_hits = packet.events["box_zone_hits"][stranger].any(axis=0)
+        hand_hits = packet.events.get("hand_zone_hits")
+        zone_hits = stranger_hits | hand_hits if hand_hits is not None else stranger_hits
+        # Vung staff_exempt: co nhan vien (dang phuc vu khach) thi khong tinh; vung con lai luon tinh
+        active = zone_hits & (~self.zones.staff_exempt | (not staff_present))
+        # LOGIC AN NINH: chi goi backend khi CHUYEN trang thai, khong gui lai moi frame
+        transition = self.alarm.update(bool(zone_hits.any()), staff_present,
+                                       staff_exempt=not (zone_hits & ~self.zones.staff_exempt).any())
+        packet.events.update({"staff_present": staff_present, "stranger_seen": stranger_seen,
+                              "stranger_in_fence": bool(stranger_hits.any()),
+                              "hand_in_fence": bool(hand_hits is not None and hand_hits.any()),
+                              "zone_hits": zone_hits, "alarm_state": self.alarm.state})
+        if transition is None:
+            return
+        print(f"[ALARM] {transition[0]} -> {transition[1]}")
+        if transition[1] == ALARM and self.on_alert:
+            zones = ", ".join(name for name, hit in zip(self.zones.names, active) if hit)
+            level = "DANGER" if (active & self.zones.severity).any() else "WARNING"
+            if (stranger_hits & active).any():
+                print(f"[ALERT] Stranger intrusion detected! zones={zones}")
+                self.on_alert(level, "Trom cap", f"Phat hien nguoi la xam nhap vung trung bay! ({zones})")
+            else:
+                print(f"[ALERT] Hand in display case with no staff present! zones={zones}")
+                self.on_alert(level, "Trom cap", f"Phat hien ban tay cham tu kinh khi khong co nhan vien! ({zones})")
+        # TU ĐỘNG TẮT CÒI KHI THẤY NHÂN VIÊN
+        elif transition == (ALARM, RESOLVED) and self.on_resolved:
+            self.on_resolved()
+
+    def _update_rate(self, packet):
+        # FPS (toc do ra frame) va do tre tu luc camera chup den luc xu ly xong
+        now = time.monotonic()
+        if self._last_output is not None and now > self._last_output:
+            self.fps = 0.9 * self.fps + 0.1 * (1.0 / (now - self._last_output))
+        self._last_output = now
+        self.latency_ms = 0.9 * self.latency_ms + 0.1 * packet.age_ms
+
+    def _annotate_loop(self):
+        """VE KET QUA len frame va day ra hang doi hien thi"""
+        while self.is_running:
+            packet = self.recognized.get(timeout=0.5)
+            if packet is None:
+                continue
+            self.annotate(packet)
+            if self.evidence is not None:
+                # Copy thu nho vao ring buffer rieng (frame cua pool se duoc tai su dung)
+                self.evidence.push(packet.frame, packet.captured_at)
+            self.output.put(packet)
+
+    def annotate(self, packet):
+        self._update_rate(packet)
+        if not self.render:
+            return
+        frame = packet.frame
+        for (x1, y1, x2, y2), track in zip(packet.boxes, packet.tracks):
+            name = track.name
+            if "Stranger" in name:
+                color = (0, 0, 255) # Do
+            elif name == "Processing...":
+                color = (0, 255, 255)
+            else:
+                color = (0, 255, 0) # Xanh (Staff)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(frame, f"{name} #{track.track_id}", (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+
+        if packet.hands is not None:
+            self.hand_tracker.detector.draw(frame, packet.hands)
+
+        # Ve cac vung bao ve - Chuyen do khi nguoi la / ban tay xam nhap
+        self.zones.draw(frame, packet.events.get("zone_hits"))
+
+        state = packet.events.get("alarm_state")
+        if state == ALARM:
+            # NGUOI LA XAM NHAP TU KINH -> BAO DONG!!!
+            msg = "!!! CANH BAO: TROM CAP - XAM NHAP TU KINH !!!"
+            cv2.putText(frame, msg, (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
+        elif state == SUSPECT:
+            # Dang dem frame xac nhan, chua bao dong
+            msg = "NGHI VAN: Nguoi la trong vung trung bay"
+            cv2.putText(frame, msg, (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 128, 255), 2)
+        elif packet.events.get("stranger_seen"):
+            # Chi CANH BAO (khong bao dong) khi chi thay nguoi la ben ngoai
+            msg = "CANH GIOI: Phat hien nguoi la"
+            cv2.putText(frame, msg, (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 165, 0), 2)  # Mau cam
+
+        cv2.putText(frame, self.status_text(), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 1)
+
+    def status_text(self):
+        status = (f"{self.alarm.state} | FPS: {self.fps:.1f} | Lat: {self.latency_ms:.0f}ms"
+                  f" | Embed: {self.tracker.embed_ratio:.0%}")
+        if self.motion_gate:
+            status += f" | YOLO skip: {self.motion_gate.skip_ratio:.0%}"
+        if self.hand_tracker:
+            status += f" | Hand: {self.hand_tracker.ms:.0f}ms"
+        return status
@@ -0,0 +1,87 @@
+"""Dang ky nhan vien: trich embedding tren luong nen ngay khi chup, ghi JPEG ra dia (tuy chon) khong chan UI"""
+import os
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+
+from edge_ai.gallery import EMBEDDING_DIM
+
+# Van luu anh vao dataset/train/<ten>/ de co the dang ky lai hang loat sau nay
+REGISTER_SAVE_IMAGES = os.getenv("REGISTER_SAVE_IMAGES", "1") == "1"
+DATASET_DIR = "dataset/train"
+
+
+class EnrollmentSession:
+    """Nhan crop tu cua so dang ky (luong Tk), embed theo lo tren 1 worker rieng.
+
+    add(crop) tra ve ngay; finish() doi worker xu ly het va tra ve ma tran Nx512.
+    """
+    def __init__(self, embedder, name, save_images=REGISTER_SAVE_IMAGES, dataset_dir=DATASET_DIR):
+        self.embedder = embedder
+        self.name = name
+        self.folder = os.path.join(dataset_dir, name) if save_images else None
+        self._queue = queue.Queue()
+        self._embs = []
+        self._count = 0
+        self.error = None
+        self.embed_ms = 0.0
+        self._worker = threading.Thread(target=self._run, name=f"enroll-{name}", daemon=True)
+        self._worker.start()
+
+    def add(self, face_img):
+        # Crop la view vao frame camera -> copy truoc khi frame bi ghi de
+        self._queue.put((self._count, face_img.copy()))
+        self._count += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            # Gom tat ca crop dang cho thanh 1 lo
+            batch = [item]
+            done = False
+            while len(batch) < self.embedder.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+            self._process(batch)
+            if done:
+                return
+
+    def _process(self, batch):
+        crops = [crop for _, crop in batch]
+        try:
+            t0 = time.perf_counter()
+            self._embs.append(self.embedder.embed(crops))
+            self.embed_ms += (time.perf_counter() - t0) * 1000
+        except Exception as e:
+            self.error = e
+            print(f"[WARNING] Enrollment embedding failed: {e}")
+            return  # Khong luu anh cua lo loi: dataset chi giu anh da dung de dang ky
+        if self.folder:
+            os.makedirs(self.folder, exist_ok=True)
+            for index, crop in batch:
+                cv2.imwrite(os.path.join(self.folder, f"{index}.jpg"), crop)
+
+    def finish(self, timeout=None):
+        """Doi embed xong cac crop con lai -> mang float32 Nx512"""
+        self._queue.put(None)
+        self._worker.join(timeout)
+        if not self._embs:
+            return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        return np.concatenate(self._embs)
+
+    def cancel(self):
+        self._queue.put(None)
+
+    @property
+    def captured(self):
+        return self._count
@@ -0,0 +1,242 @@
+"""Bang chung cho canh bao: ring buffer vai giay frame thu nho (truoc su kien) + luong nen ma hoa va tai len.
+
+- Engine day frame vao EvidenceBuffer theo EVIDENCE_FPS (1 lan resize vao o nho cap phat san, khong cap phat moi).
+- Khi bao dong: EvidenceRecorder lay anh moi nhat -> JPEG -> uploader -> URL gan vao canh bao (imageUrl),
+  clip MJPEG [truoc, sau] su kien duoc hen ghi sau EVIDENCE_POST_SEC (khong chan anh cua canh bao sau).
+- Uploader thay duoc: EVIDENCE_UPLOADER=local (mac dinh, ghi vao EVIDENCE_DIR) hoac "module:ham" tra ve
+  doi tuong co upload(name, data, content_type) -> url (None = khong co URL ma nhan vien mo duoc).
+  Tuy chon url_for(name) -> url biet truoc (de gan link clip vao canh bao truoc khi clip ghi xong).
+- Local khong dat EVIDENCE_URL_PREFIX: chi luu tren may edge, canh bao KHONG kem imageUrl (file:// vo nghia voi Cloud).
+"""
+import datetime
+import importlib
+import os
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+
+EVIDENCE_ENABLED = os.getenv("EVIDENCE_ENABLED", "1") == "1"
+EVIDENCE_PRE_SEC = float(os.getenv("EVIDENCE_PRE_SEC", "5"))     # Giay giu lai truoc su kien
+EVIDENCE_POST_SEC = float(os.getenv("EVIDENCE_POST_SEC", "3"))   # Giay ghi them sau su kien
+EVIDENCE_FPS = float(os.getenv("EVIDENCE_FPS", "5"))             # So frame/giay dua vao buffer
+EVIDENCE_WIDTH = int(os.getenv("EVIDENCE_WIDTH", "480"))         # Thu nho truoc khi luu
+EVIDENCE_MAX_MB = float(os.getenv("EVIDENCE_MAX_MB", "32"))      # Tran bo nho cua ring buffer
+EVIDENCE_JPEG_QUALITY = int(os.getenv("EVIDENCE_JPEG_QUALITY", "80"))
+EVIDENCE_DIR = os.getenv("EVIDENCE_DIR", "evidence")
+EVIDENCE_URL_PREFIX = os.getenv("EVIDENCE_URL_PREFIX", "")       # vd http://edge-box:8081/evidence/ (mac dinh file://)
+EVIDENCE_UPLOADER = os.getenv("EVIDENCE_UPLOADER", "local")
+
+
+class LocalDirUploader:
+    """Ghi file vao thu muc local; URL = EVIDENCE_URL_PREFIX + ten file (thu muc duoc phuc vu qua HTTP).
+    Khong dat prefix -> khong co URL (file van nam trong folder tren may edge).
+    """
+    def __init__(self, folder=EVIDENCE_DIR, url_prefix=EVIDENCE_URL_PREFIX):
+        self.folder = folder
+        self.url_prefix = url_prefix
+        os.makedirs(folder, exist_ok=True)
+        if not url_prefix:
+            print(f"[WARNING] EVIDENCE_URL_PREFIX not set: evidence kept in {os.path.abspath(folder)}, "
+                  f"alerts are sent without imageUrl")
+
+    def url_for(self, name):
+        return self.url_prefix + name if self.url_prefix else None
+
+    def upload(self, name, data, content_type):
+        path = os.path.join(self.folder, name)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return self.url_for(name)
+
+
+def make_uploader(spec=EVIDENCE_UPLOADER):
+    if spec == "local":
+        return LocalDirUploader()
+    module, _, factory = spec.partition(":")
+    return getattr(importlib.import_module(module), factory or "make_uploader")()
+
+
+class EvidenceBuffer:
+    """Ring buffer frame thu nho co tran bo nho: so o = min(seconds * fps, max_bytes / kich thuoc frame)"""
+    def __init__(self, seconds=EVIDENCE_PRE_SEC + EVIDENCE_POST_SEC, fps=EVIDENCE_FPS, width=EVIDENCE_WIDTH,
+                 max_bytes=int(EVIDENCE_MAX_MB * 2**20)):
+        self.seconds = seconds
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.width = width
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._slots = None
+        self._times = None
+        self._head = 0
+        self._count = 0
+        self._next_push = 0.0
+        self.pushed = 0
+
+    def _alloc(self, shape):
+        h, w = shape[:2]
+        tw = min(self.width, w)
+        th = max(1, round(h * tw / w))
+        wanted = int(self.seconds / self.interval) + 1 if self.interval else 1
+        capacity = min(wanted, self.max_bytes // (th * tw * 3))
+        if capacity < wanted:
+            print(f"[WARNING] Evidence buffer capped at {capacity}/{wanted} frames by EVIDENCE_MAX_MB")
+        self._slots = np.empty((max(1, capacity), th, tw, 3), dtype=np.uint8)
+        self._times = np.full(len(self._slots), -np.inf)
+        self._head = self._count = 0
+        self._source_shape = shape
+
+    def push(self, frame, timestamp):
+        """Luu frame neu da den luot theo fps (timestamp: time.monotonic luc chup)"""
+        if timestamp < self._next_push:
+            return False
+        self._next_push = timestamp + self.interval
+        with self._lock:
+            if self._slots is None or frame.shape != self._source_shape:
+                self._alloc(frame.shape)
+            slot = self._slots[self._head]
+            cv2.resize(frame, (slot.shape[1], slot.shape[0]), slot, interpolation=cv2.INTER_LINEAR)
+            self._times[self._head] = timestamp
+            self._head = (self._head + 1) % len(self._slots)
+            self._count = min(self._count + 1, len(self._slots))
+            self.pushed += 1
+        return True
+
+    def frames_between(self, start, end):
+        """Ban sao cac frame co thoi diem trong [start, end], cu truoc"""
+        with self._lock:
+            if self._slots is None:
+                return []
+            order = (self._head - self._count + np.arange(self._count)) % len(self._slots)
+            return [(self._times[i], self._slots[i].copy()) for i in order if start <= self._times[i] <= end]
+
+    def latest(self):
+        with self._lock:
+            if not self._count:
+                return None
+            return self._slots[(self._head - 1) % len(self._slots)].copy()
+
+    def stats(self):
+        with self._lock:
+            capacity = 0 if self._slots is None else len(self._slots)
+            frame_bytes = 0 if self._slots is None else self._slots[0].nbytes
+            covered = 0.0
+            if self._count > 1:
+                newest = self._times[(self._head - 1) % capacity]
+                oldest = self._times[(self._head - self._count) % capacity]
+                covered = newest - oldest
+        return {"frames": self._count, "capacity": capacity, "bytes": capacity * frame_bytes,
+                "max_bytes": self.max_bytes, "seconds": round(float(covered), 1)}
+
+
+class EvidenceRecorder:
+    """Luong nen: anh chup ngay khi bao dong (-> imageUrl) + clip MJPEG truoc/sau su kien"""
+    def __init__(self, buffer, uploader=None, pre_sec=EVIDENCE_PRE_SEC, post_sec=EVIDENCE_POST_SEC,
+                 quality=EVIDENCE_JPEG_QUALITY):
+        self.buffer = buffer
+        self.uploader = uploader or make_uploader()
+        self.pre_sec = pre_sec
+        self.post_sec = post_sec
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        self._jobs = queue.Queue()
+        self._thread = None
+        self.snapshots = 0
+        self.clips = 0
+        self.failed = 0
+        self.last_url = None
+        self.last_clip_url = None
+        self._pending = 0
+        self._seq = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="evidence", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """Khong doi het thoi gian sau su kien: ghi ngay clip cua cac canh bao dang cho roi thoat"""
+        self._jobs.put(None)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def capture(self, on_snapshot, label="alert"):
+        """Tra ve ngay; on_snapshot(url, clip_url) duoc goi tu luong nen khi anh da tai len.
+        url/clip_url = None neu khong co URL; clip_url chi biet truoc khi uploader co url_for (clip ghi sau post_sec).
+        """
+        self._seq += 1
+        self._jobs.put((time.monotonic(), datetime.datetime.now(), f"{self._seq}-{label}", on_snapshot))
+
+    def _encode(self, frame):
+        ok, buf = cv2.imencode(".jpg", frame, self.params)
+        if not ok:
+            raise RuntimeError("JPEG encode failed")
+        return buf.tobytes()
+
+    def _run(self):
+        # Clip cho den han: [(han chot, triggered, stem)] - 1 canh bao doi clip khong chan anh cua canh bao sau
+        pending = []
+        while True:
+            timeout = max(0.0, pending[0][0] - time.monotonic()) if pending else None
+            try:
+                job = self._jobs.get(timeout=timeout)
+            except queue.Empty:
+                job = ()
+            if job is None:
+                # Dung: ghi ngay clip cua cac canh bao dang cho (voi frame hien co)
+                for _, triggered, stem in pending:
+                    self._write_clip(triggered, stem)
+                return
+            if job:
+                triggered, wall, label, on_snapshot = job
+                # Mili giay + so thu tu: 2 canh bao trong cung 1 giay khong ghi de file cua nhau
+                stem = f"{wall:%Y%m%d-%H%M%S}-{wall.microsecond // 1000:03d}-{label}"
+                self._snapshot(stem, on_snapshot)
+                pending.append((triggered + self.post_sec, triggered, stem))
+                pending.sort()
+            while pending and pending[0][0] <= time.monotonic():
+                _, triggered, stem = pending.pop(0)
+                self._write_clip(triggered, stem)
+            self._pending = len(pending)
+
+    def _snapshot(self, stem, on_snapshot):
+        url = None
+        try:
+            frame = self.buffer.latest()
+            # Bao dong ngay cac frame dau: buffer chua kip nhan frame nao (day o stage ve) -> doi toi da 0.5 s
+            deadline = time.monotonic() + 0.5
+            while frame is None and time.monotonic() < deadline:
+                time.sleep(0.02)
+                frame = self.buffer.latest()
+            if frame is not None:
+                url = self.uploader.upload(f"{stem}.jpg", self._encode(frame), "image/jpeg")
+                self.snapshots += 1
+                self.last_url = url
+        except Exception as e:
+            self.failed += 1
+            print(f"[WARNING] Evidence snapshot failed: {e}")
+        url_for = getattr(self.uploader, "url_for", None)
+        # Canh bao van duoc gui ke ca khi khong co anh
+        on_snapshot(url, url_for(f"{stem}-clip.mjpeg") if url_for else None)
+
+    def _write_clip(self, triggered, stem):
+        """Clip MJPEG (cac JPEG noi tiep) tu pre_sec truoc den post_sec sau su kien"""
+        try:
+            frames = self.buffer.frames_between(triggered - self.pre_sec, triggered + self.post_sec)
+            if frames:
+                data = b"".join(self._encode(f) for _, f in frames)
+                url = self.uploader.upload(f"{stem}-clip.mjpeg", data, "video/x-motion-jpeg")
+                self.clips += 1
+                self.last_clip_url = url
+                where = url or os.path.join(getattr(self.uploader, "folder", ""), f"{stem}-clip.mjpeg")
+                print(f"[INFO] Evidence clip saved: {where}")
+        except Exception as e:
+            self.failed += 1
+            print(f"[WARNING] Evidence clip failed: {e}")
+
+    def stats(self):
+        return {**self.buffer.stats(), "snapshots": self.snapshots, "clips": self.clips,
+                "failed": self.failed, "pending": self._jobs.qsize() + self._pending,
+                "last_url": self.last_url, "last_clip_url": self.last_clip_url}
@@ -0,0 +1,222 @@
+"""Gallery embedding nhan vien: ma tran lien tuc + tim kNN bang 1 phep nhan ma tran.
+
+Che do gon (nhieu chi nhanh, hang nghin nhan vien):
+- GALLERY_EXEMPLARS=k: moi nguoi chi giu tam (centroid) + k mau da dang nhat thay vi ~20 vector.
+- GALLERY_DTYPE=float16|int8: luu vector dang nen (int8 co 1 he so scale cho moi vector).
+"""
+import os
+import threading
+import numpy as np
+
+EMBEDDING_DIM = 512      # Kich thuoc vector FaceNet (InceptionResnetV1)
+MAX_NEIGHBORS = 7        # Giong KNeighborsClassifier cu: n_neighbors = min(7, so nguoi)
+MATCH_THRESHOLD = 0.85   # Nguong khoang cach Euclidean trung binh cua k lang gieng
+
+GALLERY_EXEMPLARS = int(os.getenv("GALLERY_EXEMPLARS", "0"))   # 0 = giu tat ca vector
+GALLERY_DTYPE = os.getenv("GALLERY_DTYPE", "float32")
+DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+SEARCH_CHUNK = 8192      # So dong giai nen moi lan khi search tren ma tran float16/int8
+
+
+def l2_normalize(vecs):
+    vecs = np.asarray(vecs, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs / np.maximum(norms, 1e-12)
+
+
+def select_prototypes(vecs, exemplars):
+    """Tam (centroid) + `exemplars` vector xa nhau nhat (farthest-point) -> phu du cac huong mat"""
+    vecs = l2_normalize(vecs)
+    if exemplars <= 0 or len(vecs) <= exemplars + 1:
+        return vecs
+    centroid = l2_normalize(vecs.mean(axis=0))
+    chosen = []
+    # Khoang cach (1 - cos) tu moi vector toi prototype gan nhat da chon
+    nearest = 1.0 - vecs @ centroid[0]
+    for _ in range(exemplars):
+        i = int(nearest.argmax())
+        chosen.append(i)
+        nearest = np.minimum(nearest, 1.0 - vecs @ vecs[i])
+    return np.concatenate([centroid, vecs[chosen]])
+
+
+class GalleryIndex:
+    """Thay the KNeighborsClassifier: them/xoa tung nhan vien khong can fit lai toan bo"""
+    def __init__(self, capacity=256, exemplars=GALLERY_EXEMPLARS, dtype=GALLERY_DTYPE):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown gallery dtype {dtype!r}, choose from {', '.join(DTYPES)}")
+        self.exemplars = exemplars
+        self.dtype = dtype
+        # Che do prototype: moi nguoi chi con 1 + exemplars vector -> k khong vuot qua so do
+        self.neighbors = MAX_NEIGHBORS if exemplars <= 0 else min(MAX_NEIGHBORS, exemplars + 1)
+        self._lock = threading.Lock()
+        self._matrix, self._labels, self._scales = self._alloc(capacity)
+        self._count = 0
+        self._names = []      # label id -> ten
+        self._ids = {}        # ten -> label id
+        self._rows = {}       # label id -> so vector dang co (so nguoi = len, khong can np.unique moi query)
+        self._rank = np.empty(0, dtype=np.int32)  # thu tu alphabet cua label (tie-break nhu LabelEncoder)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def people(self):
+        """Danh sach nhan vien dang co trong gallery"""
+        with self._lock:
+            return sorted(self._names[i] for i in self._rows)
+
+    @property
+    def nbytes(self):
+        """Bo nho dang dung cho vector + label + scale"""
+        n = self._count
+        return self._matrix[:n].nbytes + self._labels[:n].nbytes + self._scales[:n].nbytes
+
+    def _alloc(self, capacity):
+        return (np.empty((capacity, EMBEDDING_DIM), dtype=DTYPES[self.dtype]),
+                np.empty(capacity, dtype=np.int32),
+                np.ones(capacity, dtype=np.float32))
+
+    def _encode(self, vectors):
+        """Chon prototype (neu bat) roi nen ve dtype luu tru -> (codes, scales)"""
+        vecs = select_prototypes(vectors, self.exemplars)
+        if self.dtype == "int8":
+            scales = np.maximum(np.abs(vecs).max(axis=1), 1e-12) / 127.0
+            codes = np.round(vecs / scales[:, None]).astype(np.int8)
+            return codes, scales.astype(np.float32)
+        return vecs.astype(DTYPES[self.dtype]), np.ones(len(vecs), dtype=np.float32)
+
+    def _rebuild(self, keep, capacity, items):
+        """Copy-on-write: giu cac dong `keep`, noi them items [(label, codes, scales)], gan mang moi.
+        Luong dang search van doc snapshot cu hop le.
+        """
+        matrix, labels, scales = self._alloc(capacity)
+        n = self._count if keep is None else int(keep.sum())
+        rows = slice(None) if keep is None else keep
+        matrix[:n] = self._matrix[:self._count][rows]
+        labels[:n] = self._labels[:self._count][rows]
+        scales[:n] = self._scales[:self._count][rows]
+        for label, codes, sc in items:
+            matrix[n:n + len(codes)] = codes
+            labels[n:n + len(codes)] = label
+            scales[n:n + len(codes)] = sc
+            n += len(codes)
+        self._matrix, self._labels, self._scales, self._count = matrix, labels, scales, n
+
+    def _label_id(self, name):
+        if name not in self._ids:
+            self._ids[name] = len(self._names)
+            self._names.append(name)
+            self._rank = None  # Tinh lai thu tu alphabet khi search lan sau
+        return self._ids[name]
+
+    def _set_rows(self, label, count):
+        if count:
+            self._rows[label] = count
+        else:
+            self._rows.pop(label, None)
+
+    def _keep_mask(self, names):
+        ids = [self._ids[name] for name in names if name in self._ids]
+        return ~np.isin(self._labels[:self._count], ids)
+
+    def add(self, name, vectors):
+        """Them (hoac thay the) toan bo vector cua 1 nhan vien"""
+        self.add_many({name: vectors})
+
+    def add_many(self, people):
+        """Them/thay the nhieu nhan vien ({ten: vectors}) voi 1 lan cap phat (nap cache, dong bo)"""
+        encoded = [(name,) + self._encode(vectors) for name, vectors in people.items()]
+        total = sum(len(codes) for _, codes, _ in encoded)
+        with self._lock:
+            keep = self._keep_mask(people)
+            needed = int(keep.sum()) + total
+            if keep.all():
+                keep = None  # Chi them nguoi moi: khong can loc
+            if keep is None and needed <= len(self._matrix):
+                # Ghi vao phan trong phia sau, snapshot dang search chi doc [:count] cu
+                for name, codes, sc in encoded:
+                    n = self._count
+                    self._matrix[n:n + len(codes)] = codes
+                    self._labels[n:n + len(codes)] = self._label_id(name)
+                    self._scales[n:n + len(codes)] = sc
+                    self._count = n + len(codes)
+                    self._set_rows(self._ids[name], len(codes))
+                return
+            capacity = len(self._matrix) if needed <= len(self._matrix) else max(needed, 2 * len(self._matrix))
+            self._rebuild(keep, capacity, [(self._label_id(name), codes, sc) for name, codes, sc in encoded])
+            for name, codes, _ in encoded:
+                self._set_rows(self._ids[name], len(codes))
+
+    def remove(self, name):
+        """Xoa 1 nhan vien khoi gallery, tra ve so vector da xoa"""
+        with self._lock:
+            if name not in self._ids or self._count == 0:
+                return 0
+            keep = self._keep_mask([name])
+            removed = self._count - int(keep.sum())
+            if removed:
+                self._rebuild(keep, len(self._matrix), [])
+                self._rows.pop(self._ids[name], None)
+            return removed
+
+    def clear(self):
+        with self._lock:
+            self._count = 0
+            self._rows.clear()
+
+    def _snapshot(self):
+        with self._lock:
+            if self._rank is None:
+                order = np.argsort(np.array(self._names, dtype=object), kind="stable")
+                self._rank = np.empty(len(self._names), dtype=np.int32)
+                self._rank[order] = np.arange(len(self._names), dtype=np.int32)
+            n = self._count
+            return self._matrix[:n], self._labels[:n], self._scales[:n], list(self._names), self._rank, len(self._rows)
+
+    def _similarities(self, q, matrix, scales):
+        # Vector da chuan hoa: ||q - g||^2 = 2 - 2 q.g -> chi can 1 phep nhan ma tran cho ca lo
+        if matrix.dtype == np.float32:
+            return q @ matrix.T
+        # Dang nen: giai nen tung khoi de bo nho tam khong vuot SEARCH_CHUNK dong
+        sims = np.empty((len(q), len(matrix)), dtype=np.float32)
+        for start in range(0, len(matrix), SEARCH_CHUNK):
+            block = matrix[start:start + SEARCH_CHUNK].astype(np.float32)
+            sims[:, start:start + len(block)] = q @ block.T
+        if matrix.dtype == np.int8:
+            sims *= scales
+        return sims
+
+    def search(self, queries, k=None):
+        """Top-k cho ca lo query -> (distances BxK, label ids BxK, danh sach ten)"""
+        return self._search(queries, k)[:3]
+
+    def _search(self, queries, k):
+        matrix, labels, scales, names, rank, people = self._snapshot()
+        q = l2_normalize(queries)
+        if len(matrix) == 0 or len(q) == 0:
+            return np.empty((len(q), 0), np.float32), np.empty((len(q), 0), np.int32), names, rank
+        if k is None:
+            k = min(self.neighbors, people)
+        k = max(1, min(k, len(matrix)))
+
+        sims = self._similarities(q, matrix, scales)
+        if k < sims.shape[1]:
+            idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            idx = np.broadcast_to(np.arange(sims.shape[1]), (len(q), sims.shape[1]))
+        top = np.take_along_axis(sims, idx, axis=1)
+        dists = np.sqrt(np.clip(2.0 - 2.0 * top, 0.0, None))
+        return dists, labels[idx], names, rank
+
+    def match(self, queries, k=None):
+        """Ten (bau chon da so trong k lang gieng) va khoang cach trung binh cho moi query"""
+        dists, lab, names, rank = self._search(queries, k)
+        if lab.shape[1] == 0:
+            return [None] * len(dists), np.full(len(dists), np.inf, dtype=np.float32)
+
+        # Dem phieu trong k lang gieng; hoa phieu -> ten dung truoc theo alphabet (giong sklearn + LabelEncoder)
+        votes = (lab[:, :, None] == lab[:, None, :]).sum(axis=2)
+        score = votes * (len(rank) + 1) - rank[lab]
+        best = lab[np.arange(len(lab)), score.argmax(axis=1)]
+        return [names[i] for i in best], dists.mean(axis=1)
@@ -0,0 +1,279 @@
+"""Cache gallery tren dia (file vector memory-map + manifest) va dong bo tang dan tu MongoDB tren luong nen.
+
+Khoi dong: nap cache trong vai ms (khong can mang) -> shop van nhan ra nhan vien khi Atlas mat ket noi.
+Dong bo: chi doc (name, version) cua moi document, roi chi tai embedding cua nhan vien co version thay doi.
+"""
+import datetime
+import io
+import json
+import os
+import threading
+import time
+import numpy as np
+
+from edge_ai.gallery import EMBEDDING_DIM
+from edge_ai.localdb import LocalCollection, open_local
+
+GALLERY_CACHE_DIR = os.getenv("GALLERY_CACHE_DIR", "gallery_cache")
+GALLERY_SYNC_SEC = float(os.getenv("GALLERY_SYNC_SEC", "30"))
+GALLERY_CACHE_COMPACT = float(os.getenv("GALLERY_CACHE_COMPACT", "0.5"))  # Ty le dong "chet" toi da truoc khi ghi lai
+MANIFEST = "manifest.json"
+ROW_BYTES = EMBEDDING_DIM * 4
+
+
+class GalleryCache:
+    """manifest.json: {generation, rows, synced_at, people: {ten: {version, updated_at, offset, count}}}
+    embeddings-<generation>.f32: vector float32 x512 noi tiep nhau (khong header), chi ghi them vao cuoi.
+
+    Them/sua 1 nguoi chi ghi them dong cua nguoi do roi doi manifest (dong cu thanh "chet"); xoa chi doi manifest.
+    Khi dong chet vuot GALLERY_CACHE_COMPACT thi ghi lai toan bo sang generation moi.
+    """
+    def __init__(self, cache_dir=GALLERY_CACHE_DIR, compact_ratio=GALLERY_CACHE_COMPACT):
+        self.cache_dir = cache_dir
+        self.compact_ratio = compact_ratio
+        self.manifest = {"generation": 0, "rows": 0, "synced_at": None, "people": {}}
+        self.appends = 0
+        self.rewrites = 0
+
+    def _data_path(self, generation):
+        return os.path.join(self.cache_dir, f"embeddings-{generation}.f32")
+
+    def load(self):
+        """Tra ve {ten: mang embedding (view memory-map)}; cache hong/khong co -> {}"""
+        path = os.path.join(self.cache_dir, MANIFEST)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            rows = manifest["rows"]
+            data_path = self._data_path(manifest["generation"])
+            if os.path.getsize(data_path) < rows * ROW_BYTES:
+                raise ValueError(f"{data_path} shorter than {rows} rows")
+            data = (np.memmap(data_path, dtype=np.float32, mode="r", shape=(rows, EMBEDDING_DIM)) if rows
+                    else np.empty((0, EMBEDDING_DIM), dtype=np.float32))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARNING] Gallery cache unreadable, ignoring: {e}")
+            return {}
+        self.manifest = manifest
+        return {name: data[meta["offset"]:meta["offset"] + meta["count"]]
+                for name, meta in manifest["people"].items()}
+
+    def save(self, people, meta, synced_at, changed=None):
+        """people: {ten: embeddings}, meta: {ten: (version, updated_at)}.
+
+        changed: ten co vector moi (None = khong biet -> ghi lai toan bo). Nguoi khong con trong people bi bo khoi
+        manifest. Ghi du lieu truoc, doi manifest sau: mat dien giua chung van con manifest cu hop le.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        old = self.manifest
+        path = self._data_path(old["generation"])
+        if changed is not None and old["generation"] and os.path.exists(path):
+            changed = [n for n in changed if n in people]
+            rows = old["rows"] + sum(len(people[n]) for n in changed)
+            live = sum(len(v) for v in people.values())
+            if rows - live <= self.compact_ratio * rows:
+                self._append(people, meta, synced_at, changed)
+                return
+
+        generation = old["generation"] + 1
+        entries, offset = {}, 0
+        names = sorted(people)
+        for name in names:
+            count = len(people[name])
+            version, updated_at = meta.get(name, (0, None))
+            entries[name] = {"version": version, "updated_at": updated_at, "offset": offset, "count": count}
+            offset += count
+        with open(self._data_path(generation), "wb") as f:
+            for name in names:
+                f.write(np.ascontiguousarray(people[name], dtype=np.float32).tobytes())
+        self._write_manifest({"generation": generation, "rows": offset, "synced_at": synced_at, "people": entries})
+        self.rewrites += 1
+        # File cu co the van dang duoc memory-map (Windows khong cho xoa) -> bo qua
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _append(self, people, meta, synced_at, changed):
+        old = self.manifest
+        entries = {name: e for name, e in old["people"].items() if name in people}
+        offset = old["rows"]
+        with open(self._data_path(old["generation"]), "r+b") as f:
+            # Ghi de phan duoi thua (lan ghi truoc bi ngat giua chung) - manifest chi tro toi [:rows]
+            f.seek(offset * ROW_BYTES)
+            for name in changed:
+                data = np.ascontiguousarray(people[name], dtype=np.float32)
+                f.write(data.tobytes())
+                version, updated_at = meta.get(name, (0, None))
+                entries[name] = {"version": version, "updated_at": updated_at, "offset": offset, "count": len(data)}
+                offset += len(data)
+            f.truncate()
+        for name in people:
+            if name in entries and name not in changed:
+                version, updated_at = meta.get(name, (0, None))
+                entries[name].update(version=version, updated_at=updated_at)
+        self._write_manifest({"generation": old["generation"], "rows": offset, "synced_at": synced_at,
+                              "people": entries})
+        self.appends += 1
+
+    def _write_manifest(self, manifest):
+        tmp = os.path.join(self.cache_dir, MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(self.cache_dir, MANIFEST))
+        self.manifest = manifest
+
+
+def _iso(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def open_collection(mongo_uri):
+    """Collection face_recognition.embeddings; MONGO_URI=local[:file] -> collection gia lap"""
+    if mongo_uri.startswith("local"):
+        return open_local(mongo_uri)
+    from pymongo import MongoClient
+    client = MongoClient(mongo_uri, serverSelectionTimeoutMS=2000)
+    return client['face_recognition']['embeddings']
+
+
+def store_embeddings(collection, name, embs):
+    """Upsert embedding 1 nhan vien, tang version de cac may edge khac chi tai lai nguoi nay -> document moi"""
+    buf = io.BytesIO()
+    np.save(buf, np.asarray(embs, dtype=np.float32))
+    blob = buf.getvalue()
+    if not isinstance(collection, LocalCollection):
+        from bson.binary import Binary
+        blob = Binary(blob)
+    return collection.find_one_and_update(
+        {'name': name},
+        {'$set': {'embeddings': blob, 'updated_at': datetime.datetime.now(datetime.timezone.utc)},
+         '$inc': {'version': 1}},
+        upsert=True, projection={'version': 1, 'updated_at': 1}, return_document=True)
+
+
+class GallerySync:
+    """Giu gallery + cache khop voi collection embeddings; chay dinh ky tren 1 luong nen"""
+    def __init__(self, gallery, cache, get_collection, interval=GALLERY_SYNC_SEC, on_change=None):
+        self.gallery = gallery
+        self.cache = cache
+        self.get_collection = get_collection  # Collection co the chua san sang luc khoi dong
+        self.interval = interval
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._people = {}   # ten -> embeddings (ban dang dung)
+        self._meta = {}     # ten -> (version, updated_at)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        # Thong ke
+        self.last_sync = None
+        self.last_error = None
+        self.syncs = 0
+        self.fetched = 0
+
+    def load_cache(self):
+        """Nap gallery tu cache tren dia (goi truoc khi ket noi DB)"""
+        people = self.cache.load()
+        staff = {name: embs for name, embs in people.items() if len(embs)}  # Bo document rong (0 dong)
+        self.gallery.add_many(staff)
+        for name in people:
+            entry = self.cache.manifest["people"][name]
+            self._meta[name] = (entry["version"], entry["updated_at"])
+        self._people = dict(people)
+        synced_at = self.cache.manifest.get("synced_at")
+        self.last_sync = synced_at
+        return len(staff)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="gallery-sync", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def request(self):
+        """Dong bo ngay (vd sau khi sua DB tu may khac)"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[WARNING] Gallery sync failed (using cached gallery): {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def sync(self):
+        """1 vong dong bo: so version, tai embedding cua nguoi thay doi, xoa nguoi khong con. Tra ve so thay doi"""
+        collection = self.get_collection()
+        if collection is None:
+            raise RuntimeError("MongoDB not connected")
+        remote = {d["name"]: (d.get("version", 0), _iso(d.get("updated_at")))
+                  for d in collection.find({}, {"name": 1, "version": 1, "updated_at": 1}) if "name" in d}
+        with self._lock:
+            changed = [n for n, (v, _) in remote.items() if n not in self._people or self._meta[n][0] != v]
+            removed = [n for n in self._people if n not in remote]
+
+        updates = {}
+        if changed:
+            for doc in collection.find({"name": {"$in": changed}}):
+                try:
+                    embs = np.load(io.BytesIO(doc["embeddings"])).astype(np.float32).reshape(-1, EMBEDDING_DIM)
+                except (KeyError, ValueError, OSError, TypeError, EOFError) as e:
+                    print(f"[WARNING] Invalid embeddings for {doc['name']!r} (version {doc.get('version', 0)}): {e}")
+                    embs = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+                # Rong/hong van ghi version (0 dong) -> lan sync sau khong tai lai cho den khi document doi
+                updates[doc["name"]] = (embs, (doc.get("version", 0), _iso(doc.get("updated_at"))))
+            self.fetched += len(updates)
+
+        with self._lock:
+            for name, (embs, meta) in updates.items():
+                self._people[name], self._meta[name] = embs, meta
+            self.gallery.add_many({name: embs for name, (embs, _) in updates.items()})
+            for name in removed:
+                self._people.pop(name, None)
+                self._meta.pop(name, None)
+                self.gallery.remove(name)
+            now = time.time()
+            if updates or removed or self.last_sync is None:
+                # Lan dau (cache rong/hong) ghi lai toan bo, sau do chi ghi them nguoi thay doi
+                self.cache.save(self._people, self._meta, now,
+                                changed=None if self.last_sync is None else list(updates))
+            self.last_sync = now
+            self.last_error = None
+            self.syncs += 1
+        if updates or removed:
+            print(f"[INFO] Gallery sync: {len(updates)} updated, {len(removed)} removed")
+            if self.on_change:
+                self.on_change()
+        return len(updates) + len(removed)
+
+    def upsert_local(self, name, embs, version, updated_at):
+        """Ghi ngay vao cache sau khi dang ky tren may nay (lan sync sau khong tai lai)"""
+        with self._lock:
+            self._people[name] = np.asarray(embs, dtype=np.float32)
+            self._meta[name] = (version, _iso(updated_at))
+            self.cache.save(self._people, self._meta, self.last_sync, changed=[name])
+
+    def remove_local(self, name):
+        with self._lock:
+            if self._people.pop(name, None) is not None:
+                self._meta.pop(name, None)
+                self.cache.save(self._people, self._meta, self.last_sync, changed=[])
+
+    def stats(self):
+        return {
+            "staff": sum(1 for embs in self._people.values() if len(embs)),
+            "vectors": len(self.gallery),
+            "bytes": self.gallery.nbytes,
+            "sync_lag_s": round(time.time() - self.last_sync, 1) if self.last_sync else None,
+            "syncs": self.syncs,
+            "fetched": self.fetched,
+            "error": self.last_error,
+        }
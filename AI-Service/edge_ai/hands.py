@@ -0,0 +1,121 @@
+"""Phat hien ban tay (MediaPipe Hands) va kiem tra va cham voi vung cam"""
+import os
+import time
+import cv2
+import numpy as np
+
+HAND_ROI_PAD = int(os.getenv("HAND_ROI_PAD", "80"))        # Mo rong vung cam (pixel): ban tay vuon tu ngoai vao
+HAND_IDLE_EVERY = int(os.getenv("HAND_IDLE_EVERY", "10"))  # Khong ai gan tu: chi chay 1 lan moi N frame
+FINGERTIP = 8  # Dau ngon tro
+NO_HANDS = np.empty((0, 21, 2), dtype=np.float32)
+
+# --- SAFE IMPORT MEDIAPIPE ---
+HAS_MEDIAPIPE = False
+try:
+    import mediapipe as mp
+    try:
+        mp_hands = mp.solutions.hands
+        mp_drawing = mp.solutions.drawing_utils
+        HAS_MEDIAPIPE = True
+    except AttributeError:
+        # Fallback for some versions
+        from mediapipe.python.solutions import hands as mp_hands
+        from mediapipe.python.solutions import drawing_utils as mp_drawing
+        HAS_MEDIAPIPE = True
+except Exception as e:
+    print(f"[WARNING] MediaPipe Hand Tracking disabled: {e}")
+    HAS_MEDIAPIPE = False
+
+
+class HandDetector:
+    """Module phat hien ban tay va xu ly va cham voi vung cam"""
+    def __init__(self):
+        self.mp_hands = None
+        self.mp_draw = None
+        self.hands = None
+        
+        if HAS_MEDIAPIPE:
+            self.mp_hands = mp_hands
+            self.mp_draw = mp_drawing
+            self.hands = self.mp_hands.Hands(
+                static_image_mode=False,
+                max_num_hands=2,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+        else:
+            print("[INFO] Hand Detector is OFF (Lib missing)")
+
+    def find_hands(self, img):
+        if not self.hands: return None
+        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        self.results = self.hands.process(img_rgb)
+        return self.results.multi_hand_landmarks
+
+    def find_hands_roi(self, img, roi):
+        """Chay MediaPipe chi tren vung roi (x1, y1, x2, y2) -> diem moc (so tay, 21, 2) theo pixel cua frame"""
+        x1, y1, x2, y2 = roi
+        crop = img[y1:y2, x1:x2]
+        if not self.hands or crop.size == 0:
+            return NO_HANDS
+        results = self.hands.process(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+        if not results.multi_hand_landmarks:
+            return NO_HANDS
+        points = np.array([[(lm.x, lm.y) for lm in hand.landmark] for hand in results.multi_hand_landmarks],
+                          dtype=np.float32)
+        # Toa do chuan hoa trong crop -> pixel trong frame
+        points *= (x2 - x1, y2 - y1)
+        points += (x1, y1)
+        return points
+
+    def draw(self, img, points):
+        for hand in points.astype(np.int32):
+            if self.mp_hands:
+                for a, b in self.mp_hands.HAND_CONNECTIONS:
+                    cv2.line(img, tuple(hand[a]), tuple(hand[b]), (255, 255, 255), 1)
+            cv2.circle(img, tuple(hand[FINGERTIP]), 10, (255, 0, 255), cv2.FILLED)
+
+
+class FenceHandTracker:
+    """Chay HandDetector tren crop bao cac vung bao ve (da mo rong), khong phai ca frame.
+    Co nguoi gan tu hoac vua thay tay: moi frame; khong ai: 1 lan moi idle_every frame.
+    """
+    def __init__(self, detector, zones, pad=HAND_ROI_PAD, idle_every=HAND_IDLE_EVERY):
+        self.detector = detector
+        self.zones = zones
+        self.pad = pad
+        self.idle_every = max(1, idle_every)
+        self.points = NO_HANDS
+        self._since_run = self.idle_every
+        # Thong ke
+        self.frames = 0
+        self.runs = 0
+        self.active_runs = 0
+        self.ms = 0.0   # Thoi gian 1 lan chay MediaPipe (EMA)
+
+    def roi(self, frame_shape):
+        return self.zones.roi(frame_shape, self.pad)
+
+    def update(self, frame, someone_near):
+        """Diem moc ban tay cho frame nay (frame bo qua o che do nghi: dung lai ket qua lan truoc)"""
+        self.frames += 1
+        self._since_run += 1
+        active = someone_near or len(self.points) > 0
+        if not active and self._since_run < self.idle_every:
+            return self.points
+        t0 = time.perf_counter()
+        self.points = self.detector.find_hands_roi(frame, self.roi(frame.shape))
+        elapsed = (time.perf_counter() - t0) * 1000
+        self.ms = elapsed if self.runs == 0 else 0.9 * self.ms + 0.1 * elapsed
+        self._since_run = 0
+        self.runs += 1
+        self.active_runs += active
+        return self.points
+
+    def zone_hits(self, points):
+        """(Z,) bool: vung nao co dau ngon tro nam trong"""
+        return self.zones.hit_points(points[:, FINGERTIP]).any(axis=0)
+
+    def stats(self):
+        return {"ms": round(self.ms, 2), "runs": self.runs, "active_runs": self.active_runs,
+                "skipped": self.frames - self.runs}
@@ -0,0 +1,106 @@
+"""Collection gia lap thay MongoDB (MONGO_URI=local hoac local:<file>), de chay / do dong bo gallery khong can Atlas.
+
+Chi ho tro dung phan API pymongo ma Edge AI dung: find, find_one_and_update, replace_one, delete_one.
+"""
+import copy
+import os
+import pickle
+import threading
+
+
+def _matches(doc, query):
+    for key, cond in (query or {}).items():
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            for op, arg in cond.items():
+                if op == "$in" and value not in arg:
+                    return False
+                if op == "$gt" and (value is None or not value > arg):
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+def _project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    return {k: copy.deepcopy(v) for k, v in doc.items() if k == "_id" or projection.get(k)}
+
+
+class LocalCollection:
+    """Luu document trong RAM (co the ghi ra file pickle de giu qua cac lan chay)"""
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._docs = {}
+        self._next_id = 1
+        self.reads = 0  # So document da tra ve (do luong du lieu keo ve khi dong bo)
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                self._docs, self._next_id = pickle.load(f)
+
+    def _persist(self):
+        if self.path:
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump((self._docs, self._next_id), f)
+            os.replace(tmp, self.path)
+
+    def find(self, query=None, projection=None):
+        with self._lock:
+            docs = [_project(d, projection) for d in self._docs.values() if _matches(d, query)]
+        self.reads += len(docs)
+        return docs
+
+    def find_one(self, query=None, projection=None):
+        docs = self.find(query, projection)
+        return docs[0] if docs else None
+
+    def _upsert(self, query, doc):
+        for _id, existing in self._docs.items():
+            if _matches(existing, query):
+                return _id, existing
+        _id = self._next_id
+        self._next_id += 1
+        doc = {k: v for k, v in query.items() if not isinstance(v, dict)}
+        doc["_id"] = _id
+        self._docs[_id] = doc
+        return _id, doc
+
+    def replace_one(self, query, replacement, upsert=False):
+        with self._lock:
+            match = next((i for i, d in self._docs.items() if _matches(d, query)), None)
+            if match is None and not upsert:
+                return
+            if match is None:
+                match, _ = self._upsert(query, {})
+            self._docs[match] = dict(replacement, _id=match)
+            self._persist()
+
+    def find_one_and_update(self, query, update, upsert=False, projection=None, return_document=True):
+        """Ho tro $set va $inc, luon tra ve document SAU khi cap nhat"""
+        with self._lock:
+            match = next((d for d in self._docs.values() if _matches(d, query)), None)
+            if match is None:
+                if not upsert:
+                    return None
+                _, match = self._upsert(query, {})
+            match.update(copy.deepcopy(update.get("$set", {})))
+            for key, step in update.get("$inc", {}).items():
+                match[key] = match.get(key, 0) + step
+            self._persist()
+            return _project(match, projection)
+
+    def delete_one(self, query):
+        with self._lock:
+            match = next((i for i, d in self._docs.items() if _matches(d, query)), None)
+            if match is not None:
+                del self._docs[match]
+                self._persist()
+
+
+def open_local(uri):
+    """'local' -> chi trong RAM, 'local:path.pkl' -> luu ra file"""
+    _, _, path = uri.partition(":")
+    return LocalCollection(path or None)
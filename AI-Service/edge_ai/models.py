@@ -0,0 +1,96 @@
+"""Nap model song song + cache artefact da bien dich tren dia de khoi dong nhanh sau khi mat dien.
+
+Sau su co mat dien, khoang thoi gian tu luc bat may den luc stream chay that
+la luc cua hang khong duoc bao ve -> cac model doc lap duoc nap dong thoi,
+FaceNet duoc luu duoi dang TorchScript/ONNX de lan sau khong phai dung lai tu dau,
+va ca YOLO lan FaceNet duoc chay thu (warm-up) truoc khi bao "san sang".
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from edge_ai.backends import MODEL_CACHE_DIR
+
+YOLO_WEIGHTS = os.getenv("YOLO_WEIGHTS", "yolov8n.pt")
+
+
+class StartupReport:
+    """Ghi lai thoi gian khoi dong cua tung thanh phan"""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.notes = {}
+        self.total = None
+
+    def record(self, name, seconds, note=""):
+        self.timings[name] = seconds
+        if note:
+            self.notes[name] = note
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+        return self
+
+    def summary(self):
+        lines = ["[STARTUP] Thoi gian khoi dong theo thanh phan:"]
+        for name, seconds in self.timings.items():
+            note = f" ({self.notes[name]})" if name in self.notes else ""
+            lines.append(f"[STARTUP]   {name:<10} {seconds:6.2f}s{note}")
+        if self.total is not None:
+            lines.append(f"[STARTUP]   {'TOTAL':<10} {self.total:6.2f}s (wall clock, song song)")
+        return "\n".join(lines)
+
+
+def timed(report, name, fn, *args, **kwargs):
+    """Chay fn va ghi thoi gian vao report; fn co the tra ve (ket qua, ghi chu)"""
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    note = ""
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], str):
+        result, note = result
+    report.record(name, time.perf_counter() - t0, note)
+    return result
+
+
+def load_parallel(tasks, report, max_workers=4):
+    """Nap nhieu thanh phan doc lap cung luc. tasks: {ten: callable} -> {ten: ket qua}"""
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="loader") as pool:
+        futures = {name: pool.submit(timed, report, name, fn) for name, fn in tasks.items()}
+        return {name: f.result() for name, f in futures.items()}
+
+
+def select_device():
+    import torch
+    return torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+
+def load_yolo():
+    from ultralytics import YOLO
+    return YOLO(YOLO_WEIGHTS)
+
+
+def load_facenet(device, backend=None):
+    """Backend FaceNet theo EMBED_BACKEND (tu export artefact vao cache o lan dau) -> (backend, ghi chu)"""
+    from edge_ai.backends import load_backend, EMBED_BACKEND
+    return load_backend(backend or EMBED_BACKEND, device, MODEL_CACHE_DIR)
+
+
+def load_mtcnn(device):
+    try:
+        from facenet_pytorch import MTCNN
+    except ImportError:
+        print("[WARNING] MTCNN not available. Using YOLOv8 for registration (lower quality).")
+        return None
+    return MTCNN(image_size=160, margin=20, device=device)
+
+
+def warm_up(detector=None, embedder=None, frame_shape=(600, 800, 3), imgsz=None):
+    """Chay thu 1 lan de cap phat bo nho / fuse layer truoc khi stream chay that (dung imgsz cua engine)"""
+    from edge_ai.cascade import detect_people, DETECT_IMGSZ
+    dummy = np.zeros(frame_shape, dtype=np.uint8)
+    if detector is not None:
+        detect_people(detector, dummy, DETECT_IMGSZ if imgsz is None else imgsz)
+    if embedder is not None:
+        embedder.embed([dummy[:160, :160]])
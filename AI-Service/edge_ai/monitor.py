@@ -0,0 +1,235 @@
+"""Loi giam sat khong phu thuoc tkinter: nap model, gallery nhan vien, nhan dien va gui canh bao.
+
+Cac thu vien nang (torch, ultralytics, facenet, pymongo) chi duoc import khi can,
+de che do headless tren may edge khong phai nap tkinter/mediapipe.
+"""
+import numpy as np
+
+from edge_ai.alerts import AlertDispatcher
+from edge_ai.cascade import FaceLocator, FACE_CASCADE, DETECT_IMGSZ
+from edge_ai.config import RESET_ALARM_URL, MONGO_URI
+from edge_ai.engine import MonitoringEngine
+from edge_ai.evidence import EvidenceBuffer, EvidenceRecorder, EVIDENCE_ENABLED
+from edge_ai.gallery import GalleryIndex, MATCH_THRESHOLD
+from edge_ai.gallery_cache import GalleryCache, GallerySync, open_collection, store_embeddings
+from edge_ai.models import StartupReport, load_parallel, timed, select_device, load_yolo, load_facenet, load_mtcnn, warm_up
+from edge_ai.multiproc import ProcessEngine, load_hands, MP_TOPOLOGY
+from edge_ai.tracker import IdentityTracker
+from edge_ai.zones import ZoneMap, ZONES_FILE
+
+
+class SecurityMonitor:
+    """Tat ca logic nhan dien + an ninh; Tk app va CLI headless deu dieu khien class nay"""
+    def __init__(self, mongo_uri=MONGO_URI, with_mtcnn=False, with_hands=False):
+        self.mongo_uri = mongo_uri
+        self.gallery = GalleryIndex()
+        self.tracker = IdentityTracker()
+        # Danh tinh da cache theo track co the khong con dung voi gallery moi
+        self.gallery_sync = GallerySync(self.gallery, GalleryCache(), lambda: self.collection,
+                                        on_change=self._gallery_changed)
+        self.engine = None
+        self.collection = None
+        # 1 luong nen + connection pool + hang doi tren dia cho moi request len backend
+        self.alerts = AlertDispatcher().start()
+        # Ring buffer frame truoc su kien + luong ghi anh/clip bang chung cho canh bao DANGER
+        self.evidence = EvidenceRecorder(EvidenceBuffer()).start() if EVIDENCE_ENABLED else None
+
+        self.startup = StartupReport()
+        self.load_models(with_mtcnn, with_hands)
+        print(self.startup.summary())
+
+    # --- KHOI TAO ---
+    def load_models(self, with_mtcnn=False, with_hands=False):
+        """Nap dong thoi YOLO, FaceNet, MTCNN, MediaPipe Hands va gallery nhan vien, roi warm-up"""
+        from edge_ai.embedding import FaceEmbedder, RECOG_MAX_BATCH
+
+        report = self.startup
+        self.device = timed(report, "torch", select_device)
+        tasks = {
+            "yolo": load_yolo,
+            "facenet": lambda: load_facenet(self.device),
+            "gallery": self._load_gallery,
+        }
+        # MTCNN for high-quality registration + tim mat trong crop nguoi (cascade nguoi -> mat)
+        if with_mtcnn or FACE_CASCADE:
+            tasks["mtcnn"] = lambda: load_mtcnn(self.device)
+        if with_hands:
+            tasks["hands"] = self._load_hands
+        print(f"[INFO] Loading in parallel: {', '.join(tasks)}...")
+        results = load_parallel(tasks, report)
+
+        self.detector = results["yolo"]
+        self.embed_backend = results["facenet"]
+        self.mtcnn = results.get("mtcnn")
+        self.hand_detector = results.get("hands")
+        # Khong co MTCNN -> FaceNet tren ca crop nguoi nhu truoc
+        self.face_locator = FaceLocator(self.mtcnn) if FACE_CASCADE and self.mtcnn else None
+        # Gom tat ca khuon mat trong 1 frame vao 1 lan forward
+        self.embedder = FaceEmbedder(self.embed_backend, max_batch=RECOG_MAX_BATCH)
+
+        # Chay thu truoc khi bao stream san sang (lan infer dau tien luon cham)
+        timed(report, "warmup", warm_up, self.detector, self.embedder)
+        report.finish()
+
+    def _load_gallery(self):
+        # Cache tren dia truoc (khong phu thuoc mang), MongoDB dong bo sau tren luong nen
+        cached = self.gallery_sync.load_cache()
+        self.setup_mongodb()
+        self.gallery_sync.start()
+        return None, f"{cached} staff from cache"
+
+    def _load_hands(self):
+        from edge_ai.hands import HandDetector
+        return HandDetector()
+
+    def setup_mongodb(self):
+        try:
+            # MONGO_URI=local[:file]: collection gia lap (chay thu / do dong bo khong can Atlas)
+            self.collection = open_collection(self.mongo_uri)
+            print(f"[INFO] Connected to MongoDB{' (local stand-in)' if self.mongo_uri.startswith('local') else ''}.")
+        except Exception as e:
+            print(f"[WARNING] MongoDB unavailable, using cached gallery: {e}")
+
+    def load_known_faces(self):
+        """Dong bo ngay voi MongoDB (chi tai nhan vien co version thay doi)"""
+        try:
+            self.gallery_sync.sync()
+            print(f"[INFO] Loaded {len(self.gallery.people)} users from DB.")
+        except Exception as e:
+            print(f"[WARNING] Gallery sync failed: {e}")
+
+    def gallery_stats(self):
+        return self.gallery_sync.stats()
+
+    # --- NHAN DIEN ---
+    def match_embeddings(self, embs):
+        """So khop ca lo embedding voi gallery (1 phep nhan ma tran + top-k) -> (names, mean_dists)"""
+        if len(self.gallery) == 0:
+            return ["Stranger"] * len(embs), [float("inf")] * len(embs)
+        
+        # Tìm khoảng cách ngắn nhất cho tất cả khuôn mặt cùng lúc
+        names, mean_dists = self.gallery.match(embs)
+        
+        results = []
+        for name, mean_dist in zip(names, mean_dists):
+            # Debug log khoảng cách (Giúp tinh chỉnh ngưỡng)
+            if mean_dist < 1.0: # Chỉ log khi có vẻ giống
+                print(f"[RECOG] Name: {name} | Dist: {mean_dist:.3f}")
+
+            # Ngưỡng nhận diện (0.8 là mức tương đối an toàn cho Euclidean)
+            results.append(name if mean_dist < MATCH_THRESHOLD else "Stranger")
+        return results, mean_dists.tolist()
+
+    def recognize_faces(self, face_crops):
+        """Nhan dien ca lo khuon mat: 1 lan forward FaceNet + 1 lan so khop -> (names, mean_dists)"""
+        if not face_crops:
+            return [], []
+        try:
+            return self.match_embeddings(self.embedder.embed(face_crops))
+        except Exception as e:
+            # print(f"Error in recognition: {e}")
+            return ["Processing..."] * len(face_crops), [float("inf")] * len(face_crops)
+
+    def get_embedding_only(self, face_img):
+        # Ham phu de lay vector luc register (giong logic tren)
+        return self.embedder.embed_one(face_img)
+
+    def start_enrollment(self, name):
+        """Phien dang ky: embed crop tren luong nen ngay khi chup"""
+        from edge_ai.enrollment import EnrollmentSession
+        return EnrollmentSession(self.embedder, name)
+
+    def save_person(self, name, embs):
+        """Luu embedding nhan vien vao MongoDB va them ngay vao gallery dang chay"""
+        doc = store_embeddings(self.collection, name, embs)
+        self.gallery.add(name, np.asarray(embs))
+        self.gallery_sync.upsert_local(name, embs, doc['version'], doc['updated_at'])
+        self._gallery_changed()
+
+    def staff_names(self):
+        return sorted(doc['name'] for doc in self.collection.find({}, {'name': 1}) if 'name' in doc)
+
+    def delete_person(self, name):
+        self.collection.delete_one({'name': name})
+        self.gallery.remove(name)
+        self.gallery_sync.remove_local(name)
+        self._gallery_changed()
+
+    def add_person(self, name, embs):
+        """Chi them nguoi moi vao gallery, khong nap lai toan bo tu DB"""
+        self.gallery.add(name, np.asarray(embs))
+        self.tracker.reset_identities()
+
+    def remove_person(self, name):
+        self.gallery.remove(name)
+        self.tracker.reset_identities()
+
+    def _gallery_changed(self):
+        # Goi sau khi cache tren dia da ghi: danh tinh theo track bi xoa 1 lan (engine dung chung tracker),
+        # process nhan dien rieng (neu co) nap lai tu cache
+        if self.engine:
+            self.engine.gallery_changed()
+        else:
+            self.tracker.reset_identities()
+
+    # --- CANH BAO ---
+    def process_alert(self, type, title, message):
+        # Engine chi goi khi vao ALARM nen khong can debounce theo thoi gian nua
+        print(f"[ALERT] Sending to backend: {type} - {title}")
+        if type != "DANGER" or self.evidence is None:
+            self.alerts.send_alert(type, title, message)
+            return
+        # Anh bang chung ma hoa + tai len o luong nen, canh bao gui kem imageUrl khi xong (khong chan engine)
+        def send(url, clip_url):
+            text = f"{message} | Clip: {clip_url}" if clip_url else message
+            self.alerts.send_alert(type, title, text, image_url=url)
+        self.evidence.capture(send)
+
+    def reset_alarm(self):
+        """Tắt còi báo động bằng cách gọi API reset (True neu backend xac nhan)"""
+        response = self.alerts.post_now(RESET_ALARM_URL)
+        ok = response.status_code == 200
+        if ok and self.engine:
+            # Dong bo may trang thai tai bien de khong gui reset lan nua
+            self.engine.acknowledge_alarm()
+        return ok
+
+    def auto_reset_alarm(self):
+        # ALARM -> RESOLVED (thấy nhân viên / hết xâm nhập) -> gọi API tắt còi, moi lan chuyen trang thai 1 request
+        self.alerts.reset_alarm()
+
+    # --- DIEU KHIEN PIPELINE ---
+    def start(self, source=0, render=True, zones_file=ZONES_FILE, imgsz=DETECT_IMGSZ, processes=MP_TOPOLOGY):
+        if self.engine and self.engine.is_running:
+            return self.engine
+        # File vung cho camera nay; khong co -> 1 vung chu nhat FENCE_BOX mac dinh
+        zones = ZoneMap.load(zones_file) if zones_file else None
+        self.tracker = IdentityTracker()
+        options = dict(tracker=self.tracker, source=source, render=render, hands=self.hand_detector, zones=zones,
+                       evidence=self.evidence.buffer if self.evidence else None,
+                       faces=self.face_locator, imgsz=imgsz,
+                       on_alert=self.process_alert, on_resolved=self.auto_reset_alarm)
+        if processes:
+            # Capture / YOLO (/ FaceNet) tren process rieng, frame qua shared memory (xem edge_ai.multiproc)
+            self.engine = ProcessEngine(load_yolo, self.recognize_faces, topology=processes,
+                                        hands_factory=load_hands if self.hand_detector else None, **options)
+        else:
+            self.engine = MonitoringEngine(self.detector, self.recognize_faces, **options)
+        self.engine.start()
+        return self.engine
+
+    def stop(self):
+        if self.engine:
+            self.engine.stop()
+
+    def shutdown(self):
+        """Dung pipeline va luong gui canh bao (canh bao chua gui van nam trong spool)"""
+        self.stop()
+        if self.evidence:
+            self.evidence.stop()
+        self.alerts.stop()
+        self.gallery_sync.stop()
+
+    @property
+    def is_running(self):
+        return self.engine is not None and self.engine.is_running
@@ -0,0 +1,67 @@
+"""Cong chuyen dong (motion gate): bo qua YOLO khi frame khong thay doi (dem khuya, ngoai gio).
+
+Thoi gian phan ung toi da khi co xam nhap:
+  - Co chuyen dong (nguoi buoc vao khung hinh): detect chay ngay o frame tiep theo
+    -> tre them toi da 1 chu ky camera (~33 ms o 30 FPS) so voi khong co gate.
+  - Thay doi qua nho duoi nguong sensitivity: van bi bat o keyframe ke tiep
+    -> tre toi da MOTION_KEYFRAME_SEC (mac dinh 2 s).
+"""
+import os
+import time
+import cv2
+import numpy as np
+
+MOTION_GATE = os.getenv("MOTION_GATE", "0") == "1"  # Tat mac dinh: bat (=1) thi co the tre toi MOTION_KEYFRAME_SEC
+MOTION_WIDTH = int(os.getenv("MOTION_WIDTH", "160"))                   # Chieu rong anh thu nho de so sanh
+MOTION_PIXEL_DELTA = int(os.getenv("MOTION_PIXEL_DELTA", "25"))        # Muc chenh lech xam coi la "thay doi"
+MOTION_SENSITIVITY = float(os.getenv("MOTION_SENSITIVITY", "0.003"))   # Ty le pixel thay doi toi thieu
+MOTION_KEYFRAME_SEC = float(os.getenv("MOTION_KEYFRAME_SEC", "2.0"))   # Bat buoc detect it nhat moi N giay
+MOTION_BG_ALPHA = float(os.getenv("MOTION_BG_ALPHA", "0.2"))          # Toc do cap nhat nen (anh sang thay doi cham)
+
+
+class MotionGate:
+    """So sanh frame thu nho voi nen trung binh truot de quyet dinh co can chay YOLO khong"""
+    def __init__(self, width=MOTION_WIDTH, pixel_delta=MOTION_PIXEL_DELTA, sensitivity=MOTION_SENSITIVITY,
+                 keyframe_sec=MOTION_KEYFRAME_SEC, bg_alpha=MOTION_BG_ALPHA):
+        self.width = width
+        self.pixel_delta = pixel_delta
+        self.sensitivity = sensitivity
+        self.keyframe_sec = keyframe_sec
+        self.bg_alpha = bg_alpha
+        self._background = None
+        self._last_detect = 0.0
+        self.motion_ratio = 0.0
+        self.frames = 0
+        self.skipped = 0
+
+    def _small_gray(self, frame):
+        h, w = frame.shape[:2]
+        height = max(1, int(h * self.width / w))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def should_detect(self, frame, now=None):
+        """True neu co chuyen dong hoac da den han keyframe"""
+        now = time.monotonic() if now is None else now
+        gray = self._small_gray(frame)
+        self.frames += 1
+
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            self._last_detect = now
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        self.motion_ratio = np.count_nonzero(diff > self.pixel_delta) / diff.size
+        cv2.accumulateWeighted(gray, self._background, self.bg_alpha)
+
+        if self.motion_ratio >= self.sensitivity or now - self._last_detect >= self.keyframe_sec:
+            self._last_detect = now
+            return True
+        self.skipped += 1
+        return False
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.frames if self.frames else 0.0
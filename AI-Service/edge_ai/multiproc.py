@@ -0,0 +1,452 @@
+"""Che do da process: capture / detect / recognize chay tren process rieng, khong tranh GIL voi Tk, luong canh bao
+va phan hau xu ly Python cua process chinh.
+
+Pixel chi nam trong SharedFrameRing (multiprocessing.shared_memory, MP_SLOTS o co dinh): process ghi frame vao 1 o
+roi chi gui metadata nho (so o, seq, thoi diem chup, box, su kien, track) qua Queue. O duoc tra ve hang doi o trong
+khi frame bi bo o bat ky stage nao hoac da hien thi xong (packet.release() nhu FramePool).
+
+Topology (MP_TOPOLOGY / --processes): cac process cach nhau '|', cac stage chung 1 process noi bang '+':
+    capture|detect              recognize (gallery, tracker, canh bao) + ve o process chinh
+    capture+detect|recognize
+    capture|detect|recognize    process chinh chi ve + hien thi; gallery nap tu cache tren dia (GalleryCache)
+Moi process con tu nap model cua minh (spawn, khong fork process dang chay torch).
+"""
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+
+from edge_ai.cascade import FACE_CASCADE
+from edge_ai.engine import MonitoringEngine, open_camera
+from edge_ai.pipeline import FramePacket
+from edge_ai.tracker import Track
+
+STAGES = ("capture", "detect", "recognize")
+MP_TOPOLOGY = os.getenv("MP_TOPOLOGY", "")           # "" = 1 process, cac stage la luong (mac dinh)
+MP_SLOTS = int(os.getenv("MP_SLOTS", "8"))            # So o frame trong shared memory
+MP_MAX_FRAME = os.getenv("MP_MAX_FRAME", "1280x720")  # Kich thuoc frame lon nhat 1 o chua duoc
+MP_STATS_EVERY = 1.0                                  # Giay giua 2 lan process con gui thong ke
+MP_JOIN_TIMEOUT = 3.0
+
+
+def parse_topology(spec):
+    """'capture+detect|recognize' -> [('capture', 'detect'), ('recognize',)]"""
+    groups = [tuple(stage.strip() for stage in group.split("+")) for group in spec.split("|")]
+    flat = tuple(stage for group in groups for stage in group)
+    if flat not in (STAGES[:2], STAGES):
+        raise ValueError(f"Invalid topology {spec!r}: expected capture, detect[, recognize] in order, "
+                         "e.g. 'capture|detect|recognize'")
+    return groups
+
+
+def parse_frame_size(value):
+    w, h = (int(v) for v in value.lower().split("x"))
+    return w, h
+
+
+class SharedFrameRing:
+    """N o frame kich thuoc co dinh trong 1 khoi shared memory; chi so o (int) di qua process"""
+    def __init__(self, slots, slot_bytes, name=None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=slots * slot_bytes)
+        self._base = np.frombuffer(self.shm.buf, dtype=np.uint8)
+        self._addr = self._base.ctypes.data
+
+    @classmethod
+    def attach(cls, spec):
+        name, slots, slot_bytes = spec
+        return cls(slots, slot_bytes, name=name)
+
+    @property
+    def spec(self):
+        return self.shm.name, self.slots, self.slot_bytes
+
+    def view(self, slot, shape):
+        """Mang numpy tro thang vao o (khong copy)"""
+        size = int(np.prod(shape))
+        if size > self.slot_bytes:
+            raise ValueError(f"Frame {shape} does not fit a {self.slot_bytes}-byte slot (raise MP_MAX_FRAME)")
+        start = slot * self.slot_bytes
+        return self._base[start:start + size].reshape(shape)
+
+    def slot_of(self, frame):
+        return (frame.ctypes.data - self._addr) // self.slot_bytes
+
+    def close(self):
+        self._base = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # Con packet giu view: vung nho duoc giai phong khi process thoat
+        if self.owner:
+            self.shm.unlink()
+
+
+class SlotPool:
+    """Thay FramePool cho FramePacket: release(frame) tra so o ve hang doi o trong (dung duoc o moi process)"""
+    def __init__(self, ring, free):
+        self.ring = ring
+        self.free = free
+
+    def release(self, frame):
+        try:
+            self.free.put(self.ring.slot_of(frame))
+        except ValueError:
+            pass  # Pipeline da dung (hang doi da dong): ring sap bi huy
+
+
+def to_message(packet, ring):
+    """FramePacket -> dict nho di qua Queue (khong co pixel, crop tao lai tu box o phia nhan)"""
+    return {"slot": ring.slot_of(packet.frame), "shape": packet.frame.shape, "seq": packet.seq,
+            "captured_at": packet.captured_at, "boxes": packet.boxes, "hands": packet.hands,
+            "events": packet.events, "timings": packet.timings,
+            "tracks": [(track.track_id, track.name) for track in packet.tracks]}
+
+
+def to_packet(message, ring, pool):
+    frame = ring.view(message["slot"], message["shape"])
+    packet = FramePacket(message["seq"], frame, message["captured_at"], pool)
+    packet.boxes = message["boxes"]
+    packet.crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in packet.boxes]
+    packet.hands = message["hands"]
+    packet.events = message["events"]
+    packet.timings = message["timings"]
+    for (track_id, name), box in zip(message["tracks"], packet.boxes):
+        track = Track(track_id, box, 1)
+        track.name = name
+        packet.tracks.append(track)
+    return packet
+
+
+class CachedGalleryRecognizer:
+    """recognizer(crops) cho process nhan dien: gallery nap tu GalleryCache (process chinh ghi khi dong bo/dang ky)"""
+    def __init__(self, embedder, cache=None):
+        from edge_ai.gallery_cache import GalleryCache
+        self.embedder = embedder
+        self.cache = cache or GalleryCache()
+        self.gallery = None
+        self.reload()
+
+    def reload(self):
+        from edge_ai.gallery import GalleryIndex
+        gallery = GalleryIndex()
+        gallery.add_many(self.cache.load())
+        self.gallery = gallery
+        print(f"[INFO] Recognizer process: {len(gallery.people)} staff loaded from cache")
+
+    def __call__(self, crops):
+        from edge_ai.gallery import MATCH_THRESHOLD
+        if not crops:
+            return [], []
+        if len(self.gallery) == 0:
+            return ["Stranger"] * len(crops), [float("inf")] * len(crops)
+        names, dists = self.gallery.match(self.embedder.embed(crops))
+        return [n if d < MATCH_THRESHOLD else "Stranger" for n, d in zip(names, dists)], dists.tolist()
+
+
+def load_recognizer():
+    """Factory mac dinh cho process nhan dien -> (recognizer, FaceLocator hoac None)"""
+    from edge_ai.cascade import FaceLocator
+    from edge_ai.embedding import FaceEmbedder, RECOG_MAX_BATCH
+    from edge_ai.models import select_device, load_facenet, load_mtcnn
+    device = select_device()
+    backend, _ = load_facenet(device)
+    mtcnn = load_mtcnn(device) if FACE_CASCADE else None
+    return CachedGalleryRecognizer(FaceEmbedder(backend, max_batch=RECOG_MAX_BATCH)), FaceLocator(mtcnn) if mtcnn else None
+
+
+def load_hands():
+    from edge_ai.hands import HandDetector
+    return HandDetector()
+
+
+# --- PROCESS CON ---
+def _capture_frames(source, ring, pool, stop, counters):
+    """Doc camera, lat guong thang vao o trong; het o trong (stage sau cham) -> bo frame, van doc de camera khong tre"""
+    cap, frame_interval = open_camera(source)
+    raw = None
+    seq = 0
+    try:
+        while not stop.is_set():
+            t0 = time.monotonic()
+            ret, raw = cap.read(raw)
+            if not ret:
+                return
+            seq += 1
+            counters["frames"] += 1
+            try:
+                slot = pool.free.get_nowait()
+            except queue.Empty:
+                counters["dropped"] += 1
+            else:
+                frame = ring.view(slot, raw.shape)
+                cv2.flip(raw, 1, frame)
+                yield FramePacket(seq, frame, t0, pool)
+            if frame_interval:
+                time.sleep(max(0.0, frame_interval - (time.monotonic() - t0)))
+    finally:
+        cap.release()
+
+
+def _receive(inbox, ring, pool, stop, keep, counters):
+    """Nhan metadata tu process truoc; backlog > keep thi bo frame cu nhat (tra o ngay). None = het nguon"""
+    while not stop.is_set():
+        try:
+            messages = [inbox.get(timeout=0.5)]
+        except queue.Empty:
+            continue
+        while True:
+            try:
+                messages.append(inbox.get_nowait())
+            except queue.Empty:
+                break
+        eof = None in messages
+        messages = [m for m in messages if m is not None]
+        for message in messages[:-keep]:
+            pool.free.put(message["slot"])
+            counters["dropped"] += 1
+        for message in messages[-keep:]:
+            yield to_packet(message, ring, pool)
+        if eof:
+            return
+
+
+def _make_engine(stages, options, events):
+    """MonitoringEngine khong chay luong: process con goi detect_packet / recognize_packet tren tung frame"""
+    if stages == ("capture",):
+        return None
+    detector = options["detector_factory"]() if "detect" in stages else None
+    hands = options["hands_factory"]() if "detect" in stages and options["hands_factory"] else None
+    recognizer, faces = options["recognizer_factory"]() if "recognize" in stages else (None, None)
+    return MonitoringEngine(detector, recognizer, zones=options["zones"], hands=hands, faces=faces,
+                            imgsz=options["imgsz"], render=False,
+                            on_alert=lambda *args: events.put(("alert", args)),
+                            on_resolved=lambda: events.put(("resolved", None)))
+
+
+def _group_stats(stages, engine, counters):
+    stats = dict(counters)
+    if "detect" in stages:
+        stats["detect_skip_ratio"] = engine.motion_gate.skip_ratio if engine.motion_gate else 0.0
+        stats["hands"] = engine.hand_tracker.stats() if engine.hand_tracker else None
+        if engine.hand_tracker:
+            stats["hand_ms"] = engine.hand_tracker.ms
+    if "recognize" in stages:
+        stats.update(embed_ratio=engine.tracker.embed_ratio, scheduler=engine.scheduler.stats(),
+                     alarm=engine.alarm.stats(), faces=engine.faces.stats() if engine.faces else None)
+    return stats
+
+
+def _apply_control(control, engine):
+    """Lenh tu process chinh: 'ack' (tat coi tai bien), 'gallery' (nap lai gallery tu cache)"""
+    while True:
+        try:
+            command = control.get_nowait()
+        except queue.Empty:
+            return
+        if command == "ack":
+            engine.alarm.acknowledge()
+        elif command == "gallery":
+            engine.recognizer.reload()
+            engine.gallery_changed()
+
+
+def run_group(stages, ring_spec, inbox, outbox, free, events, control, stop, options):
+    """Diem vao cua 1 process con: chay lan luot cac stage cua nhom tren tung frame"""
+    name = "+".join(stages)
+    ring = SharedFrameRing.attach(ring_spec)
+    pool = SlotPool(ring, free)
+    counters = {"frames": 0, "dropped": 0}
+    frames = packet = None
+    try:
+        engine = _make_engine(stages, options, events)
+        events.put(("ready", name))
+        if stages[0] == "capture":
+            frames = _capture_frames(options["source"], ring, pool, stop, counters)
+        else:
+            # detect chi lay frame moi nhat (nhu LatestFrame), recognize giu toi da queue_size frame
+            keep = 1 if stages[0] == "detect" else options["queue_size"]
+            frames = _receive(inbox, ring, pool, stop, keep, counters)
+        last_stats = time.monotonic()
+        for packet in frames:
+            if stages[0] != "capture":
+                counters["frames"] += 1
+            if "detect" in stages:
+                engine.detect_packet(packet)
+            if "recognize" in stages:
+                _apply_control(control, engine)
+                engine.recognize_packet(packet)
+            outbox.put(to_message(packet, ring))  # O thuoc ve process sau tu day
+            if time.monotonic() - last_stats >= MP_STATS_EVERY:
+                last_stats = time.monotonic()
+                events.put(("stats", name, _group_stats(stages, engine, counters)))
+        if not stop.is_set():
+            outbox.put(None)  # Het nguon -> bao cho cac process sau
+    except Exception as e:
+        events.put(("error", name, f"{type(e).__name__}: {e}"))
+    finally:
+        if stop.is_set():
+            for q in (outbox, free, events):
+                q.cancel_join_thread()  # Process chinh co the khong doc nua -> khong treo luc thoat
+        if frames is not None:
+            frames.close()
+        packet = None  # Khong con view nao tro vao ring truoc khi dong
+        ring.close()
+
+
+class ProcessEngine(MonitoringEngine):
+    """MonitoringEngine voi capture / detect (/ recognize) tren process rieng; cung API start/stop/output/stats.
+
+    Process chinh nhan metadata, dung lai FramePacket tro vao shared memory roi chay tiep cac stage con lai
+    (recognize neu khong tach, annotate) bang luong nhu che do thuong.
+    detector_factory / recognizer_factory / hands_factory: ham cap module (pickle duoc) nap model trong process con.
+    """
+    def __init__(self, detector_factory, recognizer=None, recognizer_factory=load_recognizer, hands_factory=None,
+                 topology=MP_TOPOLOGY, slots=MP_SLOTS, max_frame=MP_MAX_FRAME, **kwargs):
+        super().__init__(None, recognizer, **kwargs)
+        self.topology = topology
+        self.groups = parse_topology(topology)
+        self.remote_recognize = "recognize" in self.groups[-1]
+        self.slots = slots
+        w, h = parse_frame_size(max_frame)
+        self.slot_bytes = w * h * 3
+        self.options = {"source": self.source, "zones": self.zones, "imgsz": self.imgsz,
+                        "queue_size": self.detected.maxsize, "detector_factory": detector_factory,
+                        "recognizer_factory": recognizer_factory, "hands_factory": hands_factory}
+        self.ring = None
+        self.remote = {}
+        self._processes = []
+        self._queues = []
+        self._stop_lock = threading.Lock()
+        self._remote_alarm = None
+
+    def start(self):
+        if self.is_running:
+            return
+        ctx = mp.get_context("spawn")
+        self.ring = SharedFrameRing(self.slots, self.slot_bytes)
+        self._free = ctx.Queue()
+        for slot in range(self.slots):
+            self._free.put(slot)
+        self._pool = SlotPool(self.ring, self._free)
+        self._events = ctx.Queue()
+        self._control = ctx.Queue()
+        self._stop_event = ctx.Event()
+        links = [ctx.Queue() for _ in self.groups]  # links[i] = hang doi ra cua process i
+        self._inbox = links[-1]
+        self._queues = [self._free, self._events, self._control] + links
+        self.remote = {}
+        for i, stages in enumerate(self.groups):
+            p = ctx.Process(target=run_group, name="+".join(stages), daemon=True,
+                            args=(stages, self.ring.spec, links[i - 1] if i else None, links[i], self._free,
+                                  self._events, self._control, self._stop_event, self.options))
+            p.start()
+            self._processes.append(p)
+
+        self.is_running = True
+        loops = [self._bridge_loop, self._events_loop, self._annotate_loop]
+        if not self.remote_recognize:
+            loops.append(self._recognize_loop)
+        for target in loops:
+            t = threading.Thread(target=target, name=target.__name__.strip('_'), daemon=True)
+            t.start()
+            self._threads.append(t)
+        print(f"[INFO] Multi-process pipeline: {self.topology} ({self.slots} shared slots x "
+              f"{self.slot_bytes / 2**20:.1f} MB)")
+
+    def stop(self, timeout=MP_JOIN_TIMEOUT):
+        was_running = self.is_running
+        super().stop(timeout)
+        with self._stop_lock:  # stop_system va het nguon video co the goi cung luc
+            processes, self._processes = self._processes, []
+            if not processes:
+                return
+            self._stop_event.set()
+            for p in processes:
+                p.join(timeout)
+                if p.is_alive():
+                    print(f"[WARNING] Process {p.name} did not stop in {timeout}s, terminating")
+                    p.terminate()
+                    p.join(timeout)
+            for q in (self.detected, self.recognized, self.output):
+                while (packet := q.get_nowait()) is not None:
+                    packet.release()
+            for q in self._queues:
+                q.cancel_join_thread()  # Khong treo luc thoat vi du lieu chua ai doc
+                q.close()
+            self.ring.close()
+        if was_running:
+            print("[INFO] Multi-process pipeline stopped")
+
+    def _bridge_loop(self):
+        """Metadata tu process cuoi -> FramePacket tro vao shared memory -> hang doi cua stage tiep theo"""
+        target = self.recognized if self.remote_recognize else self.detected
+        while self.is_running:
+            try:
+                message = self._inbox.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if message is None:
+                threading.Thread(target=self.stop, daemon=True).start()
+                return
+            packet = to_packet(message, self.ring, self._pool)
+            self.zones.prepare(packet.frame.shape)  # Process chinh chi can polygon de ve
+            if self.remote_recognize:
+                self._remote_alarm = packet.events.get("alarm_state")
+            target.put(packet)
+
+    def _events_loop(self):
+        """Canh bao / thong ke / loi tu process con (canh bao gui tu process chinh: spool, bang chung)"""
+        while self.is_running:
+            try:
+                kind, arg, *rest = self._events.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            if kind == "alert" and self.on_alert:
+                self.on_alert(*arg)
+            elif kind == "resolved" and self.on_resolved:
+                self.on_resolved()
+            elif kind == "stats":
+                self.remote[arg] = rest[0]
+            elif kind == "ready":
+                print(f"[INFO] Process {arg} ready")
+            elif kind == "error":
+                print(f"[ERROR] Process {arg}: {rest[0]}")
+                threading.Thread(target=self.stop, daemon=True).start()
+
+    def acknowledge_alarm(self):
+        if self.remote_recognize:
+            self._control.put("ack")
+        else:
+            super().acknowledge_alarm()
+
+    def gallery_changed(self):
+        if self.remote_recognize:
+            if self.is_running:
+                self._control.put("gallery")
+        else:
+            super().gallery_changed()
+
+    def stats(self):
+        stats = super().stats()
+        stats["processes"] = dict(self.remote)
+        stats["ring"] = {"slots": self.slots, "slot_bytes": self.slot_bytes, "topology": self.topology}
+        return stats
+
+    def status_text(self):
+        remote = {k: v for stats in self.remote.values() for k, v in stats.items()}
+        state = self._remote_alarm if self.remote_recognize and self._remote_alarm else self.alarm.state
+        embed = remote.get("embed_ratio", 0.0) if self.remote_recognize else self.tracker.embed_ratio
+        status = (f"{state} | FPS: {self.fps:.1f} | Lat: {self.latency_ms:.0f}ms | Embed: {embed:.0%}"
+                  f" | YOLO skip: {remote.get('detect_skip_ratio', 0.0):.0%}")
+        if "hand_ms" in remote:
+            status += f" | Hand: {remote['hand_ms']:.0f}ms"
+        return status + f" | MP: {self.topology}"
@@ -0,0 +1,159 @@
+"""Cac khoi co ban cho pipeline nhieu luong: hang doi bounded drop-oldest, goi tin frame va pool bo dem frame"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class FramePool:
+    """Bo dem frame cap phat truoc va tai su dung: capture lay 1 bo dem, tra lai khi frame bi bo hoac da hien thi.
+
+    Het bo dem trong (stage sau giu qua nhieu frame) -> cap phat them thay vi chan camera (dem vao `allocated`).
+    """
+    def __init__(self, size):
+        self.size = size
+        self._free = deque()
+        self._shape = None
+        self._lock = threading.Lock()
+        self.allocated = 0   # So bo dem da tao (on dinh <= size khi cac stage tra lai day du)
+        self.reused = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        with self._lock:
+            if shape != self._shape:
+                # Doi do phan giai camera: bo cac bo dem cu
+                self._free.clear()
+                self._shape = shape
+            if self._free:
+                self.reused += 1
+                return self._free.pop()
+            self.allocated += 1
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, buf):
+        with self._lock:
+            if buf.shape == self._shape and len(self._free) < self.size:
+                self._free.append(buf)
+
+    def stats(self):
+        return {"size": self.size, "allocated": self.allocated, "reused": self.reused, "free": len(self._free)}
+
+
+class FramePacket:
+    """Du lieu cua 1 frame di qua cac stage (capture -> detect -> recognize -> annotate)"""
+    def __init__(self, seq, frame, captured_at, pool=None):
+        self.seq = seq                  # So thu tu frame tu camera (tang dan)
+        self.frame = frame
+        self._pool = pool               # FramePool so huu bo dem cua frame (None = khong tai su dung)
+        self.captured_at = captured_at  # time.monotonic() luc doc tu camera
+        self.boxes = []                 # [(x1, y1, x2, y2)]
+        self.crops = []
+        self.tracks = []
+        self.hands = None               # Diem moc ban tay (so tay, 21, 2) trong toa do frame
+        self.events = {}                # Ket qua logic an ninh cua frame nay
+        self.timings = {}               # Thoi gian xu ly cua tung stage (ms)
+
+    @property
+    def age_ms(self):
+        return (time.monotonic() - self.captured_at) * 1000
+
+    def release(self):
+        """Tra bo dem ve pool; goi khi frame bi bo hoac da hien thi xong (khong dung packet.frame sau do)"""
+        if self._pool is not None:
+            self._pool.release(self.frame)
+            self._pool = None
+            self.frame = None  # Bo dem (hoac o shared memory) da thuoc ve frame khac
+        self.crops = []
+
+
+def release_packet(packet):
+    packet.release()
+
+
+class DropOldestQueue:
+    """Hang doi co gioi han: khi day thi bo phan tu CU NHAT de luon giu frame moi nhat.
+    on_drop(item) duoc goi cho phan tu bi bo (vd tra bo dem frame ve pool).
+    """
+    def __init__(self, maxsize=2, name="queue", on_drop=None):
+        self.name = name
+        self.on_drop = on_drop
+        self.maxsize = max(1, maxsize)
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        dropped = None
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                dropped = self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+        if dropped is not None and self.on_drop:
+            self.on_drop(dropped)
+
+    def get(self, timeout=None):
+        """Lay phan tu tiep theo; tra ve None neu het thoi gian cho hoac queue da dong"""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def get_nowait(self):
+        with self._cond:
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        """Danh thuc tat ca luong dang cho de chung thoat ra khi dung pipeline"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class LatestFrame:
+    """O chua 1 frame moi nhat tu camera: ghi de lien tuc, stage sau chi lay frame chua xu ly"""
+    def __init__(self, name="latest", on_drop=None):
+        self.name = name
+        self.on_drop = on_drop
+        self._cond = threading.Condition()
+        self._packet = None
+        self._closed = False
+        self.published = 0
+        self.overwritten = 0   # Frame bi ghi de truoc khi stage sau kip lay (bi bo qua)
+
+    @property
+    def dropped(self):
+        return self.overwritten
+
+    def publish(self, packet):
+        with self._cond:
+            old, self._packet = self._packet, packet
+            if old is not None:
+                self.overwritten += 1
+            self.published += 1
+            self._cond.notify_all()
+        if old is not None and self.on_drop:
+            self.on_drop(old)
+
+    def take(self, timeout=None):
+        """Lay frame moi nhat (va xoa khoi o); None neu het thoi gian cho"""
+        with self._cond:
+            if self._packet is None and not self._closed:
+                self._cond.wait(timeout)
+            packet, self._packet = self._packet, None
+            return packet
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -0,0 +1,36 @@
+"""Cac nguong chat luong anh khuon mat (dung chung cho dang ky qua webcam va dang ky hang loat)"""
+import cv2
+import numpy as np
+
+
+def check_brightness(img):
+    """Kiem tra do sang cua anh"""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    brightness = np.mean(gray)
+    return 60 < brightness < 200  # Khong qua toi/qua sang
+
+
+def check_blur(img):
+    """Kiem tra anh co bi mo khong (Laplacian variance)"""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+    return laplacian_var > 100  # Nguong blur
+
+
+def check_face_size(w, h):
+    """Kiem tra kich thuoc khuon mat"""
+    return 100 < w < 350 and 100 < h < 350
+
+
+def get_quality_feedback(img, face_w, face_h):
+    """Tra ve thong bao chat luong anh"""
+    if not check_brightness(img):
+        return "QUA TOI/SANG - Dieu chinh anh sang"
+    if not check_blur(img):
+        return "ANH BI MO - Giu may yen"
+    if not check_face_size(face_w, face_h):
+        if face_w < 100:
+            return "QUA XA - Tien gan hon"
+        else:
+            return "QUA GAN - Lui ra"
+    return "OK"
@@ -0,0 +1,203 @@
+"""Vong lap dang ky khuon mat tren luong rieng: doc camera, MTCNN/YOLO tren ban thu nho, cham chat luong, tu chup.
+
+Cua so Tk chi lay frame moi nhat + trang thai de ve, khong con chay detect tren luong giao dien.
+"""
+import os
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+
+from edge_ai.display import OvalGuide
+from edge_ai.pipeline import FramePacket, FramePool, LatestFrame, release_packet
+
+REGISTER_DETECT_WIDTH = int(os.getenv("REGISTER_DETECT_WIDTH", "320"))  # Chieu rong anh dua vao MTCNN/YOLO
+CAPTURE_INTERVAL = 0.6  # Giay toi thieu giua 2 lan chup
+
+STEPS = [
+    {"name": "NHÌN THẲNG", "count": 5, "instruction": "Hãy nhìn thẳng vào camera"},
+    {"name": "QUAY TRÁI", "count": 5, "instruction": "Xoay mặt sang TRÁI 45 độ"},
+    {"name": "QUAY PHẢI", "count": 5, "instruction": "Xoay mặt sang PHẢI 45 độ"},
+    {"name": "NGẨNG ĐẦU", "count": 5, "instruction": "Ngẩng đầu lên nhẹ"}
+]
+
+
+def check_pose(lm, step_name):
+    """Ước lượng hướng mặt dựa trên 5 điểm mốc của MTCNN (toa do frame goc)"""
+    # MTCNN landmarks: 0:mắt trái, 1:mắt phải, 2:mũi, 3:miệng trái, 4:miệng phải
+    le, re, nose = lm[0], lm[1], lm[2]
+
+    # Yaw (Trái/Phải): Tỉ lệ khoảng cách mũi tới 2 mắt
+    eye_dist = re[0] - le[0]
+    if eye_dist <= 0: return False
+    yaw = (nose[0] - le[0]) / eye_dist
+
+    # Pitch (Lên/Xuống): Khoảng cách mũi tới trục mắt
+    eye_y_avg = (le[1] + re[1]) / 2
+    pitch = nose[1] - eye_y_avg
+
+    if step_name == "NHÌN THẲNG":
+        return 0.4 < yaw < 0.6
+    elif step_name == "QUAY TRÁI":
+        return yaw > 0.75  # Mũi lệch hẳn sang phải (user quay trái)
+    elif step_name == "QUAY PHẢI":
+        return yaw < 0.25  # Mũi lệch hẳn sang trái (user quay phải)
+    elif step_name == "NGẨNG ĐẦU":
+        return pitch < 20   # Mũi gần mắt hơn (nhìn lên)
+    return False
+
+
+class RegistrationWorker:
+    """Luong camera + phat hien + cham chat luong cho cua so dang ky.
+
+    UI doc: frames (LatestFrame, phai packet.release() sau khi ve), status (dict, thay moi frame),
+    notices (so buoc vua xong - worker tam dung chup cho den khi UI goi resume()), done.
+    """
+    def __init__(self, cap, session, mtcnn=None, detector=None, guide=None, steps=STEPS,
+                 detect_width=REGISTER_DETECT_WIDTH):
+        self.cap = cap
+        self.session = session
+        self.mtcnn = mtcnn
+        self.detector = detector
+        self.guide = guide or OvalGuide()
+        self.steps = steps
+        self.detect_width = detect_width
+        self.total_needed = sum(step["count"] for step in steps)
+
+        self.pool = FramePool(4)
+        self.frames = LatestFrame("camera->display", on_drop=release_packet)
+        self.notices = queue.Queue()
+        self.status = {"detected": False, "size_ok": False, "bright_ok": False, "sharp_ok": False, "hint": None}
+        self.current_step = 0
+        self.step_captured = 0
+        self.captured = 0
+        self.done = False
+        self.error = None
+
+        self._resume = threading.Event()
+        self._resume.set()
+        self._last_capture = 0.0
+        self.is_running = False
+        self._thread = None
+        # Thong ke
+        self.started_at = None
+        self.finished_at = None
+        self.frames_read = 0
+        self.detect_ms = 0.0
+
+    def start(self):
+        self.is_running = True
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="registration", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self.is_running = False
+        self._resume.set()
+        self.frames.close()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def resume(self):
+        """UI da thong bao xong buoc -> chup tiep"""
+        self._resume.set()
+
+    @property
+    def elapsed(self):
+        end = self.finished_at or time.monotonic()
+        return end - self.started_at if self.started_at else 0.0
+
+    def _run(self):
+        raw = None
+        seq = 0
+        try:
+            while self.is_running and not self.done:
+                t0 = time.monotonic()
+                ret, raw = self.cap.read(raw)
+                if not ret:
+                    self.error = "Camera read failed"
+                    break
+                seq += 1
+                self.frames_read += 1
+                frame = self.pool.acquire(raw.shape, raw.dtype)
+                cv2.flip(raw, 1, frame)
+                # Phan tich truoc khi dua frame cho UI: crop lay tu frame nay (session.add tu copy)
+                self._analyze(frame)
+                self.frames.publish(FramePacket(seq, frame, t0, self.pool))
+        except Exception as e:
+            self.error = str(e)
+            print(f"[ERROR] Registration worker: {e}")
+        finally:
+            self.finished_at = time.monotonic()
+
+    def _detect(self, frame):
+        """Box (x1, y1, x2, y2) + 5 diem moc (hoac None voi YOLO) trong toa do frame goc"""
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.detect_width / w)
+        small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else frame
+        box, landmarks = None, None
+        if self.mtcnn:
+            boxes, probs, lms = self.mtcnn.detect(cv2.cvtColor(small, cv2.COLOR_BGR2RGB), landmarks=True)
+            if boxes is not None and len(boxes) > 0:
+                best = int(np.argmax(probs))
+                if probs[best] > 0.9:
+                    box, landmarks = boxes[best] / scale, lms[best] / scale
+        elif self.detector:  # Fallback YOLO: lay box lon nhat
+            results = self.detector(small, classes=[0], conf=0.6, verbose=False)[0]
+            if len(results.boxes) > 0:
+                boxes = [tuple(map(float, b.xyxy[0])) for b in results.boxes]
+                box = np.array(max(boxes, key=lambda b: (b[2] - b[0]) * (b[3] - b[1]))) / scale
+        if box is None:
+            return None, None
+        x1, y1, x2, y2 = map(int, box)
+        return (max(0, x1), max(0, y1), min(w, x2), min(h, y2)), landmarks
+
+    def _analyze(self, frame):
+        t0 = time.perf_counter()
+        box, landmarks = self._detect(frame)
+        self.detect_ms = 0.9 * self.detect_ms + 0.1 * (time.perf_counter() - t0) * 1000
+        if box is None:
+            self.status = {"detected": False, "size_ok": False, "bright_ok": False, "sharp_ok": False, "hint": None}
+            return
+        x1, y1, x2, y2 = box
+        face_img = frame[y1:y2, x1:x2]
+        if face_img.size == 0:
+            return
+
+        # Quality Indicators
+        size_ok = 120 < (x2 - x1) < 350
+        gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
+        bright_ok = bool(60 < np.mean(gray) < 200)
+        sharp_ok = bool(cv2.Laplacian(gray, cv2.CV_64F).var() > 80)
+        status = {"detected": True, "size_ok": size_ok, "bright_ok": bright_ok, "sharp_ok": sharp_ok, "hint": None}
+
+        if size_ok and bright_ok and sharp_ok:
+            center_x, center_y, axes_x, axes_y = self.guide.geometry(frame.shape[1], frame.shape[0])
+            in_oval = (center_x - axes_x < (x1 + x2) / 2 < center_x + axes_x) and \
+                      (center_y - axes_y < (y1 + y2) / 2 < center_y + axes_y)
+            step = self.steps[self.current_step]
+            if not in_oval:
+                status["hint"] = "oval"
+            # KIỂM TRA HƯỚNG MẶT (YOLO khong co diem moc -> bo qua)
+            elif landmarks is not None and not check_pose(landmarks, step["name"]):
+                status["hint"] = "pose"
+            elif self._resume.is_set() and time.monotonic() - self._last_capture > CAPTURE_INTERVAL:
+                self._capture(face_img)
+        self.status = status
+
+    def _capture(self, face_img):
+        # Giu crop trong RAM, worker cua session embed + ghi JPEG (neu bat)
+        self.session.add(face_img)
+        self._last_capture = time.monotonic()
+        self.captured += 1
+        self.step_captured += 1
+        if self.captured >= self.total_needed:
+            self.done = True
+        elif self.step_captured >= self.steps[self.current_step]["count"]:
+            self.step_captured = 0
+            self.current_step += 1
+            # Dung chup cho den khi nguoi dung doc thong bao chuyen buoc
+            self._resume.clear()
+            self.notices.put(self.current_step)
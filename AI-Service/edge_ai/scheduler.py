@@ -0,0 +1,92 @@
+"""Lap lich nhan dien theo do uu tien: danh ngan sach FaceNet cho nguoi o gan tu trung bay truoc"""
+import os
+import numpy as np
+
+PRIORITY_FENCE, PRIORITY_NEAR, PRIORITY_FAR = 0, 1, 2
+PRIORITY_NAMES = {PRIORITY_FENCE: "fence", PRIORITY_NEAR: "near", PRIORITY_FAR: "far"}
+
+# Ngan sach moi frame: so khuon mat toi da va/hoac so ms FaceNet (0 = khong gioi han theo ms)
+RECOG_BUDGET_FACES = int(os.getenv("RECOG_BUDGET_FACES", "4"))
+RECOG_BUDGET_MS = float(os.getenv("RECOG_BUDGET_MS", "0"))
+# Khoang cach (pixel) quanh vung cam duoc coi la "dang tien lai gan"
+FENCE_APPROACH_MARGIN = int(os.getenv("FENCE_APPROACH_MARGIN", "80"))
+# Nhan dien lai sau moi N frame theo tung muc uu tien (fence luon la 1 = moi frame)
+REFRESH_NEAR = int(os.getenv("RECOG_REFRESH_NEAR", "5"))
+REFRESH_FAR = int(os.getenv("RECOG_REFRESH_FAR", "20"))
+
+
+def check_box_overlap(box, fence_box):
+    """Kiem tra xem bounding box co overlap voi Virtual Fence khong"""
+    x1, y1, x2, y2 = box
+    fx1, fy1, fx2, fy2 = fence_box
+    # Kiem tra xem 2 hinh chu nhat co giao nhau khong
+    return not (x2 < fx1 or x1 > fx2 or y2 < fy1 or y1 > fy2)
+
+
+class RecognitionScheduler:
+    """Chon track nao duoc chay FaceNet trong frame nay, phan con lai bi hoan (deferred). zones: ZoneMap"""
+    def __init__(self, zones, budget_faces=RECOG_BUDGET_FACES, budget_ms=RECOG_BUDGET_MS,
+                 margin=FENCE_APPROACH_MARGIN, refresh_near=REFRESH_NEAR, refresh_far=REFRESH_FAR):
+        self.zones = zones
+        self.budget_faces = max(0, budget_faces)
+        self.budget_ms = budget_ms
+        self.margin = margin
+        self.refresh_every = {PRIORITY_FENCE: 1, PRIORITY_NEAR: max(1, refresh_near), PRIORITY_FAR: max(1, refresh_far)}
+        self.face_cost_ms = 0.0   # Chi phi FaceNet trung binh cho 1 khuon mat (EMA)
+        self.frames = 0
+        self.frames_over_budget = 0
+        self.deferred = {p: 0 for p in PRIORITY_NAMES}
+        self.scheduled = {p: 0 for p in PRIORITY_NAMES}
+
+    def priorities(self, boxes):
+        """Muc uu tien cua ca lo box: cham vung nao -> fence, trong margin quanh vung nao -> near"""
+        result = np.full(len(boxes), PRIORITY_FAR, dtype=np.int8)
+        result[self.zones.hit_boxes(boxes, self.margin).any(axis=1)] = PRIORITY_NEAR
+        result[self.zones.hit_boxes(boxes).any(axis=1)] = PRIORITY_FENCE
+        return result
+
+    def _budget(self):
+        faces = self.budget_faces or float("inf")
+        if self.budget_ms and self.face_cost_ms > 0:
+            faces = min(faces, int(self.budget_ms // self.face_cost_ms))
+        return faces
+
+    def plan(self, tracker, tracks, boxes, priorities=None):
+        """Tra ve chi so cac track can nhan dien trong frame nay (uu tien cao truoc)"""
+        self.frames += 1
+        if priorities is None:
+            priorities = self.priorities(boxes)
+        due = []
+        for i, (track, p) in enumerate(zip(tracks, priorities)):
+            p = int(p)
+            track.priority = p
+            if tracker.needs_embedding(track, reembed_every=self.refresh_every[p]):
+                # Trong cung muc uu tien: track chua co danh tinh truoc, roi track cho lau nhat
+                due.append((p, track.embedded, -track.frames_since_embed, i))
+        due.sort()
+
+        budget = self._budget()
+        selected = []
+        for p, _, _, i in due:
+            # Nguoi cham vung cam luon duoc nhan dien moi frame, bat ke ngan sach
+            if p == PRIORITY_FENCE or len(selected) < budget:
+                selected.append(i)
+                self.scheduled[p] += 1
+            else:
+                self.deferred[p] += 1
+        if len(selected) < len(due):
+            self.frames_over_budget += 1
+        return selected
+
+    def record_cost(self, elapsed_ms, faces):
+        if faces:
+            per_face = elapsed_ms / faces
+            self.face_cost_ms = per_face if self.face_cost_ms == 0 else 0.9 * self.face_cost_ms + 0.1 * per_face
+
+    def stats(self):
+        return {
+            "face_cost_ms": round(self.face_cost_ms, 2),
+            "frames_over_budget": self.frames_over_budget,
+            "deferred": {PRIORITY_NAMES[p]: n for p, n in self.deferred.items()},
+            "scheduled": {PRIORITY_NAMES[p]: n for p, n in self.scheduled.items()},
+        }
@@ -0,0 +1,61 @@
+"""Noi nhan frame da ve (annotated) khi chay headless: none / file MJPEG / cua so OpenCV"""
+import cv2
+
+
+class NullSink:
+    """Khong xuat hinh (che do production tren may edge khong co man hinh)"""
+    needs_render = False
+
+    def write(self, frame):
+        pass
+
+    def close(self):
+        pass
+
+
+class MjpegFileSink:
+    """Ghi cac frame JPEG noi tiep vao 1 file .mjpeg (mo duoc bang ffplay/VLC)"""
+    needs_render = True
+
+    def __init__(self, path, quality=80):
+        self.path = path
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        self._file = open(path, "wb")
+        self.frames = 0
+
+    def write(self, frame):
+        ok, buf = cv2.imencode(".jpg", frame, self.params)
+        if ok:
+            self._file.write(buf.tobytes())
+            self.frames += 1
+
+    def close(self):
+        self._file.close()
+        print(f"[INFO] Saved {self.frames} frames to {self.path}")
+
+
+class WindowSink:
+    """Hien thi bang cv2.imshow (khong can tkinter). Nhan 'q' de dung"""
+    needs_render = True
+
+    def __init__(self, title="Smart Jewelry Security"):
+        self.title = title
+        self.closed = False
+
+    def write(self, frame):
+        cv2.imshow(self.title, frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self.closed = True
+
+    def close(self):
+        cv2.destroyWindow(self.title)
+
+
+def make_sink(kind, path=None):
+    if kind == "none":
+        return NullSink()
+    if kind == "mjpeg":
+        return MjpegFileSink(path or "monitor.mjpeg")
+    if kind == "window":
+        return WindowSink()
+    raise ValueError(f"Unknown sink: {kind}")
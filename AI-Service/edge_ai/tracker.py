@@ -0,0 +1,159 @@
+"""Tracker nhe (IoU + tam box) gan track ID cho moi nguoi va cache danh tinh theo track"""
+import os
+from collections import Counter, deque
+import numpy as np
+
+# Cau hinh (co the ghi de bang bien moi truong)
+TRACK_IOU_THRESHOLD = float(os.getenv("TRACK_IOU_THRESHOLD", "0.3"))
+TRACK_MAX_MISSED = int(os.getenv("TRACK_MAX_MISSED", "15"))          # So frame mat dau truoc khi xoa track
+TRACK_REEMBED_EVERY = int(os.getenv("TRACK_REEMBED_EVERY", "15"))    # K: nhan dien lai dinh ky moi K frame
+TRACK_VOTE_WINDOW = int(os.getenv("TRACK_VOTE_WINDOW", "7"))         # So ket qua gan nhat dung de bau chon
+TRACK_MIN_AGREEMENT = float(os.getenv("TRACK_MIN_AGREEMENT", "0.6")) # Ty le phieu toi thieu de coi la chac chan
+TRACK_DIST_MARGIN = float(os.getenv("TRACK_DIST_MARGIN", "0.08"))    # Vung mo quanh nguong 0.85 -> nhan dien lai
+
+PROCESSING = "Processing..."
+
+
+def iou_matrix(a, b):
+    """IoU giua moi cap box (x1, y1, x2, y2) cua a (N) va b (M) -> ma tran NxM"""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+class Track:
+    """1 nguoi dang duoc theo doi: vi tri, danh tinh da cache va lich su bau chon"""
+    def __init__(self, track_id, box, vote_window):
+        self.track_id = track_id
+        self.box = box
+        self.name = PROCESSING
+        self.last_dist = float("inf")
+        self.votes = deque(maxlen=vote_window)
+        self.missed = 0
+        self.frames_since_embed = 0
+        self.embedded = False
+        self.priority = None
+
+    @property
+    def agreement(self):
+        """Ty le phieu cua danh tinh dang dan dau"""
+        if not self.votes:
+            return 0.0
+        return Counter(self.votes).most_common(1)[0][1] / len(self.votes)
+
+
+class IdentityTracker:
+    """Gan box YOLO vao track, quyet dinh khi nao can chay lai FaceNet va lam muot danh tinh"""
+    def __init__(self, iou_threshold=TRACK_IOU_THRESHOLD, max_missed=TRACK_MAX_MISSED,
+                 reembed_every=TRACK_REEMBED_EVERY, vote_window=TRACK_VOTE_WINDOW,
+                 min_agreement=TRACK_MIN_AGREEMENT, dist_threshold=0.85, dist_margin=TRACK_DIST_MARGIN):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.reembed_every = max(1, reembed_every)
+        self.vote_window = vote_window
+        self.min_agreement = min_agreement
+        self.dist_threshold = dist_threshold
+        self.dist_margin = dist_margin
+        self.tracks = []
+        self._next_id = 1
+        # Thong ke: so box da thay va so lan phai trich xuat embedding
+        self.boxes_seen = 0
+        self.embed_calls = 0
+
+    def _associate(self, boxes):
+        """Ghep box moi voi track cu: IoU tham lam truoc, sau do ghep theo khoang cach tam"""
+        matches = {}
+        if not self.tracks or not boxes:
+            return matches
+        track_boxes = [t.box for t in self.tracks]
+        iou = iou_matrix(boxes, track_boxes)
+        for flat in np.argsort(-iou, axis=None):
+            bi, ti = divmod(int(flat), iou.shape[1])
+            if iou[bi, ti] < self.iou_threshold:
+                break
+            if bi in matches or ti in matches.values():
+                continue
+            matches[bi] = ti
+
+        # Nguoi di chuyen nhanh (IoU thap): ghep neu tam box lech it hon nua canh box
+        free_tracks = [ti for ti in range(len(self.tracks)) if ti not in matches.values()]
+        for bi, box in enumerate(boxes):
+            if bi in matches or not free_tracks:
+                continue
+            cx, cy = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+            best, best_d = None, None
+            for ti in free_tracks:
+                tb = track_boxes[ti]
+                d = np.hypot(cx - (tb[0] + tb[2]) / 2, cy - (tb[1] + tb[3]) / 2)
+                limit = 0.5 * max(tb[2] - tb[0], tb[3] - tb[1])
+                if d < limit and (best_d is None or d < best_d):
+                    best, best_d = ti, d
+            if best is not None:
+                matches[bi] = best
+                free_tracks.remove(best)
+        return matches
+
+    def update(self, boxes):
+        """Cap nhat tracker voi box cua frame hien tai, tra ve danh sach track cung thu tu voi boxes"""
+        matches = self._associate(boxes)
+        matched = set(matches.values())
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched:
+                track.missed += 1
+
+        result = []
+        for bi, box in enumerate(boxes):
+            if bi in matches:
+                track = self.tracks[matches[bi]]
+                track.box = box
+                track.missed = 0
+                track.frames_since_embed += 1
+            else:
+                track = Track(self._next_id, box, self.vote_window)
+                self._next_id += 1
+                self.tracks.append(track)
+            result.append(track)
+
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+        self.boxes_seen += len(boxes)
+        return result
+
+    def needs_embedding(self, track, reembed_every=None):
+        """Chi nhan dien lai khi: track moi, den han K frame, hoac do tin cay thap"""
+        if not track.embedded:
+            return True
+        if track.frames_since_embed >= (reembed_every or self.reembed_every):
+            return True
+        if abs(track.last_dist - self.dist_threshold) < self.dist_margin:
+            return True
+        return track.agreement < self.min_agreement
+
+    def record(self, track, name, dist):
+        """Ghi ket qua nhan dien vao track va cap nhat danh tinh theo da so phieu"""
+        self.embed_calls += 1
+        track.frames_since_embed = 0
+        if name == PROCESSING:
+            return
+        track.embedded = True
+        track.last_dist = float(dist)
+        track.votes.append(name)
+        track.name = Counter(track.votes).most_common(1)[0][0]
+
+    def reset_identities(self):
+        """Gallery vua thay doi (dang ky/xoa nhan vien) -> bat buoc nhan dien lai moi track"""
+        for track in self.tracks:
+            track.embedded = False
+            track.votes.clear()
+
+    @property
+    def embed_ratio(self):
+        """Ty le box phai chay FaceNet (1.0 = nhan dien lai moi frame nhu truoc)"""
+        return self.embed_calls / self.boxes_seen if self.boxes_seen else 0.0
@@ -0,0 +1,199 @@
+"""Vung bao ve (da giac) cua tung camera, nap tu file JSON, kiem tra va cham vector hoa cho ca frame.
+
+File vung (ZONES_FILE hoac --zones), toa do theo frame_size (tu co gian theo do phan giai camera that):
+    {"frame_size": [800, 600],
+     "zones": [{"name": "Tu nhan", "polygon": [[500, 50], [750, 50], [750, 300], [500, 300]],
+                "severity": "DANGER", "staff_exempt": true}]}
+severity: DANGER | WARNING (loai canh bao gui len backend).
+staff_exempt: true = co nhan vien thi khong bao dong (dang phuc vu khach); false = luon bao dong (vd ket sat).
+"""
+import json
+import math
+import os
+import cv2
+import numpy as np
+
+ZONES_FILE = os.getenv("ZONES_FILE", "")
+ZONE_RASTER_SCALE = int(os.getenv("ZONE_RASTER_SCALE", "4"))  # Raster thu nho N lan (800x600 -> 200x150)
+MAX_ZONES = 64       # Moi o raster la 1 bitmask uint64 (bit z = thuoc vung z)
+SEVERITIES = ("WARNING", "DANGER")
+
+
+def _segment_hits_box(p, q, box):
+    """Doan thang pq co cham hinh chu nhat dong box khong (Liang-Barsky)"""
+    x1, y1, x2, y2 = box
+    t0, t1 = 0.0, 1.0
+    for d, v, lo, hi in ((q[0] - p[0], p[0], x1, x2), (q[1] - p[1], p[1], y1, y2)):
+        if d == 0:
+            if v < lo or v > hi:
+                return False
+            continue
+        a, b = sorted(((lo - v) / d, (hi - v) / d))
+        t0, t1 = max(t0, a), min(t1, b)
+        if t0 > t1:
+            return False
+    return True
+
+
+def polygon_hits_box(polygon, box):
+    """Kiem tra chinh xac: da giac co giao hinh chu nhat dong box khong (cham vien = giao nhau)"""
+    x1, y1 = float(box[0]), float(box[1])
+    if cv2.pointPolygonTest(polygon, (x1, y1), False) >= 0:
+        return True  # Box nam trong da giac (hoac goc box tren vien)
+    # Da giac nam trong box hoac 2 hinh cat nhau -> co canh da giac cham box
+    return any(_segment_hits_box(p, q, box) for p, q in zip(polygon, np.roll(polygon, -1, axis=0)))
+
+
+def _as_rect(polygon):
+    """(x1, y1, x2, y2) neu da giac la hinh chu nhat thang truc, nguoc lai None"""
+    xs, ys = np.unique(polygon[:, 0]), np.unique(polygon[:, 1])
+    if len(polygon) == 4 and len(xs) == 2 and len(ys) == 2:
+        return xs[0], ys[0], xs[1], ys[1]
+    return None
+
+
+class Zone:
+    def __init__(self, name, polygon, severity="DANGER", staff_exempt=True):
+        if severity not in SEVERITIES:
+            raise ValueError(f"Zone {name!r}: severity must be one of {', '.join(SEVERITIES)}")
+        polygon = np.asarray(polygon, dtype=np.float32).reshape(-1, 2)
+        if len(polygon) < 3:
+            raise ValueError(f"Zone {name!r}: polygon needs at least 3 points")
+        self.name = name
+        self.polygon = polygon
+        self.severity = severity
+        self.staff_exempt = bool(staff_exempt)
+
+
+class ZoneMap:
+    """Tat ca vung cua 1 camera.
+
+    Raster bitmask (1 phep tra bang cho moi diem -> moi vung) va bang tong tich luy (integral image) cua tung vung
+    (4 phep tra bang cho moi box -> co giao vung khong): chi phi moi frame gan nhu khong doi khi them vung.
+    Raster thu nho chi la bo loc so bo (vung duoc no them 1 o -> khong bo sot); cac cap (box/diem, vung) qua loc
+    duoc xac nhan chinh xac tren toa do that (chu nhat: nhu check_box_overlap, da giac: pointPolygonTest + canh).
+    """
+    def __init__(self, zones, frame_size=None, scale=ZONE_RASTER_SCALE):
+        if not zones:
+            raise ValueError("ZoneMap needs at least one zone")
+        if len(zones) > MAX_ZONES:
+            raise ValueError(f"At most {MAX_ZONES} zones per camera")
+        self.zones = list(zones)
+        self.frame_size = frame_size   # (w, h) ma toa do polygon dang dung; None = toa do pixel that
+        self.scale = max(1, scale)
+        self.names = [z.name for z in self.zones]
+        self.severity = np.array([z.severity == "DANGER" for z in self.zones])
+        self.staff_exempt = np.array([z.staff_exempt for z in self.zones])
+        self._shape = None
+        self.polygons = None
+        self._exact = None   # [(da giac float32 toa do frame that, hinh chu nhat hoac None)] de xac nhan
+        self._rects = None
+        self._is_rect = None
+        self.bbox = None
+        self._bits = None
+        self._integral = None
+
+    @classmethod
+    def from_box(cls, box, **kwargs):
+        """1 vung chu nhat (FENCE_BOX cu)"""
+        x1, y1, x2, y2 = box
+        return cls([Zone("VUNG TRUNG BAY (JEWELRY ZONE)", [(x1, y1), (x2, y1), (x2, y2), (x1, y2)])], **kwargs)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        zones = [Zone(z["name"], z["polygon"], z.get("severity", "DANGER"), z.get("staff_exempt", True))
+                 for z in config["zones"]]
+        frame_size = tuple(config["frame_size"]) if config.get("frame_size") else None
+        print(f"[INFO] Loaded {len(zones)} protection zones from {path}")
+        return cls(zones, frame_size=frame_size, **kwargs)
+
+    def __len__(self):
+        return len(self.zones)
+
+    def prepare(self, frame_shape):
+        """Dung raster cho do phan giai frame (chi lam lai khi doi do phan giai)"""
+        h, w = frame_shape[:2]
+        if self._shape == (h, w):
+            return
+        sx, sy = (w / self.frame_size[0], h / self.frame_size[1]) if self.frame_size else (1.0, 1.0)
+        exact = [(z.polygon * np.float32((sx, sy))).astype(np.float32) for z in self.zones]
+        self._exact = [(poly, _as_rect(poly)) for poly in exact]
+        # Vung chu nhat: kiem tra chinh xac vector hoa cho ca lo (dong NaN = vung da giac, di duong raster + xac nhan)
+        self._rects = np.array([r if r is not None else (np.nan,) * 4 for _, r in self._exact], dtype=np.float32)
+        self._is_rect = ~np.isnan(self._rects[:, 0])
+        self.polygons = [np.round(poly).astype(np.int32) for poly in exact]
+        rw, rh = math.ceil(w / self.scale), math.ceil(h / self.scale)
+        bits = np.zeros((rh, rw), dtype=np.uint64)
+        integral = np.empty((len(self.zones), rh + 1, rw + 1), dtype=np.int32)
+        mask = np.empty((rh, rw), dtype=np.uint8)
+        grow = np.ones((3, 3), dtype=np.uint8)
+        for z, poly in enumerate(self.polygons):
+            mask[:] = 0
+            cv2.fillPoly(mask, [np.round(poly / self.scale).astype(np.int32)], 1)
+            # No 1 o: sai so lam tron khi thu nho khong lam mat diem sat vien (loc chi duoc thua, khong duoc thieu)
+            mask = cv2.dilate(mask, grow)
+            bits |= mask.astype(np.uint64) << np.uint64(z)
+            integral[z] = cv2.integral(mask)
+        xs = [p[:, 0] for p in self.polygons]
+        ys = [p[:, 1] for p in self.polygons]
+        self.bbox = (int(min(x.min() for x in xs)), int(min(y.min() for y in ys)),
+                     int(max(x.max() for x in xs)), int(max(y.max() for y in ys)))
+        self._bits, self._integral, self._shape = bits, integral, (h, w)
+
+    def hit_boxes(self, boxes, margin=0):
+        """(B, Z) bool: box thu b (mo rong margin pixel) co giao vung z khong (cham vien = giao, nhu check_box_overlap)"""
+        if len(boxes) == 0:
+            return np.zeros((0, len(self.zones)), dtype=bool)
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4) + np.float32((-margin, -margin, margin, margin))
+        b = boxes / self.scale
+        rh, rw = self._bits.shape
+        # Moi o raster ma box cham toi: [floor(x1), floor(x2)] -> cat integral [x1, x2 + 1)
+        x1 = np.clip(np.floor(b[:, 0]), 0, rw).astype(np.intp)
+        y1 = np.clip(np.floor(b[:, 1]), 0, rh).astype(np.intp)
+        x2 = np.clip(np.floor(b[:, 2]) + 1, 0, rw).astype(np.intp)
+        y2 = np.clip(np.floor(b[:, 3]) + 1, 0, rh).astype(np.intp)
+        ii = self._integral
+        hits = (ii[:, y2, x2] - ii[:, y1, x2] - ii[:, y2, x1] + ii[:, y1, x1] > 0).T
+        r = self._rects
+        rect_hits = ~((boxes[:, None, 2] < r[:, 0]) | (boxes[:, None, 0] > r[:, 2]) |
+                      (boxes[:, None, 3] < r[:, 1]) | (boxes[:, None, 1] > r[:, 3]))
+        hits = np.where(self._is_rect, rect_hits, hits)
+        for i, z in zip(*np.nonzero(hits & ~self._is_rect)):
+            hits[i, z] = polygon_hits_box(self._exact[z][0], boxes[i])
+        return hits
+
+    def hit_points(self, points):
+        """(P, Z) bool: diem thu p (x, y pixel) co nam trong vung z khong (tren vien = trong)"""
+        pts = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        if len(pts) == 0:
+            return np.zeros((0, len(self.zones)), dtype=bool)
+        rh, rw = self._bits.shape
+        ix = np.floor(pts[:, 0] / self.scale).astype(np.intp)
+        iy = np.floor(pts[:, 1] / self.scale).astype(np.intp)
+        valid = (ix >= 0) & (ix < rw) & (iy >= 0) & (iy < rh)
+        bits = np.where(valid, self._bits[np.clip(iy, 0, rh - 1), np.clip(ix, 0, rw - 1)], np.uint64(0))
+        hits = ((bits[:, None] >> np.arange(len(self.zones), dtype=np.uint64)) & np.uint64(1)).astype(bool)
+        r = self._rects
+        rect_hits = ((pts[:, None, 0] >= r[:, 0]) & (pts[:, None, 0] <= r[:, 2]) &
+                     (pts[:, None, 1] >= r[:, 1]) & (pts[:, None, 1] <= r[:, 3]))
+        hits = np.where(self._is_rect, rect_hits, hits)
+        for i, z in zip(*np.nonzero(hits & ~self._is_rect)):
+            hits[i, z] = cv2.pointPolygonTest(self._exact[z][0], (float(pts[i, 0]), float(pts[i, 1])), False) >= 0
+        return hits
+
+    def roi(self, frame_shape, pad):
+        """Hinh chu nhat bao tat ca vung (mo rong pad pixel) - vung cat cho MediaPipe Hands"""
+        self.prepare(frame_shape)
+        h, w = frame_shape[:2]
+        x1, y1, x2, y2 = self.bbox
+        return max(0, x1 - pad), max(0, y1 - pad), min(w, x2 + pad), min(h, y2 + pad)
+
+    def draw(self, img, hit=None):
+        """Ve vien tung vung: do neu bi xam nhap trong frame nay"""
+        for z, (zone, poly) in enumerate(zip(self.zones, self.polygons)):
+            color = (0, 0, 255) if hit is not None and hit[z] else (0, 255, 0)
+            cv2.polylines(img, [poly], True, color, 2)
+            x, y = poly[:, 0].min(), poly[:, 1].min()
+            cv2.putText(img, zone.name, (int(x), int(y) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
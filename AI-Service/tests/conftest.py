@@ -0,0 +1,9 @@
+"""Chay tu thu muc AI-Service: python -m pytest -q (Virtual_Backend.py nam o thu muc goc repo)"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+AI_SERVICE = os.path.join(ROOT, "AI-Service")
+for path in (ROOT, AI_SERVICE):
+    if path not in sys.path:
+        sys.path.insert(0, path)
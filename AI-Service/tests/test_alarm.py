@@ -0,0 +1,56 @@
+"""May trang thai bao dong: hysteresis vao/ra, nhan vien tat coi, tu tat khi nguoi la roi di."""
+from edge_ai.alarm import AlarmStateMachine, SAFE, SUSPECT, ALARM, RESOLVED
+
+
+def machine():
+    return AlarmStateMachine(enter_frames=3, clear_frames=2, resolve_frames=2, rearm_frames=4)
+
+
+def feed(sm, frames, intrusion=False, staff=False):
+    return [t for t in (sm.update(intrusion, staff) for _ in range(frames)) if t]
+
+
+def test_suspect_clears_back_to_safe():
+    sm = machine()
+    assert feed(sm, 2, intrusion=True) == [(SAFE, SUSPECT)]
+    assert feed(sm, 1) == []
+    assert feed(sm, 1) == [(SUSPECT, SAFE)]
+
+
+def test_enter_hysteresis():
+    sm = machine()
+    feed(sm, 2, intrusion=True)
+    feed(sm, 1)  # 1 frame sach giua chung lam lai dem
+    assert feed(sm, 2, intrusion=True) == []
+    assert sm.state == SUSPECT
+    assert feed(sm, 1, intrusion=True) == [(SUSPECT, ALARM)]
+
+
+def test_staff_present_is_not_intrusion():
+    sm = machine()
+    assert feed(sm, 10, intrusion=True, staff=True) == []
+    assert sm.update(True, True, staff_exempt=False) == (SAFE, SUSPECT)
+
+
+def test_staff_resolves_alarm():
+    sm = machine()
+    feed(sm, 3, intrusion=True)
+    assert sm.state == ALARM
+    assert feed(sm, 2, staff=True) == [(ALARM, RESOLVED)]
+    assert feed(sm, 4) == [(RESOLVED, SAFE)]
+
+
+def test_quiet_alarm_resolves_and_rearms():
+    sm = machine()
+    feed(sm, 3, intrusion=True)
+    assert feed(sm, 3) == [] and sm.state == ALARM
+    assert feed(sm, 1) == [(ALARM, RESOLVED)]  # Nguoi la roi di, khong co nhan vien
+    # Lan xam nhap sau van bao dong lai
+    assert feed(sm, 3, intrusion=True) == [(RESOLVED, SUSPECT), (SUSPECT, ALARM)]
+
+
+def test_acknowledge():
+    sm = machine()
+    feed(sm, 3, intrusion=True)
+    assert sm.acknowledge() == (ALARM, RESOLVED)
+    assert sm.acknowledge() is None
@@ -0,0 +1,48 @@
+"""Virtual_Backend alert-stream: thiet bi SSE nhan SAFE khi canh bao het cua so ACTIVE_WINDOW_SEC."""
+import http.client
+import json
+import threading
+
+import pytest
+
+import Virtual_Backend
+from Virtual_Backend import make_server
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    monkeypatch.setattr(Virtual_Backend, "ACTIVE_WINDOW_SEC", 0.5)
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def events(response):
+    """Doc tung payload "event: status" tu socket (dong kich thuoc chunk khong bat dau bang data: -> bo qua)"""
+    while True:
+        line = response.fp.readline().decode()
+        if not line:
+            return
+        if line.startswith("data: "):
+            yield json.loads(line[6:])
+
+
+def post(port, path, data):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("POST", path, json.dumps(data), {"Content-Type": "application/json"})
+    assert conn.getresponse().status < 300
+    conn.close()
+
+
+def test_stream_pushes_safe_when_alert_expires(backend):
+    conn = http.client.HTTPConnection("127.0.0.1", backend, timeout=5)
+    conn.request("GET", "/api/security/alert-stream")
+    stream = events(conn.getresponse())
+    assert next(stream)["shouldAlert"] is False
+
+    post(backend, "/api/security/log", {"type": "DANGER", "title": "Intrusion"})
+    assert next(stream)["shouldAlert"] is True
+    assert next(stream) == {"shouldAlert": False, "message": "SAFE"}  # Khong ai reset, cua so het han
+    conn.close()
@@ -0,0 +1,112 @@
+"""AlertDispatcher gui len Virtual_Backend that (cong ngau nhien): thu lai sau 503, gop su kien,
+spool con nguyen sau khi khoi dong lai, bo su kien khi backend tra 4xx."""
+import threading
+import time
+
+import pytest
+
+from Virtual_Backend import make_server
+from edge_ai.alerts import AlertDispatcher, AlertSpool
+
+
+@pytest.fixture
+def backend():
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def set_fail_rate(server, rate):
+    server.RequestHandlerClass.options.fail_rate = rate
+
+
+def make_dispatcher(server, tmp_path, **kwargs):
+    spool = AlertSpool(str(tmp_path / "spool.db"))
+    return AlertDispatcher(api_url=server.url + "/api/security/log",
+                           reset_url=server.url + "/api/security/reset-alarm",
+                           spool=spool, backoff_max=1.0, **kwargs)
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def logs(server):
+    return server.RequestHandlerClass.state.logs
+
+
+def test_delivers_after_503(backend, tmp_path):
+    set_fail_rate(backend, 1.0)
+    dispatcher = make_dispatcher(backend, tmp_path).start()
+    try:
+        dispatcher.send_alert("DANGER", "Intrusion", "stranger at case")
+        assert wait_for(lambda: dispatcher.failed_attempts >= 2)
+        assert not dispatcher.online and len(dispatcher.spool) == 1 and not logs(backend)
+
+        set_fail_rate(backend, 0.0)
+        assert wait_for(lambda: dispatcher.sent == 1)
+        assert dispatcher.online and len(dispatcher.spool) == 0
+        assert [log["title"] for log in logs(backend)] == ["Intrusion"]
+    finally:
+        dispatcher.stop()
+        dispatcher.spool.close()
+
+
+def test_coalesces_duplicates(backend, tmp_path):
+    dispatcher = make_dispatcher(backend, tmp_path, coalesce_sec=60)
+    try:
+        for _ in range(3):
+            dispatcher.send_alert("DANGER", "Intrusion", "stranger at case")
+        dispatcher.send_alert("WARNING", "Loitering", "stranger near case")
+        assert dispatcher.coalesced == 2 and len(dispatcher.spool) == 2
+
+        dispatcher.start()
+        assert wait_for(lambda: dispatcher.sent == 2)
+        assert [log["title"] for log in logs(backend)] == ["Intrusion", "Loitering"]
+    finally:
+        dispatcher.stop()
+        dispatcher.spool.close()
+
+
+def test_spool_survives_restart(backend, tmp_path):
+    set_fail_rate(backend, 1.0)
+    first = make_dispatcher(backend, tmp_path).start()
+    first.send_alert("DANGER", "Intrusion", "stranger at case")
+    first.reset_alarm()
+    assert wait_for(lambda: first.failed_attempts >= 1)
+    first.stop()
+    first.spool.close()
+
+    set_fail_rate(backend, 0.0)
+    second = make_dispatcher(backend, tmp_path)
+    try:
+        assert len(second.spool) == 2
+        second.start()
+        assert wait_for(lambda: second.sent == 2)
+        assert len(second.spool) == 0
+        assert [log["status"] for log in logs(backend)] == ["resolved"]  # Thu tu alert -> reset duoc giu
+    finally:
+        second.stop()
+        second.spool.close()
+
+
+def test_drops_on_4xx(backend, tmp_path):
+    dispatcher = make_dispatcher(backend, tmp_path)
+    dispatcher.api_url = backend.url + "/api/security/missing"  # Backend tra 404
+    try:
+        dispatcher.send_alert("DANGER", "Intrusion", "stranger at case")
+        dispatcher.start()
+        assert wait_for(lambda: dispatcher.rejected == 1)
+        assert dispatcher.sent == 0 and dispatcher.failed_attempts == 0
+        assert len(dispatcher.spool) == 0 and dispatcher.online
+    finally:
+        dispatcher.stop()
+        dispatcher.spool.close()
@@ -0,0 +1,29 @@
+"""Do khop cosine cua tung backend FaceNet voi eager torch (nguong giong benchmarks.bench_backends)."""
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("facenet_pytorch")
+
+from benchmarks.bench_batch_embedding import load_crops  # noqa: E402
+from edge_ai.backends import BACKENDS, load_backend, cosine_similarity  # noqa: E402
+from edge_ai.embedding import FaceEmbedder  # noqa: E402
+
+MIN_COS = 0.999
+MIN_COS_INT8 = 0.98  # Luong tu hoa int8 lech nhieu hon FP32
+
+
+@pytest.fixture(scope="module")
+def reference(tmp_path_factory):
+    faces = load_crops(None) or load_crops(8)
+    backend, _ = load_backend("eager", torch.device("cpu"))
+    return faces, FaceEmbedder(backend, max_batch=32).embed(faces), str(tmp_path_factory.mktemp("models_cache"))
+
+
+@pytest.mark.parametrize("name", [b for b in BACKENDS if b != "eager"])
+def test_backend_matches_eager(reference, name):
+    if name.startswith("onnx"):
+        pytest.importorskip("onnxruntime")
+    faces, ref_emb, cache_dir = reference
+    backend, _ = load_backend(name, torch.device("cpu"), cache_dir=cache_dir)
+    cos = cosine_similarity(ref_emb, FaceEmbedder(backend, max_batch=8).embed(faces))
+    assert cos.min() >= (MIN_COS_INT8 if name == "onnx-int8" else MIN_COS)
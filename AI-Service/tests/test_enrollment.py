@@ -0,0 +1,40 @@
+"""EnrollmentSession: lo embed loi duoc bao lai va khong de lai anh trong dataset."""
+import os
+
+import numpy as np
+
+from edge_ai.enrollment import EnrollmentSession
+
+
+class FlakyEmbedder:
+    max_batch = 2
+
+    def __init__(self, fail_calls=()):
+        self.fail_calls = set(fail_calls)
+        self.calls = 0
+
+    def embed(self, crops):
+        self.calls += 1
+        if self.calls in self.fail_calls:
+            raise RuntimeError("embed failed")
+        return np.ones((len(crops), 512), dtype=np.float32)
+
+
+def run(embedder, tmp_path, crops=6):
+    session = EnrollmentSession(embedder, "staff", save_images=True, dataset_dir=str(tmp_path))
+    for _ in range(crops):
+        session.add(np.zeros((20, 20, 3), dtype=np.uint8))
+    return session, session.finish(timeout=5)
+
+
+def test_all_batches_saved(tmp_path):
+    session, embs = run(FlakyEmbedder(), tmp_path)
+    assert session.error is None and embs.shape == (6, 512)
+    assert len(os.listdir(tmp_path / "staff")) == 6
+
+
+def test_failed_batch_reported_and_images_skipped(tmp_path):
+    session, embs = run(FlakyEmbedder(fail_calls={1}), tmp_path)
+    assert isinstance(session.error, RuntimeError)
+    assert 0 < len(embs) < 6
+    assert len(os.listdir(tmp_path / "staff")) == len(embs)
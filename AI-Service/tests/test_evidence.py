@@ -0,0 +1,46 @@
+"""EvidenceRecorder: anh gui ngay (khong doi clip cua canh bao truoc), ten file khong trung, URL chi khi mo duoc."""
+import os
+import threading
+import time
+
+import numpy as np
+
+from edge_ai.evidence import EvidenceBuffer, EvidenceRecorder, LocalDirUploader
+
+
+def recorder(tmp_path, prefix="", post_sec=0.6):
+    buffer = EvidenceBuffer(seconds=2, fps=50, width=64)
+    buffer.push(np.zeros((48, 64, 3), dtype=np.uint8), time.monotonic())
+    uploader = LocalDirUploader(str(tmp_path), url_prefix=prefix)
+    return EvidenceRecorder(buffer, uploader, pre_sec=1, post_sec=post_sec).start()
+
+
+def test_snapshots_not_blocked_by_pending_clips(tmp_path):
+    rec = recorder(tmp_path, "http://edge/evidence/")
+    sent, done = [], threading.Event()
+
+    def on_snapshot(url, clip_url):
+        sent.append((time.monotonic(), url, clip_url))
+        if len(sent) == 2:
+            done.set()
+
+    t0 = time.monotonic()
+    rec.capture(on_snapshot, "a")
+    rec.capture(on_snapshot, "a")  # Cung nhan, cung giay
+    assert done.wait(2)
+    assert all(t - t0 < 0.3 for t, _, _ in sent)  # Khong doi post_sec cua canh bao truoc
+    urls = [url for _, url, _ in sent]
+    assert len(set(urls)) == 2 and all(u.startswith("http://edge/evidence/") for u in urls)
+    rec.stop()
+    clips = sorted(f for f in os.listdir(tmp_path) if f.endswith("-clip.mjpeg"))
+    assert [f"http://edge/evidence/{f}" for f in clips] == sorted(clip for _, _, clip in sent)
+    assert rec.stats()["clips"] == 2
+
+
+def test_no_url_without_prefix(tmp_path):
+    rec = recorder(tmp_path)
+    got = []
+    rec.capture(lambda url, clip_url: got.append((url, clip_url)))
+    rec.stop()
+    assert got == [(None, None)]
+    assert any(f.endswith(".jpg") for f in os.listdir(tmp_path))  # Van luu tren may edge
@@ -0,0 +1,128 @@
+"""GalleryIndex: ket qua phai giong KNeighborsClassifier + LabelEncoder cu (ke ca hoa phieu), them/xoa tung nguoi."""
+import numpy as np
+import pytest
+from edge_ai import gallery
+from edge_ai.gallery import EMBEDDING_DIM, GalleryIndex, l2_normalize, select_prototypes
+
+# Thu tu them khong theo alphabet -> kiem tra tie-break theo ten chu khong theo thu tu them
+NAMES = ["Minh", "An", "Tuan", "Binh", "Lan"]
+
+
+def make_people(rng, rows=4, names=NAMES):
+    return {name: l2_normalize(rng.normal(size=(rows, EMBEDDING_DIM))) for name in names}
+
+
+def sklearn_match(people, queries):
+    neighbors = pytest.importorskip("sklearn.neighbors")
+    preprocessing = pytest.importorskip("sklearn.preprocessing")
+    X = np.concatenate(list(people.values()))
+    y = [name for name, vecs in people.items() for _ in vecs]
+    encoder = preprocessing.LabelEncoder()
+    knn = neighbors.KNeighborsClassifier(n_neighbors=min(7, len(people)), metric="euclidean")
+    knn.fit(X, encoder.fit_transform(y))
+    dists, _ = knn.kneighbors(queries)
+    return list(encoder.inverse_transform(knn.predict(queries))), dists.mean(axis=1)
+
+
+@pytest.mark.parametrize("count", [1, 3, 5])
+def test_matches_sklearn_knn(count):
+    rng = np.random.default_rng(count)
+    people = make_people(rng, names=NAMES[:count])
+    index = GalleryIndex(capacity=4)  # Nho hon so vector -> di qua nhanh cap phat lai
+    for name, vecs in people.items():
+        index.add(name, vecs)
+    # Query nam giua nhieu nguoi -> hay hoa phieu
+    picks = rng.integers(0, len(index), size=(200, 3))
+    all_vecs = np.concatenate(list(people.values()))
+    queries = l2_normalize(all_vecs[picks].sum(axis=1) + 0.3 * rng.normal(size=(200, EMBEDDING_DIM)))
+
+    names, dists = index.match(queries)
+    ref_names, ref_dists = sklearn_match(people, queries)
+    assert names == ref_names
+    np.testing.assert_allclose(dists, ref_dists, rtol=1e-4, atol=1e-5)
+
+
+def test_vote_tie_goes_to_alphabetical_name():
+    rng = np.random.default_rng(7)
+    index = GalleryIndex()
+    base = l2_normalize(rng.normal(size=(1, EMBEDDING_DIM)))
+    # 2 nguoi, moi nguoi 1 vector cach deu query -> k=2, hoa 1-1
+    offset = l2_normalize(rng.normal(size=(1, EMBEDDING_DIM)))
+    index.add("Zung", l2_normalize(base + 0.5 * offset))
+    index.add("Anh", l2_normalize(base - 0.5 * offset))
+    names, _ = index.match(base)
+    assert names == ["Anh"]
+
+
+def test_add_replace_and_remove():
+    rng = np.random.default_rng(0)
+    people = make_people(rng)
+    index = GalleryIndex(capacity=8)
+    index.add_many(people)
+    assert len(index) == 20 and index.people == sorted(NAMES)
+
+    index.add("An", people["Minh"][:2])  # Thay the toan bo vector cua An
+    assert len(index) == 18
+    assert index.remove("Minh") == 4
+    assert index.remove("Minh") == 0
+    assert index.people == ["An", "Binh", "Lan", "Tuan"]
+    names, _ = index.match(people["Minh"][:2])
+    assert names == ["An", "An"]
+
+
+def test_empty_gallery():
+    index = GalleryIndex()
+    names, dists = index.match(np.ones((2, EMBEDDING_DIM)))
+    assert names == [None, None] and np.isinf(dists).all()
+    index.add("An", np.ones((3, EMBEDDING_DIM)))
+    index.clear()
+    assert len(index) == 0 and index.people == []
+
+
+def clustered_people(rng, rows=20, spread=0.4):
+    """Moi nguoi: 1 tam + nhieu anh lech quanh tam (giong embedding that cua 1 khuon mat)"""
+    centers = l2_normalize(rng.normal(size=(len(NAMES), EMBEDDING_DIM)))
+    return {name: l2_normalize(c + spread * l2_normalize(rng.normal(size=(rows, EMBEDDING_DIM))))
+            for name, c in zip(NAMES, centers)}
+
+
+def test_select_prototypes():
+    vecs = l2_normalize(np.random.default_rng(1).normal(size=(20, EMBEDDING_DIM)))
+    protos = select_prototypes(vecs, 3)
+    assert protos.shape == (4, EMBEDDING_DIM)
+    np.testing.assert_allclose(protos[0], l2_normalize(vecs.mean(axis=0))[0], atol=1e-6)
+    assert len({tuple(p) for p in protos[1:]}) == 3  # Cac mau khac nhau
+    assert select_prototypes(vecs[:3], 3).shape == (3, EMBEDDING_DIM)  # It vector -> giu nguyen
+
+
+@pytest.mark.parametrize("dtype,atol", [("float16", 2e-3), ("int8", 2e-2)])
+def test_compressed_dtype_matches_float32(dtype, atol, monkeypatch):
+    monkeypatch.setattr(gallery, "SEARCH_CHUNK", 16)  # Giai nen nhieu khoi
+    rng = np.random.default_rng(3)
+    people = clustered_people(rng)
+    queries = np.concatenate([vecs[:3] + 0.05 * rng.normal(size=(3, EMBEDDING_DIM)) for vecs in people.values()])
+    full, small = GalleryIndex(), GalleryIndex(dtype=dtype)
+    full.add_many(people)
+    small.add_many(people)
+
+    names, dists = full.match(queries)
+    small_names, small_dists = small.match(queries)
+    assert small_names == names == [name for name in NAMES for _ in range(3)]
+    np.testing.assert_allclose(small_dists, dists, atol=atol)
+    assert small.nbytes < full.nbytes / (1.9 if dtype == "float16" else 3.5)
+
+
+def test_prototype_mode_caps_rows_and_neighbors():
+    rng = np.random.default_rng(4)
+    people = clustered_people(rng)
+    index = GalleryIndex(exemplars=2, dtype="int8")
+    index.add_many(people)
+    assert len(index) == 3 * len(NAMES) and index.neighbors == 3
+    names, dists = index.match(np.concatenate([vecs[:2] for vecs in people.values()]))
+    assert names == [name for name in NAMES for _ in range(2)]
+    assert (dists < gallery.MATCH_THRESHOLD).all()
+
+
+def test_unknown_dtype():
+    with pytest.raises(ValueError):
+        GalleryIndex(dtype="float64")
@@ -0,0 +1,162 @@
+"""GallerySync tren collection gia lap (localdb): dong bo khong doi, tai delta, xoa nguoi, khoi dong tu cache."""
+import io
+import os
+import time
+
+import numpy as np
+import pytest
+
+from edge_ai.gallery import GalleryIndex, l2_normalize, EMBEDDING_DIM
+from edge_ai.gallery_cache import GalleryCache, GallerySync, MANIFEST
+from edge_ai.localdb import LocalCollection
+
+
+def put(collection, name, embs):
+    buf = io.BytesIO()
+    np.save(buf, embs)
+    collection.find_one_and_update({"name": name}, {"$set": {"embeddings": buf.getvalue(), "updated_at": time.time()},
+                                                    "$inc": {"version": 1}}, upsert=True)
+
+
+def random_embs(rng, n=5):
+    return l2_normalize(rng.normal(size=(n, EMBEDDING_DIM))).astype(np.float32)
+
+
+def names(collection):
+    return sorted(d["name"] for d in collection.find({}, {"name": 1}))
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def collection(rng):
+    collection = LocalCollection()
+    for i in range(5):
+        put(collection, f"staff_{i}", random_embs(rng))
+    return collection
+
+
+def synced(collection, cache_dir):
+    """Dong bo lan dau (cache rong) roi khoi dong lai tu cache nhu luc mo may"""
+    GallerySync(GalleryIndex(), GalleryCache(cache_dir), lambda: collection).sync()
+    gallery = GalleryIndex()
+    sync = GallerySync(gallery, GalleryCache(cache_dir), lambda: collection)
+    assert sync.load_cache() == 5
+    return gallery, sync
+
+
+def test_noop_sync_reads_metadata_only(collection, tmp_path):
+    gallery, sync = synced(collection, str(tmp_path))
+    collection.reads = 0
+    assert sync.sync() == 0
+    assert sync.fetched == 0
+    assert collection.reads == 5  # Chi (name, version) cua moi document
+    assert gallery.people == names(collection)
+
+
+@pytest.mark.parametrize("blob", [b"", b"not an npy file", "empty"])
+def test_noop_sync_skips_empty_or_invalid_documents(collection, tmp_path, blob):
+    if blob == "empty":
+        put(collection, "broken", np.empty((0, EMBEDDING_DIM), dtype=np.float32))
+    else:
+        collection.find_one_and_update({"name": "broken"}, {"$set": {"embeddings": blob}, "$inc": {"version": 1}},
+                                       upsert=True)
+    gallery, sync = synced(collection, str(tmp_path))
+    assert "broken" not in gallery.people
+    cache = GalleryCache(str(tmp_path))
+    assert len(cache.load()["broken"]) == 0 and cache.manifest["people"]["broken"]["version"] == 1
+    collection.reads = 0
+    assert sync.sync() == 0
+    assert sync.fetched == 0 and collection.reads == 6  # Chi metadata, khong tai lai document hong
+
+    # Document duoc sua -> version moi -> tai lai va vao gallery
+    put(collection, "broken", random_embs(np.random.default_rng(1)))
+    assert sync.sync() == 1 and "broken" in gallery.people
+
+
+def test_delta_fetches_only_changed(collection, tmp_path, rng):
+    gallery, sync = synced(collection, str(tmp_path))
+    fresh = random_embs(rng)
+    put(collection, "staff_0", fresh)
+    put(collection, "new_staff", random_embs(rng))
+    changed = []
+    sync.on_change = lambda: changed.append(True)
+
+    assert sync.sync() == 2
+    assert sync.fetched == 2 and changed
+    assert gallery.people == names(collection)
+    np.testing.assert_allclose(sync.cache.load()["staff_0"], fresh)
+
+
+def test_removal(collection, tmp_path):
+    gallery, sync = synced(collection, str(tmp_path))
+    collection.delete_one({"name": "staff_4"})
+
+    assert sync.sync() == 1
+    assert sync.fetched == 0
+    assert "staff_4" not in gallery.people and gallery.people == names(collection)
+    assert "staff_4" not in GalleryCache(str(tmp_path)).load()
+
+
+def test_boot_without_cache(collection, tmp_path):
+    gallery = GalleryIndex()
+    sync = GallerySync(gallery, GalleryCache(str(tmp_path / "missing")), lambda: collection)
+    assert sync.load_cache() == 0 and len(gallery) == 0
+
+    assert sync.sync() == 5
+    assert gallery.people == names(collection)
+    assert os.path.exists(tmp_path / "missing" / MANIFEST)
+
+
+@pytest.mark.parametrize("damage", ["manifest", "embeddings"])
+def test_boot_from_corrupt_cache(collection, tmp_path, damage):
+    cache_dir = str(tmp_path)
+    GallerySync(GalleryIndex(), GalleryCache(cache_dir), lambda: collection).sync()
+    if damage == "manifest":
+        with open(os.path.join(cache_dir, MANIFEST), "w") as f:
+            f.write("{not json")
+    else:
+        for f in os.listdir(cache_dir):
+            if f.endswith(".f32"):
+                os.remove(os.path.join(cache_dir, f))
+
+    gallery = GalleryIndex()
+    sync = GallerySync(gallery, GalleryCache(cache_dir), lambda: collection)
+    assert sync.load_cache() == 0 and len(gallery) == 0
+
+    # Mat cache -> tai lai toan bo tu DB va ghi lai cache dung
+    assert sync.sync() == 5
+    assert gallery.people == names(collection)
+    assert sorted(GalleryCache(cache_dir).load()) == names(collection)
+
+
+def test_cache_appends_changed_rows_and_compacts(tmp_path, rng):
+    people = {f"staff_{i}": random_embs(rng) for i in range(4)}
+    meta = {name: (1, None) for name in people}
+    cache = GalleryCache(str(tmp_path), compact_ratio=0.5)
+    cache.save(people, meta, 1.0)
+    generation = cache.manifest["generation"]
+
+    people["staff_0"], meta["staff_0"] = random_embs(rng), (2, None)
+    cache.save(people, meta, 2.0, changed=["staff_0"])
+    del people["staff_1"]
+    cache.save(people, meta, 3.0, changed=[])
+    assert cache.rewrites == 1 and cache.appends == 2
+    assert cache.manifest["generation"] == generation and cache.manifest["rows"] == 25
+
+    reloaded = GalleryCache(str(tmp_path))
+    loaded = reloaded.load()
+    assert sorted(loaded) == sorted(people)
+    for name, embs in people.items():
+        np.testing.assert_array_equal(loaded[name], embs)
+    assert reloaded.manifest["people"]["staff_0"]["version"] == 2
+
+    # Dong chet vuot nguong -> ghi lai sang generation moi, file cu bi xoa
+    del people["staff_2"], people["staff_3"]
+    cache.save(people, meta, 4.0, changed=[])
+    assert cache.rewrites == 2 and cache.manifest["rows"] == 5
+    assert sorted(os.listdir(tmp_path)) == [f"embeddings-{generation + 1}.f32", MANIFEST]
+    assert sorted(GalleryCache(str(tmp_path)).load()) == sorted(people)
@@ -0,0 +1,79 @@
+"""SharedFrameRing: o frame trong shared memory dung chung giua cac process, chi so o + metadata di qua Queue."""
+import multiprocessing as mp
+import time
+import numpy as np
+import pytest
+
+from edge_ai.multiproc import SharedFrameRing, SlotPool, parse_topology, to_message, to_packet
+from edge_ai.pipeline import FramePacket
+from edge_ai.tracker import Track
+
+SHAPE = (48, 64, 3)
+SLOT_BYTES = int(np.prod(SHAPE))
+
+
+@pytest.fixture
+def ring():
+    ring = SharedFrameRing(4, SLOT_BYTES)
+    yield ring
+    ring.close()
+
+
+def fill_slot(spec, slot, value):
+    """Chay o process con: gan vao ring theo ten va ghi 1 frame"""
+    ring = SharedFrameRing.attach(spec)
+    ring.view(slot, SHAPE)[:] = value
+    ring.close()
+
+
+def test_views_are_separate_slots(ring):
+    frames = [ring.view(slot, SHAPE) for slot in range(4)]
+    for slot, frame in enumerate(frames):
+        frame[:] = slot + 1
+        assert ring.slot_of(frame) == slot
+    assert [int(f.mean()) for f in frames] == [1, 2, 3, 4]
+    assert ring.view(0, (8, 8, 3)).base is not None  # View, khong copy
+    del frames
+
+
+def test_frame_too_big_for_slot(ring):
+    with pytest.raises(ValueError):
+        ring.view(0, (SHAPE[0] + 1,) + SHAPE[1:])
+
+
+def test_other_process_writes_into_slot(ring):
+    proc = mp.get_context("spawn").Process(target=fill_slot, args=(ring.spec, 2, 77))
+    proc.start()
+    proc.join(30)
+    assert proc.exitcode == 0
+    assert (ring.view(2, SHAPE) == 77).all() and not ring.view(1, SHAPE).any()
+
+
+def test_message_round_trip_and_slot_release(ring):
+    free = mp.get_context("spawn").Queue()
+    pool = SlotPool(ring, free)
+    frame = ring.view(3, SHAPE)
+    frame[:] = np.arange(SLOT_BYTES, dtype=np.uint8).reshape(SHAPE)
+    packet = FramePacket(9, frame, time.monotonic(), pool)
+    packet.boxes = [(10, 5, 30, 25)]
+    track = Track(4, packet.boxes[0], 1)
+    track.name = "An"
+    packet.tracks = [track]
+
+    message = to_message(packet, ring)
+    assert message["slot"] == 3 and "frame" not in message
+    received = to_packet(message, ring, pool)
+    assert received.seq == 9 and np.shares_memory(received.frame, frame)
+    assert received.crops[0].shape == (20, 20, 3)
+    assert [(t.track_id, t.name) for t in received.tracks] == [(4, "An")]
+
+    received.release()
+    assert free.get(timeout=5) == 3
+    free.close()
+
+
+def test_parse_topology():
+    assert parse_topology("capture+detect|recognize") == [("capture", "detect"), ("recognize",)]
+    assert parse_topology("capture|detect") == [("capture",), ("detect",)]
+    with pytest.raises(ValueError):
+        parse_topology("detect|capture")
@@ -0,0 +1,109 @@
+"""Khoi co ban cua pipeline: DropOldestQueue bo phan tu cu nhat, LatestFrame chi giu frame moi nhat,
+FramePool tai su dung bo dem (ke ca frame bi bo giua chung)."""
+import threading
+import time
+import numpy as np
+from edge_ai.pipeline import DropOldestQueue, FramePacket, FramePool, LatestFrame, release_packet
+
+SHAPE = (48, 64, 3)
+
+
+def test_drop_oldest_keeps_newest():
+    q = DropOldestQueue(maxsize=2)
+    for i in range(5):
+        q.put(i)
+    assert len(q) == 2 and q.dropped == 3 and q.put_count == 5
+    assert [q.get_nowait(), q.get_nowait(), q.get_nowait()] == [3, 4, None]
+
+
+def test_get_times_out_and_close_wakes_waiters():
+    q = DropOldestQueue()
+    start = time.monotonic()
+    assert q.get(timeout=0.05) is None
+    assert time.monotonic() - start >= 0.04
+
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(q.get(timeout=5)))
+    waiter.start()
+    time.sleep(0.05)
+    q.close()
+    waiter.join(1)
+    assert not waiter.is_alive() and result == [None]
+
+
+def test_get_returns_items_left_after_close():
+    q = DropOldestQueue(maxsize=3)
+    q.put("a")
+    q.close()
+    assert q.get(timeout=1) == "a"
+    assert q.get(timeout=1) is None
+
+
+def test_get_wakes_on_put():
+    q = DropOldestQueue()
+    threading.Timer(0.05, q.put, args=("frame",)).start()
+    assert q.get(timeout=5) == "frame"
+
+
+def test_latest_frame_overwrites():
+    slot = LatestFrame()
+    for i in range(3):
+        slot.publish(i)
+    assert slot.published == 3 and slot.dropped == 2
+    assert slot.take(timeout=0) == 2
+    assert slot.take(timeout=0.01) is None
+
+
+def test_latest_frame_close_wakes_taker():
+    slot = LatestFrame()
+    result = []
+    taker = threading.Thread(target=lambda: result.append(slot.take(timeout=5)))
+    taker.start()
+    time.sleep(0.05)
+    slot.close()
+    taker.join(1)
+    assert not taker.is_alive() and result == [None]
+
+
+def test_frame_pool_reuses_released_buffers():
+    pool = FramePool(size=2)
+    a, b = pool.acquire(SHAPE), pool.acquire(SHAPE)
+    pool.release(a)
+    pool.release(b)
+    assert {id(pool.acquire(SHAPE)), id(pool.acquire(SHAPE))} == {id(a), id(b)}
+    assert pool.stats() == {"size": 2, "allocated": 2, "reused": 2, "free": 0}
+
+
+def test_frame_pool_caps_free_list_and_drops_on_resize():
+    pool = FramePool(size=1)
+    bufs = [pool.acquire(SHAPE) for _ in range(3)]  # Het bo dem -> cap phat them, khong chan
+    for buf in bufs:
+        pool.release(buf)
+    assert pool.allocated == 3 and pool.stats()["free"] == 1
+    big = pool.acquire((96, 128, 3))  # Doi do phan giai: bo dem cu bi bo
+    assert big.shape == (96, 128, 3) and pool.stats()["free"] == 0
+    pool.release(bufs[0])  # Bo dem kich thuoc cu tra ve muon -> khong giu lai
+    assert pool.stats()["free"] == 0
+
+
+def test_packet_release_returns_buffer_once():
+    pool = FramePool(size=2)
+    packet = FramePacket(1, pool.acquire(SHAPE), time.monotonic(), pool)
+    packet.crops = [np.zeros((4, 4, 3))]
+    packet.release()
+    packet.release()
+    assert packet.frame is None and packet.crops == []
+    assert pool.stats()["free"] == 1
+
+
+def test_dropped_packets_go_back_to_pool():
+    pool = FramePool(size=6)
+    q = DropOldestQueue(maxsize=1, on_drop=release_packet)
+    slot = LatestFrame(on_drop=release_packet)
+    packets = [FramePacket(seq, pool.acquire(SHAPE), time.monotonic(), pool) for seq in range(6)]
+    for seq in range(3):
+        q.put(packets[seq])
+        slot.publish(packets[3 + seq])
+    assert pool.stats()["free"] == 4
+    assert packets[0].frame is None and packets[3].frame is None
+    assert q.get_nowait().seq == 2 and slot.take(timeout=0).seq == 5
@@ -0,0 +1,84 @@
+"""Lap lich nhan dien: fence luon duoc chay, ngan sach (so mat / ms) chia cho near truoc far."""
+from edge_ai.scheduler import PRIORITY_FAR, PRIORITY_FENCE, PRIORITY_NEAR, RecognitionScheduler
+from edge_ai.tracker import IdentityTracker
+from edge_ai.zones import ZoneMap
+
+FENCE = (500, 50, 750, 300)
+FRAME = (600, 800, 3)
+IN_FENCE = (550, 100, 600, 200)
+NEAR = (420, 100, 480, 200)     # Cach vung 20 px < margin 80
+FAR = (0, 350, 50, 450)
+
+
+def scheduler(**kw):
+    zones = ZoneMap.from_box(FENCE)
+    zones.prepare(FRAME)
+    kw.setdefault("margin", 80)
+    return RecognitionScheduler(zones, **kw)
+
+
+def frame(tracker, boxes):
+    return tracker.update(boxes)
+
+
+def test_priorities():
+    s = scheduler()
+    assert s.priorities([FAR, NEAR, IN_FENCE]).tolist() == [PRIORITY_FAR, PRIORITY_NEAR, PRIORITY_FENCE]
+
+
+def test_face_budget_keeps_fence_and_prefers_near():
+    s, tracker = scheduler(budget_faces=3), IdentityTracker()
+    boxes = [FAR, (100, 350, 150, 450), NEAR, IN_FENCE, (650, 150, 700, 260)]
+    tracks = frame(tracker, boxes)
+    selected = s.plan(tracker, tracks, boxes)
+    # 2 nguoi trong vung tinh vao ngan sach, near lay not cho con lai, 2 nguoi o xa bi hoan
+    assert sorted(selected) == [2, 3, 4]
+    assert s.stats()["deferred"] == {"fence": 0, "near": 0, "far": 2}
+    assert s.frames_over_budget == 1
+
+
+def test_fence_is_never_cut_by_budget():
+    s, tracker = scheduler(budget_faces=1), IdentityTracker()
+    boxes = [NEAR, IN_FENCE, (650, 150, 700, 260)]
+    assert sorted(s.plan(tracker, frame(tracker, boxes), boxes)) == [1, 2]
+    assert s.stats()["deferred"]["near"] == 1
+
+
+def test_deferred_tracks_run_on_later_frames():
+    s, tracker = scheduler(budget_faces=1), IdentityTracker()
+    boxes = [FAR, (100, 350, 150, 450)]
+    seen = set()
+    for _ in range(2):
+        tracks = frame(tracker, boxes)
+        for i in s.plan(tracker, tracks, boxes):
+            tracker.record(tracks[i], "An", 0.4)
+            seen.add(tracks[i].track_id)
+    assert len(seen) == 2
+
+
+def test_ms_budget_uses_measured_face_cost():
+    s, tracker = scheduler(budget_faces=0, budget_ms=25), IdentityTracker()
+    s.record_cost(30, 3)   # 10 ms / mat -> 2 mat moi frame
+    boxes = [(x, 350, x + 50, 450) for x in (0, 100, 200, 300)]
+    assert len(s.plan(tracker, frame(tracker, boxes), boxes)) == 2
+    s.record_cost(0, 0)    # Lo rong khong lam thay doi uoc luong
+    assert s.face_cost_ms == 10
+
+
+def test_unlimited_budget():
+    s, tracker = scheduler(budget_faces=0), IdentityTracker()
+    boxes = [(x, 350, x + 50, 450) for x in (0, 100, 200, 300, 400)]
+    assert len(s.plan(tracker, frame(tracker, boxes), boxes)) == 5
+    assert s.frames_over_budget == 0
+
+
+def test_refresh_interval_by_priority():
+    s, tracker = scheduler(budget_faces=0, refresh_near=3, refresh_far=6), IdentityTracker()
+    boxes = [IN_FENCE, NEAR, FAR]
+    runs = [0, 0, 0]
+    for _ in range(12):
+        tracks = frame(tracker, boxes)
+        for i in s.plan(tracker, tracks, boxes):
+            tracker.record(tracks[i], "An", 0.4)
+            runs[i] += 1
+    assert runs == [12, 4, 2]
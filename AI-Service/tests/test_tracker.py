@@ -0,0 +1,96 @@
+"""Tracker: ghep box theo IoU/tam, xoa track mat dau, khi nao can nhan dien lai, bau chon danh tinh."""
+import numpy as np
+from edge_ai.tracker import IdentityTracker, PROCESSING, iou_matrix
+
+
+def tracker(**kw):
+    kw.setdefault("max_missed", 2)
+    kw.setdefault("reembed_every", 5)
+    kw.setdefault("vote_window", 5)
+    return IdentityTracker(**kw)
+
+
+def test_iou_matrix():
+    iou = iou_matrix([(0, 0, 10, 10)], [(0, 0, 10, 10), (5, 0, 15, 10), (20, 20, 30, 30)])
+    assert np.allclose(iou, [[1.0, 50 / 150, 0.0]])
+    assert iou_matrix([], [(0, 0, 1, 1)]).shape == (0, 1)
+
+
+def test_keeps_id_across_frames():
+    t = tracker()
+    a, b = t.update([(0, 0, 100, 200), (300, 0, 400, 200)])
+    a2, b2 = t.update([(305, 5, 405, 205), (4, 2, 104, 202)])  # Thu tu box dao nguoc
+    assert (a2.track_id, b2.track_id) == (b.track_id, a.track_id)
+    assert len(t.tracks) == 2
+
+
+def test_fast_motion_matches_by_center():
+    t = tracker()
+    a, = t.update([(0, 0, 100, 200)])
+    a2, = t.update([(60, 0, 160, 200)])  # IoU = 0.25 < 0.3 nhung tam lech 60 < 100
+    assert a2 is a
+
+
+def test_lost_track_is_dropped_after_max_missed():
+    t = tracker(max_missed=2)
+    a, = t.update([(0, 0, 100, 200)])
+    for _ in range(2):
+        t.update([])
+    assert t.tracks == [a]
+    t.update([])
+    assert t.tracks == []
+    b, = t.update([(0, 0, 100, 200)])
+    assert b.track_id != a.track_id
+
+
+def test_needs_embedding_schedule():
+    t = tracker(reembed_every=3, min_agreement=0.6)
+    box = (0, 0, 100, 200)
+    track, = t.update([box])
+    assert t.needs_embedding(track)
+    t.record(track, "An", 0.4)
+    for _ in range(2):
+        track, = t.update([box])
+        assert not t.needs_embedding(track)
+    track, = t.update([box])
+    assert t.needs_embedding(track)  # Den han K frame
+    t.record(track, "An", 0.84)
+    assert t.needs_embedding(track)  # Gan nguong 0.85 -> chua chac chan
+
+
+def test_processing_result_does_not_mark_embedded():
+    t = tracker()
+    track, = t.update([(0, 0, 100, 200)])
+    t.record(track, PROCESSING, float("inf"))
+    assert t.needs_embedding(track)
+    assert track.name == PROCESSING and t.embed_calls == 1
+
+
+def test_majority_vote_and_low_agreement():
+    t = tracker(min_agreement=0.6)
+    track, = t.update([(0, 0, 100, 200)])
+    for name in ("An", "An", "Binh"):
+        t.record(track, name, 0.4)
+    assert track.name == "An"
+    assert track.agreement == 2 / 3
+    t.record(track, "Binh", 0.4)
+    assert t.needs_embedding(track)  # 2/4 < 0.6
+
+
+def test_reset_identities_forces_reembed():
+    t = tracker()
+    track, = t.update([(0, 0, 100, 200)])
+    t.record(track, "An", 0.4)
+    assert not t.needs_embedding(track)
+    t.reset_identities()
+    assert t.needs_embedding(track) and not track.votes
+
+
+def test_embed_ratio():
+    t = tracker(reembed_every=10)
+    for _ in range(4):
+        for track in t.update([(0, 0, 100, 200), (300, 0, 400, 200)]):
+            if t.needs_embedding(track):
+                t.record(track, "An", 0.4)
+    assert t.boxes_seen == 8 and t.embed_calls == 2
+    assert t.embed_ratio == 0.25
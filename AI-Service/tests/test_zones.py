@@ -0,0 +1,67 @@
+"""ZoneMap: loc raster + xac nhan chinh xac phai khop check_box_overlap (FENCE_BOX cu), ke ca box sat vien."""
+import numpy as np
+import pytest
+
+from edge_ai.scheduler import check_box_overlap
+from edge_ai.zones import Zone, ZoneMap
+
+FENCE = (500, 50, 750, 300)
+FRAME = (600, 800, 3)
+
+
+def boundary_boxes(rng, n=2000):
+    """Box co 1 canh nam trong +-8 px quanh vien vung"""
+    x1 = rng.integers(0, 800, n)
+    y1 = rng.integers(0, 600, n)
+    w, h = rng.integers(1, 120, n), rng.integers(1, 200, n)
+    boxes = np.stack([x1, y1, x1 + w, y1 + h], axis=1)
+    edge = rng.integers(0, 4, n)
+    value = np.array(FENCE)[[2, 3, 0, 1]][edge] + rng.integers(-8, 9, n)  # canh trai sat vien phai, ...
+    boxes[np.arange(n), edge] = value
+    boxes[:, 2] = np.maximum(boxes[:, 2], boxes[:, 0])
+    boxes[:, 3] = np.maximum(boxes[:, 3], boxes[:, 1])
+    return boxes
+
+
+@pytest.mark.parametrize("scale", [1, 4, 8])
+def test_box_hits_match_check_box_overlap(scale):
+    zones = ZoneMap.from_box(FENCE, scale=scale)
+    zones.prepare(FRAME)
+    boxes = boundary_boxes(np.random.default_rng(scale))
+    expected = [check_box_overlap(tuple(b), FENCE) for b in boxes]
+    assert zones.hit_boxes(boxes)[:, 0].tolist() == expected
+
+
+def test_reported_false_positives():
+    zones = ZoneMap.from_box(FENCE)
+    zones.prepare(FRAME)
+    boxes = [(x, 100, x + 60, 200) for x in (751, 754, 755)]
+    assert not zones.hit_boxes(boxes).any()
+    assert zones.hit_boxes([(750, 100, 810, 200)])[0, 0]  # Cham vien van la giao
+
+
+def test_polygon_path_matches_rectangle():
+    # Cung hinh chu nhat nhung 5 dinh -> di duong da giac (pointPolygonTest + canh)
+    x1, y1, x2, y2 = FENCE
+    zones = ZoneMap([Zone("poly", [(x1, y1), (600, y1), (x2, y1), (x2, y2), (x1, y2)])])
+    zones.prepare(FRAME)
+    boxes = boundary_boxes(np.random.default_rng(7))
+    expected = [check_box_overlap(tuple(b), FENCE) for b in boxes]
+    assert zones.hit_boxes(boxes)[:, 0].tolist() == expected
+
+
+def test_triangle_and_points():
+    zones = ZoneMap([Zone("tri", [(100, 100), (300, 100), (100, 300)]), Zone("box", [(0, 0), (50, 0), (50, 50), (0, 50)])])
+    zones.prepare(FRAME)
+    # Box ngoai canh huyen (x + y > 400) nhung trong bbox cua tam giac
+    hits = zones.hit_boxes([(210, 210, 260, 260), (190, 190, 260, 260), (120, 120, 130, 130), (0, 400, 10, 410)])
+    assert hits.tolist() == [[False, False], [True, False], [True, False], [False, False]]
+    points = zones.hit_points([(201, 201), (199, 199), (100, 100), (50, 50), (51, 50), (-5, 10)])
+    assert points.tolist() == [[False, False], [True, False], [True, False], [False, True], [False, False],
+                               [False, False]]
+
+
+def test_zones_follow_frame_size():
+    zones = ZoneMap([Zone("z", [(400, 300), (800, 300), (800, 600), (400, 600)])], frame_size=(800, 600))
+    zones.prepare((1200, 1600, 3))
+    assert zones.hit_points([(799, 601), (801, 601)])[:, 0].tolist() == [False, True]
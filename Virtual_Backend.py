@@ -0,0 +1,240 @@
+"""Server gia lap cac API an ninh cua Backend (Node) de thu Edge AI / ESP32 ma khong can Cloud.
+
+    python Virtual_Backend.py --port 3000
+    python Virtual_Backend.py --fail-rate 0.3 --latency-ms 200     # gia lap mang cham / chap chon
+    python Virtual_Backend.py --no-push                            # backend cu chi co alert-status (poll)
+
+Edge AI:  EDGE_BACKEND_URL=http://localhost:3000 python -m edge_ai monitor --no-ui
+Thong ke: GET /__stats
+"""
+import argparse
+import json
+import queue
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Cùng logic với security.controller.js: chỉ tính alert active trong 5 phút gần nhất
+ACTIVE_WINDOW_SEC = 5 * 60
+STREAM_HEARTBEAT_SEC = 15
+
+
+class SecurityState:
+    """Luu log trong bo nho, giong collection SecurityLog"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.logs = []
+        self.requests = {}
+        self.subscribers = set()  # Moi ket noi alert-stream co 1 queue rieng
+        self.pushed = 0
+        self._expiry = None
+
+    def count(self, route):
+        with self.lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def create_log(self, body):
+        log = {
+            "_id": str(len(self.logs) + 1),
+            "type": body.get("type"),
+            "title": body.get("title"),
+            "message": body.get("message"),
+            "detectedName": body.get("detectedName"),
+            "imageUrl": body.get("imageUrl"),
+            "status": "active",
+            "timestamp": time.time(),
+        }
+        with self.lock:
+            self.logs.append(log)
+        return log
+
+    def subscribe(self):
+        q = queue.Queue()
+        with self.lock:
+            self.subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.subscribers.discard(q)
+
+    def broadcast(self, payload):
+        with self.lock:
+            subscribers = list(self.subscribers)
+            self.pushed += len(subscribers)
+        for q in subscribers:
+            q.put(payload)
+
+    def arm_expiry(self, alert):
+        """Canh bao het cua so ACTIVE_WINDOW_SEC ma khong co canh bao moi -> day SAFE (alert=None: huy hen)"""
+        with self.lock:
+            if self._expiry:
+                self._expiry.cancel()
+            self._expiry = None
+            if alert is None:
+                return
+            delay = max(0.0, alert["timestamp"] + ACTIVE_WINDOW_SEC - time.time())
+            self._expiry = threading.Timer(delay + 0.05, self._expire)
+            self._expiry.daemon = True
+            self._expiry.start()
+
+    def _expire(self):
+        alert = self.active_alert()
+        if alert:
+            self.arm_expiry(alert)  # Co canh bao moi hon -> hen theo canh bao do
+        else:
+            self.broadcast(alert_payload(None))
+
+    def active_alert(self):
+        cutoff = time.time() - ACTIVE_WINDOW_SEC
+        with self.lock:
+            for log in reversed(self.logs):
+                if log["type"] in ("WARNING", "DANGER") and log["status"] == "active" and log["timestamp"] >= cutoff:
+                    return log
+        return None
+
+    def reset(self):
+        modified = 0
+        with self.lock:
+            for log in self.logs:
+                if log["status"] == "active" and log["type"] in ("WARNING", "DANGER"):
+                    log["status"] = "resolved"
+                    modified += 1
+        return modified
+
+
+def alert_payload(alert):
+    if alert:
+        return {"shouldAlert": True, "message": "INTRUSION DETECTED", "type": alert["type"],
+                "timestamp": alert["timestamp"]}
+    return {"shouldAlert": False, "message": "SAFE"}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive giong server that
+    # wfile co bo dem: header + body ra socket trong 1 lan ghi khi flush (cuoi moi request / _stream tu flush).
+    # Ghi 2 lan (header roi body) -> Nagle + delayed ACK cua client lam moi response keep-alive tre ~40 ms
+    wbufsize = 64 * 1024
+    state = None
+    options = None
+
+    def log_message(self, fmt, *args):
+        if self.options.verbose:
+            super().log_message(fmt, *args)
+
+    def _json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.wfile.flush()
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw) if raw else {}
+
+    def _simulate_network(self):
+        """Tra ve True neu request nay bi 'loi' theo --fail-rate"""
+        if self.options.latency_ms:
+            time.sleep(self.options.latency_ms / 1000)
+        if self.options.fail_rate and random.random() < self.options.fail_rate:
+            self._json(503, {"success": False, "message": "Simulated outage"})
+            return True
+        return False
+
+    def _stream(self):
+        """Server-Sent Events: gui trang thai hien tai roi day moi thay doi cho den khi client ngat"""
+        q = self.state.subscribe()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")  # Giong Express: moi res.write la 1 chunk
+        self.end_headers()
+        self.close_connection = True
+
+        def send(text):
+            data = text.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        try:
+            payload = alert_payload(self.state.active_alert())
+            send(f"retry: 3000\nevent: status\ndata: {json.dumps(payload)}\n\n")
+            while True:
+                try:
+                    payload = q.get(timeout=STREAM_HEARTBEAT_SEC)
+                    send(f"event: status\ndata: {json.dumps(payload)}\n\n")
+                except queue.Empty:
+                    send(": ping\n\n")
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            self.state.unsubscribe(q)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        self.state.count(f"GET {path}")
+        if path == "/__stats":
+            with self.state.lock:
+                return self._json(200, {"requests": self.state.requests, "logs": len(self.state.logs),
+                                        "subscribers": len(self.state.subscribers), "pushed": self.state.pushed})
+        if self._simulate_network():
+            return
+        if path == "/api/security/alert-status":
+            return self._json(200, alert_payload(self.state.active_alert()))
+        if path == "/api/security/alert-stream" and not self.options.no_push:
+            return self._stream()
+        if path == "/api/security/logs":
+            with self.state.lock:
+                logs = list(reversed(self.state.logs))[:20]
+            return self._json(200, {"success": True, "count": len(logs), "data": logs})
+        self._json(404, {"success": False, "message": "Not found"})
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        self.state.count(f"POST {path}")
+        body = self._body()
+        if self._simulate_network():
+            return
+        if path == "/api/security/log":
+            log = self.state.create_log(body)
+            if log["type"] in ("WARNING", "DANGER"):
+                self.state.broadcast(alert_payload(log))
+                self.state.arm_expiry(log)
+            return self._json(201, {"success": True, "data": log})
+        if path == "/api/security/reset-alarm":
+            modified = self.state.reset()
+            self.state.broadcast(alert_payload(None))
+            self.state.arm_expiry(None)
+            return self._json(200, {"success": True, "message": "Alarm reset successfully (Logs marked as resolved)",
+                                    "modifiedCount": modified})
+        self._json(404, {"success": False, "message": "Not found"})
+
+
+def make_server(port=3000, fail_rate=0.0, latency_ms=0, verbose=False, state=None, no_push=False):
+    options = argparse.Namespace(fail_rate=fail_rate, latency_ms=latency_ms, verbose=verbose, no_push=no_push)
+    handler = type("BoundHandler", (Handler,), {"state": state or SecurityState(), "options": options})
+    server_class = type("BackendServer", (ThreadingHTTPServer,), {"request_queue_size": 1024})  # Chiu duoc ca fleet ket noi cung luc
+    server = server_class(("0.0.0.0", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Virtual security backend")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Ty le request tra ve 503 (0..1)")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Do tre them cho moi request")
+    parser.add_argument("--no-push", action="store_true", help="Tat /alert-stream (thiet bi phai poll)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    server = make_server(args.port, args.fail_rate, args.latency_ms, args.verbose, no_push=args.no_push)
+    print(f"[VIRTUAL BACKEND] Listening on http://localhost:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,60 +1,196 @@
+import argparse
+import json
+import os
 import requests
 import time
-import tkinter as tk
-from tkinter import font
 import threading
-import winsound  # Win only
+from datetime import datetime
+
+try:
+    import tkinter as tk
+except ImportError:  # May chu Linux khong co Tk -> dung --headless
+    tk = None
+
+try:
+    import winsound  # Win only
+except ImportError:
+    winsound = None
 
 # CẤU HÌNH
-API_URL = "http://localhost:3000/api/security/alert-status"
+BACKEND_URL = os.getenv("ESP32_BACKEND_URL", "http://localhost:3000")
+API_URL = f"{BACKEND_URL}/api/security/alert-status"
+STREAM_URL = f"{BACKEND_URL}/api/security/alert-stream"
 POLL_INTERVAL = 0.5  # Giây - Giam xuong 0.5s de phan hoi nhanh hon
+LINK_MODE = os.getenv("ESP32_MODE", "auto")  # auto: push (SSE), fallback poll | push | poll
+PUSH_RETRY_SEC = 60       # Che do auto: dang poll thi sau bao lau thu push lai
+BACKOFF_MAX = 30          # Giay, backoff toi da khi mat ket noi
+STREAM_READ_TIMEOUT = 45  # Server gui heartbeat moi 15s -> 45s khong co gi la mat ket noi
+
+
+class PushUnavailable(Exception):
+    """Backend khong co /alert-stream (ban cu) -> phai poll"""
+
+
+def alert_timestamp(data):
+    """Thoi diem backend tao alert (epoch giay), de do do tre lan truyen"""
+    ts = data.get("timestamp")
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    if isinstance(ts, str):
+        try:
+            return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+class AlarmLink:
+    """Ket noi thiet bi <-> backend: subscribe SSE neu co, mat ket noi thi backoff, khong co push thi poll"""
+    def __init__(self, on_status, on_info=None, mode=LINK_MODE, session=None):
+        self.on_status = on_status
+        self.on_info = on_info or (lambda text: None)
+        self.mode = mode
+        self.session = session or requests.Session()  # Giu ket noi (keep-alive) thay vi mo moi moi lan
+        self.transport = None
+        self.should_alert = None
+        # Thong ke
+        self.requests = 0
+        self.push_events = 0
+        self.reconnects = 0
+        self.delays = []  # Do tre tu luc backend tao alert den luc thiet bi bao dong (giay)
+        self._stop = threading.Event()
+        self._retry_push_at = 0.0
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                if self.mode != "poll" and time.monotonic() >= self._retry_push_at:
+                    self._listen()
+                    backoff = 1  # Stream dong binh thuong -> ket noi lai ngay
+                    continue
+                self._poll_once()
+                backoff = 1
+                self._stop.wait(POLL_INTERVAL)
+            except PushUnavailable:
+                if self.mode == "push":
+                    self.on_info("Status: Push not supported")
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, BACKOFF_MAX)
+                else:
+                    print(f"[ESP32] Push unavailable -> polling every {POLL_INTERVAL}s")
+                    self._retry_push_at = time.monotonic() + PUSH_RETRY_SEC
+            except (requests.RequestException, ValueError):
+                self.reconnects += 1
+                self.transport = None
+                self.on_info("Status: Disconnected")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, BACKOFF_MAX)
+
+    def _poll_once(self):
+        # 1. Gọi API như ESP32 thật
+        self.requests += 1
+        response = self.session.get(API_URL, timeout=(3, 10))
+        if response.status_code != 200:
+            self.on_info("Status: Server Error")
+            raise requests.HTTPError(response.status_code)
+        self.transport = "poll"
+        self._apply(response.json())
+
+    def _listen(self):
+        self.requests += 1
+        with self.session.get(STREAM_URL, stream=True, timeout=(3, STREAM_READ_TIMEOUT)) as response:
+            if response.status_code in (404, 405, 501):
+                raise PushUnavailable()
+            response.raise_for_status()
+            self.transport = "push"
+            self.on_info("Status: Connected (push)")
+            event, data = "message", []
+            for line in response.iter_lines(decode_unicode=True):
+                if self._stop.is_set():
+                    return
+                if line:
+                    field, _, value = line.partition(":")
+                    if field == "event":
+                        event = value.strip()
+                    elif field == "data":
+                        data.append(value.strip())
+                    continue
+                # Dong trong = ket thuc 1 su kien
+                if event == "status" and data:
+                    self.push_events += 1
+                    self._apply(json.loads("\n".join(data)))
+                event, data = "message", []
+
+    def _apply(self, data):
+        # Backend trả về "shouldAlert": true/false
+        should_alert = data.get("shouldAlert") == True or data.get("status") == "ALARM"
+        if should_alert and not self.should_alert:
+            created = alert_timestamp(data)
+            if created:
+                self.delays.append(max(0.0, time.time() - created))
+        if should_alert != self.should_alert:
+            self.should_alert = should_alert
+            self.on_status(should_alert)
+
+    def stats(self):
+        delays = sorted(self.delays)
+        return {
+            "transport": self.transport,
+            "requests": self.requests,
+            "push_events": self.push_events,
+            "reconnects": self.reconnects,
+            "alarms": len(delays),
+            "delay_ms_p50": round(delays[len(delays) // 2] * 1000, 1) if delays else None,
+            "delay_ms_max": round(delays[-1] * 1000, 1) if delays else None,
+        }
+
+
+def beep():
+    if winsound:
+        winsound.Beep(1000, 300)  # Tần số 1000Hz, 300ms
+    else:
+        print("\a", end="", flush=True)
+        time.sleep(0.3)
+
 
 class VirtualIoTDevice:
-    def __init__(self, root):
+    def __init__(self, root, mode=LINK_MODE):
         self.root = root
         self.root.title("VIRTUAL IOT DEVICE (ESP32 SIMULATOR)")
         self.root.geometry("400x300")
         self.root.configure(bg="#2c3e50")
-        
+
         self.is_alarm_active = False
         self.status = "SAFE"
-        
+
         # UI
         self.lbl_title = tk.Label(root, text="ESP32 SIMULATOR", font=("Arial", 16, "bold"), bg="#2c3e50", fg="white")
         self.lbl_title.pack(pady=20)
-        
+
         self.lbl_status = tk.Label(root, text="SYSTEM SAFE", font=("Arial", 24, "bold"), bg="#2c3e50", fg="#2ecc71")
         self.lbl_status.pack(expand=True)
-        
+
         self.lbl_info = tk.Label(root, text="Status: Connected to Server", bg="#2c3e50", fg="#95a5a6")
         self.lbl_info.pack(side=tk.BOTTOM, pady=10)
-        
-        # Start Worker
-        threading.Thread(target=self.poll_server, daemon=True).start()
-        
-    def poll_server(self):
-        while True:
-            try:
-                # 1. Gọi API như ESP32 thật
-                response = requests.get(API_URL)
-                if response.status_code == 200:
-                    data = response.json()
-                    # Cấu trúc JSON trả về: { "status": "ALARM" } hoặc { "status": "SAFE" } giả định
-                    # Nhưng theo code Backend bạn gửi trước đó, API trả về trạng thái
-                    
-                    # Logic kiểm tra báo động từ Server
-                    # Backend trả về "shouldAlert": true/false
-                    if data.get("shouldAlert") == True or data.get("status") == "ALARM":
-                        self.trigger_alarm()
-                    else:
-                        self.stop_alarm()
-                else:
-                    self.lbl_info.config(text="Status: Server Error")
-            except Exception as e:
-                self.lbl_info.config(text="Status: Disconnected")
-                # print(e)
-            
-            time.sleep(POLL_INTERVAL)
+
+        # Start Worker (callback chay tren luong mang -> chuyen ve luong Tk)
+        self.link = AlarmLink(on_status=lambda alert: self.root.after(0, self.on_status, alert),
+                              on_info=lambda text: self.root.after(0, self.lbl_info.config, {"text": text}),
+                              mode=mode).start()
+
+    def on_status(self, should_alert):
+        if should_alert:
+            self.trigger_alarm()
+        else:
+            self.stop_alarm()
 
     def trigger_alarm(self):
         if self.status != "ALARM":
@@ -78,11 +214,37 @@ class VirtualIoTDevice:
         def run():
             # Kêu liên tục cho đến khi tắt alarm
             while self.status == "ALARM":
-                winsound.Beep(1000, 300)  # Tần số 1000Hz, 300ms
+                beep()
                 time.sleep(0.2)  # Nghỉ 200ms giữa các tiếng bíp
         threading.Thread(target=run, daemon=True).start()
 
+
+def run_headless(mode, duration):
+    """Khong can Tk: in trang thai va thong ke (so request, do tre) khi ket thuc"""
+    def on_status(alert):
+        print(f"[ESP32] {'!!! INTRUSION !!! SIREN ON' if alert else 'SYSTEM SAFE'}")
+
+    link = AlarmLink(on_status, on_info=print, mode=mode).start()
+    try:
+        if duration:
+            time.sleep(duration)
+        else:
+            threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    link.stop()
+    print(f"[STATS] {link.stats()}")
+
+
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = VirtualIoTDevice(root)
-    root.mainloop()
+    parser = argparse.ArgumentParser(description="Virtual ESP32 alarm device")
+    parser.add_argument("--mode", choices=("auto", "push", "poll"), default=LINK_MODE)
+    parser.add_argument("--headless", action="store_true", help="Khong mo cua so Tk")
+    parser.add_argument("--duration", type=float, default=0, help="Headless: chay N giay roi in thong ke")
+    args = parser.parse_args()
+    if args.headless or tk is None:
+        run_headless(args.mode, args.duration)
+    else:
+        root = tk.Tk()
+        app = VirtualIoTDevice(root, mode=args.mode)
+        root.mainloop()
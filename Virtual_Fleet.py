@@ -0,0 +1,356 @@
+"""Gia lap ca doi ESP32 (hang tram - hang nghin thiet bi) trong 1 process asyncio, khong can Tk / winsound.
+
+    python Virtual_Backend.py --port 3000
+    python Virtual_Fleet.py --devices 500 --mode poll --duration 30
+    python Virtual_Fleet.py --devices 2000 --mode push --alarm-every 5
+    python Virtual_Fleet.py --devices 200 --spawn-server          # tu chay Virtual_Backend trong process
+
+Trong luc chay, fleet tu gui DANGER / reset-alarm xen ke (--alarm-every) va do:
+so request/giay, do tre request p50/p95/p99 va do tre lan truyen bao dong (tu luc gui den luc thiet bi doi trang thai).
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+POLL_INTERVAL = 0.5  # Giong Virtual_ESP32
+BACKOFF_MAX = 30
+STREAM_READ_TIMEOUT = 45
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def summarize_ms(values):
+    values = sorted(values)
+    return {f"p{p}": round(percentile(values, p) * 1000, 1) if values else None for p in (50, 95, 99)}
+
+
+class HttpError(Exception):
+    pass
+
+
+async def read_head(reader):
+    """Doc status line + header, tra ve (status, headers)"""
+    line = await reader.readline()
+    if not line:
+        raise HttpError("connection closed")
+    status = int(line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    return status, headers
+
+
+async def iter_chunks(reader):
+    """Transfer-Encoding: chunked -> tung chunk ngay khi den (dung cho ca SSE)"""
+    while True:
+        size = int((await reader.readline()).split(b";")[0], 16)
+        if size == 0:
+            await reader.readline()
+            return
+        data = await reader.readexactly(size)
+        await reader.readline()
+        yield data
+
+
+def build_request(method, host, path, body=None):
+    payload = json.dumps(body).encode() if body is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n"
+    if body is not None:
+        head += f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+    return (head + "\r\n").encode() + payload
+
+
+class HttpPool:
+    """Connection pool HTTP/1.1 keep-alive dung chung cho ca fleet (toi da `size` ket noi)"""
+    def __init__(self, url, size=100, timeout=10):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.netloc = parts.netloc
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []
+        self.opened = 0
+
+    async def _connect(self):
+        self.opened += 1
+        return await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, body=None):
+        async with self._slots:
+            reused = bool(self._idle)
+            conn = self._idle.pop() if reused else await self._connect()
+            try:
+                status, data, keep = await asyncio.wait_for(self._send(conn, method, path, body), self.timeout)
+            except (OSError, asyncio.IncompleteReadError, HttpError):
+                conn[1].close()
+                if not reused:
+                    raise
+                # Server da dong ket noi keep-alive dang ranh -> thu lai 1 lan voi ket noi moi
+                conn = await self._connect()
+                try:
+                    status, data, keep = await asyncio.wait_for(self._send(conn, method, path, body), self.timeout)
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, HttpError, ValueError):
+                    conn[1].close()
+                    raise
+            except (asyncio.TimeoutError, ValueError):
+                conn[1].close()
+                raise
+            if keep:
+                self._idle.append(conn)
+            else:
+                conn[1].close()
+            return status, data
+
+    async def _send(self, conn, method, path, body):
+        reader, writer = conn
+        writer.write(build_request(method, self.netloc, path, body))
+        await writer.drain()
+        status, headers = await read_head(reader)
+        if headers.get("transfer-encoding") == "chunked":
+            data = b"".join([chunk async for chunk in iter_chunks(reader)])
+        else:
+            data = await reader.readexactly(int(headers.get("content-length") or 0))
+        return status, data, headers.get("connection", "").lower() != "close"
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle = []
+
+
+class FleetStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latencies = []     # Do tre tung request (giay)
+        self.propagation = {True: [], False: []}  # Do tre lan truyen: bao dong / tat coi
+        self.streams = 0
+        self.reconnects = 0
+        self.push_events = 0
+
+
+class VirtualDevice:
+    """1 ESP32 ao: poll alert-status qua pool chung hoac giu 1 ket noi SSE rieng"""
+    def __init__(self, device_id, fleet):
+        self.device_id = device_id
+        self.fleet = fleet
+        self.should_alert = None
+
+    def apply(self, data):
+        should_alert = bool(data.get("shouldAlert"))
+        if should_alert == self.should_alert:
+            return
+        self.should_alert = should_alert
+        injected = self.fleet.injected_at.get(should_alert)
+        if injected is not None and self.should_alert == self.fleet.target:
+            self.fleet.stats.propagation[should_alert].append(time.monotonic() - injected)
+
+    async def poll(self):
+        fleet, stats = self.fleet, self.fleet.stats
+        await asyncio.sleep(random.random() * fleet.poll_interval)  # Rai deu, khong ban cung luc
+        backoff = 1
+        while not fleet.stopping.is_set():
+            t0 = time.monotonic()
+            stats.requests += 1
+            try:
+                status, body = await fleet.pool.request("GET", "/api/security/alert-status")
+                stats.latencies.append(time.monotonic() - t0)
+                if status != 200:
+                    raise HttpError(status)
+                self.apply(json.loads(body))
+                backoff = 1
+                delay = fleet.poll_interval - (time.monotonic() - t0)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, HttpError, ValueError):
+                stats.errors += 1
+                delay, backoff = backoff, min(backoff * 2, BACKOFF_MAX)
+            await fleet.sleep(max(0.0, delay))
+
+    async def listen(self):
+        fleet, stats = self.fleet, self.fleet.stats
+        await asyncio.sleep(random.random() * fleet.ramp)
+        backoff = 1
+        while not fleet.stopping.is_set():
+            writer = None
+            t0 = time.monotonic()
+            stats.requests += 1
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(fleet.pool.host, fleet.pool.port), 10)
+                writer.write(build_request("GET", fleet.pool.netloc, "/api/security/alert-stream"))
+                await writer.drain()
+                status, headers = await asyncio.wait_for(read_head(reader), 10)
+                stats.latencies.append(time.monotonic() - t0)
+                if status != 200:
+                    raise HttpError(status)
+                stats.streams += 1
+                backoff = 1
+                await self._read_events(reader)
+            except StopAsyncIteration:
+                pass  # Server ket thuc stream -> ket noi lai ngay
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, HttpError, ValueError):
+                if fleet.stopping.is_set():
+                    break
+                stats.errors += 1
+                await fleet.sleep(backoff)
+                backoff = min(backoff * 2, BACKOFF_MAX)
+            finally:
+                if writer:
+                    writer.close()
+            if not fleet.stopping.is_set():
+                stats.reconnects += 1
+
+    async def _read_events(self, reader):
+        buffer = b""
+        chunks = iter_chunks(reader)
+        while not self.fleet.stopping.is_set():
+            chunk = await asyncio.wait_for(chunks.__anext__(), STREAM_READ_TIMEOUT)
+            buffer += chunk
+            while b"\n\n" in buffer:
+                raw, buffer = buffer.split(b"\n\n", 1)
+                event, data = "message", []
+                for line in raw.decode().split("\n"):
+                    field, _, value = line.partition(":")
+                    if field == "event":
+                        event = value.strip()
+                    elif field == "data":
+                        data.append(value.strip())
+                if event == "status" and data:
+                    self.fleet.stats.push_events += 1
+                    self.apply(json.loads("\n".join(data)))
+
+
+class Fleet:
+    def __init__(self, url, devices, mode="poll", pool_size=100, poll_interval=POLL_INTERVAL,
+                 alarm_every=5.0, ramp=2.0):
+        self.url = url
+        self.devices = devices
+        self.mode = mode
+        self.pool_size = pool_size
+        self.poll_interval = poll_interval
+        self.alarm_every = alarm_every
+        self.ramp = ramp
+        self.stats = FleetStats()
+        self.injected_at = {}
+        self.target = None
+        self.injections = 0
+
+    async def sleep(self, seconds):
+        try:
+            await asyncio.wait_for(self.stopping.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def inject(self):
+        """Xen ke gui DANGER va reset-alarm (giong Edge AI), ghi lai thoi diem gui"""
+        await self.sleep(self.ramp + 1)
+        alarm = True
+        while not self.stopping.is_set():
+            # Ghi truoc khi gui: SSE co the day trang thai moi toi thiet bi truoc khi POST tra ve
+            self.injected_at[alarm] = time.monotonic()
+            self.target = alarm
+            try:
+                if alarm:
+                    await self.control.request("POST", "/api/security/log",
+                                               {"type": "DANGER", "title": "Fleet test", "message": "Injected",
+                                                "detectedName": "INTRUDER"})
+                else:
+                    await self.control.request("POST", "/api/security/reset-alarm")
+                self.injections += 1
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, HttpError, ValueError):
+                print("[FLEET] Injection failed")
+            alarm = not alarm
+            await self.sleep(self.alarm_every)
+
+    async def run(self, duration, report_every=5.0):
+        self.stopping = asyncio.Event()
+        self.pool = HttpPool(self.url, self.pool_size)
+        self.control = HttpPool(self.url, 1)  # Ket noi rieng cho lenh bao dong, khong xep hang sau fleet
+        fleet = [VirtualDevice(i, self) for i in range(self.devices)]
+        tasks = [asyncio.create_task(d.listen() if self.mode == "push" else d.poll()) for d in fleet]
+        if self.alarm_every:
+            tasks.append(asyncio.create_task(self.inject()))
+
+        started = time.monotonic()
+        last, last_requests = started, 0
+        while time.monotonic() - started < duration:
+            await self.sleep(min(report_every, duration - (time.monotonic() - started)))
+            now = time.monotonic()
+            rate = (self.stats.requests - last_requests) / max(now - last, 1e-6)
+            last, last_requests = now, self.stats.requests
+            alerting = sum(1 for d in fleet if d.should_alert)
+            print(f"[FLEET] t={now - started:.0f}s req/s={rate:.0f} errors={self.stats.errors} "
+                  f"alerting={alerting}/{self.devices}")
+
+        self.stopping.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.pool.close()
+        self.control.close()
+        return self.report(time.monotonic() - started)
+
+    def report(self, elapsed):
+        stats = self.stats
+        return {
+            "mode": self.mode,
+            "devices": self.devices,
+            "duration_s": round(elapsed, 1),
+            "requests": stats.requests,
+            "req_per_s": round(stats.requests / elapsed, 1),
+            "errors": stats.errors,
+            "connections_opened": self.pool.opened if self.mode == "poll" else stats.streams,
+            "latency_ms": summarize_ms(stats.latencies),
+            "alarm_propagation_ms": summarize_ms(stats.propagation[True]),
+            "reset_propagation_ms": summarize_ms(stats.propagation[False]),
+            "injections": self.injections,
+            "push_events": stats.push_events,
+            "reconnects": stats.reconnects,
+        }
+
+
+def raise_fd_limit():
+    """Moi thiet bi push giu 1 socket -> nang gioi han file descriptor neu OS cho phep"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Virtual ESP32 fleet (asyncio, headless)")
+    parser.add_argument("--url", default="http://localhost:3000", help="Backend (Node hoac Virtual_Backend)")
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--mode", choices=("poll", "push"), default="poll")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--pool", type=int, default=100, help="So ket noi keep-alive dung chung (che do poll)")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL)
+    parser.add_argument("--alarm-every", type=float, default=5, help="Giay giua 2 lan gui DANGER/reset (0 = tat)")
+    parser.add_argument("--ramp", type=float, default=2, help="Rai ket noi push trong N giay dau")
+    parser.add_argument("--spawn-server", action="store_true", help="Chay Virtual_Backend ngay trong process nay")
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    if args.spawn_server:
+        from Virtual_Backend import make_server
+        port = urlsplit(args.url).port or 80
+        server = make_server(port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"[FLEET] Virtual backend on port {port}")
+
+    fleet = Fleet(args.url, args.devices, args.mode, args.pool, args.poll_interval, args.alarm_every, args.ramp)
+    report = asyncio.run(fleet.run(args.duration))
+    print(f"[STATS] {json.dumps(report)}")
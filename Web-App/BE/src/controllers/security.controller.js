@@ -1,5 +1,53 @@
 const SecurityLog = require('../models/security.model');
 
+// Các thiết bị ESP32 đang giữ kết nối Server-Sent Events
+const streamClients = new Set();
+const STREAM_HEARTBEAT_MS = 15000;
+const ACTIVE_WINDOW_MS = 5 * 60 * 1000;
+let expiryTimer = null;
+
+// Log WARNING/DANGER chưa xử lý trong 5 phút gần nhất (xem checkAlertStatus)
+const findActiveAlert = () => {
+    const fiveMinutesAgo = new Date(Date.now() - ACTIVE_WINDOW_MS);
+    return SecurityLog.findOne({
+        type: { $in: ['WARNING', 'DANGER'] },
+        status: 'active',
+        timestamp: { $gte: fiveMinutesAgo }
+    }).sort({ timestamp: -1 });
+};
+
+const alertPayload = (alert) => (alert
+    ? { shouldAlert: true, message: "INTRUSION DETECTED", type: alert.type, timestamp: alert.timestamp }
+    : { shouldAlert: false, message: "SAFE" });
+
+// Đẩy trạng thái mới tới mọi thiết bị đang subscribe (không cần query DB)
+const broadcastStatus = (payload) => {
+    const frame = `event: status\ndata: ${JSON.stringify(payload)}\n\n`;
+    for (const res of streamClients) {
+        res.write(frame);
+        if (res.flush) res.flush(); // compression middleware
+    }
+};
+
+// Cảnh báo hết cửa sổ 5 phút mà không có cảnh báo mới -> đẩy SAFE (thiết bị SSE không poll lại alert-status)
+const scheduleExpiry = (alert) => {
+    clearTimeout(expiryTimer);
+    expiryTimer = null;
+    if (!alert) return;
+    const delay = new Date(alert.timestamp).getTime() + ACTIVE_WINDOW_MS - Date.now();
+    expiryTimer = setTimeout(async () => {
+        expiryTimer = null;
+        try {
+            const activeAlert = await findActiveAlert();
+            if (activeAlert) scheduleExpiry(activeAlert); // Có cảnh báo mới hơn -> hẹn theo cảnh báo đó
+            else broadcastStatus(alertPayload(null));
+        } catch (error) {
+            console.error('Lỗi kiểm tra hết hạn cảnh báo:', error);
+        }
+    }, Math.max(0, delay) + 100);
+    if (expiryTimer.unref) expiryTimer.unref();
+};
+
 // @desc    Nhận log từ Python Edge AI và phát cảnh báo
 // @route   POST /api/security/log
 exports.createLog = async (req, res) => {
@@ -23,6 +71,10 @@ exports.createLog = async (req, res) => {
             io.emit('new-alert', newLog);
             console.log(`📡 Emitted 'new-alert': ${title}`);
         }
+        if (['WARNING', 'DANGER'].includes(type)) {
+            broadcastStatus(alertPayload(newLog));
+            scheduleExpiry(newLog);
+        }
 
         res.status(201).json({ success: true, data: newLog });
     } catch (error) {
@@ -57,23 +109,8 @@ exports.checkAlertStatus = async (req, res) => {
         // Tuy nhiên để tránh ESP32 hú mãi vì log cũ quên tắt, ta combine cả 2:
         // Active AND (trong 5 phút gần đây HOẶC vừa mới xảy ra)
         
-        const fiveMinutesAgo = new Date(Date.now() - 5 * 60 * 1000);
-
-        const activeAlert = await SecurityLog.findOne({
-            type: { $in: ['WARNING', 'DANGER'] },
-            status: 'active',
-            timestamp: { $gte: fiveMinutesAgo } 
-        }).sort({ timestamp: -1 });
-
-        if (activeAlert) {
-            return res.json({ 
-                shouldAlert: true, 
-                message: "INTRUSION DETECTED", 
-                type: activeAlert.type 
-            });
-        }
-
-        res.json({ shouldAlert: false, message: "SAFE" });
+        const activeAlert = await findActiveAlert();
+        res.json(alertPayload(activeAlert));
     } catch (error) {
         console.error('Lỗi check status:', error);
         res.status(500).json({ alert: false, error: 'Server Error' });
@@ -98,6 +135,8 @@ exports.resetAlarm = async (req, res) => {
                 timestamp: new Date() 
             });
         }
+        broadcastStatus(alertPayload(null));
+        scheduleExpiry(null);
 
         res.json({ 
             success: true, 
@@ -109,3 +148,38 @@ exports.resetAlarm = async (req, res) => {
         res.status(500).json({ success: false, error: 'Server Error' });
     }
 };
+
+// @desc    ESP32 subscribe trạng thái báo động (Server-Sent Events) thay vì poll alert-status
+// @route   GET /api/security/alert-stream
+exports.alertStream = async (req, res) => {
+    try {
+        const activeAlert = await findActiveAlert();
+        // Sau khi server khởi động lại, cảnh báo cũ trong DB cũng phải được hẹn hết hạn
+        if (activeAlert && !expiryTimer) scheduleExpiry(activeAlert);
+
+        res.writeHead(200, {
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'X-Accel-Buffering': 'no'
+        });
+        // Gửi trạng thái hiện tại ngay khi kết nối (hoặc kết nối lại)
+        res.write(`retry: 3000\nevent: status\ndata: ${JSON.stringify(alertPayload(activeAlert))}\n\n`);
+        if (res.flush) res.flush();
+        streamClients.add(res);
+
+        // Heartbeat để thiết bị phát hiện mất kết nối
+        const heartbeat = setInterval(() => {
+            res.write(': ping\n\n');
+            if (res.flush) res.flush();
+        }, STREAM_HEARTBEAT_MS);
+
+        req.on('close', () => {
+            clearInterval(heartbeat);
+            streamClients.delete(res);
+        });
+    } catch (error) {
+        console.error('Lỗi alert stream:', error);
+        res.status(500).json({ success: false, error: 'Server Error' });
+    }
+};
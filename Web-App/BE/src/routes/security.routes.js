@@ -11,6 +11,9 @@ router.get('/logs', securityController.getLogs);
 // @route   GET /api/security/alert-status
 router.get('/alert-status', securityController.checkAlertStatus);
 
+// @route   GET /api/security/alert-stream (Server-Sent Events)
+router.get('/alert-stream', securityController.alertStream);
+
 // @route   POST /api/security/reset-alarm
 router.post('/reset-alarm', securityController.resetAlarm);
 